@@ -5,6 +5,11 @@ from flask import Flask
 from flask_cors import CORS
 from .config import DevelopmentConfig, TestingConfig, ProductionConfig
 from .extensions import db, migrate, jwt
+from .utils.pubsub import init_broker
+from .utils.db_pool import init_db_pool
+from .utils.replica import init_replica
+from .utils.json_provider import init_json
+from .utils.compression import init_compression
 
 config_map = {
     "development": DevelopmentConfig,
@@ -16,10 +21,16 @@ def create_app(config_name="development"):
     app = Flask(__name__)
     config_class = config_map.get(config_name, DevelopmentConfig)
     app.config.from_object(config_class)
+    init_json(app)
 
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
+    init_broker(app)
+    init_replica(app)
+    init_compression(app)
+    with app.app_context():
+        init_db_pool(app)
     # Enable CORS for all routes (development only)
     CORS(app, resources={r"/*": {"origins": "*"}})
 
@@ -42,5 +53,23 @@ def create_app(config_name="development"):
     from .routes.menu_items.menu_items import menu_items_bp
     app.register_blueprint(menu_items_bp)  
 
+    from .routes.orders.order import orders_bp
+    app.register_blueprint(orders_bp)
+
+    from .routes.stations.stations import stations_bp
+    app.register_blueprint(stations_bp)
+
+    from .routes.reports.reports import reports_bp
+    app.register_blueprint(reports_bp)
+
+    from .routes.sync.sync import sync_bp
+    app.register_blueprint(sync_bp)
+
+    from .routes.reports.rollups import rollups_cli
+    app.cli.add_command(rollups_cli)
+
+    from .utils.outbox import outbox_cli
+    app.cli.add_command(outbox_cli)
+
 
     return app
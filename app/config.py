@@ -1,4 +1,33 @@
 import os
+
+
+def env_bool(name, default=False):
+    return os.environ.get(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+def engine_options(pool_size, max_overflow, pool_timeout, pool_recycle, pre_ping,
+                   statement_timeout_ms, pgbouncer):
+    """
+    SQLAlchemy engine options for one worker process.
+
+    statement_timeout is sent as a libpq startup option on direct
+    connections. PgBouncer in transaction mode rejects startup options, so in
+    that mode it is applied per transaction with SET LOCAL instead (see
+    app/utils/db_pool.py). psycopg2 never uses server-side prepared
+    statements, so nothing else needs disabling for PgBouncer.
+    """
+    options = {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": pool_timeout,
+        "pool_recycle": pool_recycle,
+        "pool_pre_ping": pre_ping,
+    }
+    if statement_timeout_ms and not pgbouncer:
+        options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout_ms}"}
+    return options
+
+
 class Config:
     # Flask secret key - MUST be set in environment
     SECRET_KEY = os.environ["SECRET_KEY"]
@@ -15,6 +44,86 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Connection pool profile, per worker process
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 5))
+    # Fail fast with 503 instead of stalling when the pool is exhausted
+    DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 5))
+    DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING = env_bool("DB_POOL_PRE_PING", True)
+    # Abort runaway queries (0 disables)
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", 15000))
+    # Connecting through PgBouncer in transaction pooling mode
+    DB_PGBOUNCER = env_bool("DB_PGBOUNCER", False)
+
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE,
+        DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS, DB_PGBOUNCER,
+    )
+
+    # Optional read replica for @read_only views, and how long a user's reads
+    # stay on the primary after they write
+    SQLALCHEMY_REPLICA_URI = os.environ.get("DB_REPLICA_URI")
+    REPLICA_STICKY_SECONDS = float(os.environ.get("REPLICA_STICKY_SECONDS", 5))
+
+    # Password hashing: any werkzeug method string, e.g. "scrypt" or "pbkdf2:sha256:600000".
+    # Stored hashes made with other parameters are upgraded on the user's next login.
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")
+    # Hashes computed concurrently per process, and how many more may queue
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", 32))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get("PASSWORD_HASH_TIMEOUT", 10))
+
+    # Role checks trust the JWT claims. Set a TTL (seconds) to also re-check the
+    # user's current role through a per-process cache; 0 disables the check.
+    AUTH_USER_CACHE_TTL = float(os.environ.get("AUTH_USER_CACHE_TTL", 0))
+    # Seconds between checks for tokens revoked by other workers
+    REVOCATION_REFRESH_INTERVAL = float(os.environ.get("REVOCATION_REFRESH_INTERVAL", 1.0))
+
+    # Response encoder: "orjson" (falls back to "json" when orjson is not installed)
+    JSON_PROVIDER = os.environ.get("JSON_PROVIDER", "orjson")
+
+    # Response compression, negotiated via Accept-Encoding ("br" needs the brotli package)
+    COMPRESS_ENCODINGS = os.environ.get("COMPRESS_ENCODINGS", "br,gzip")
+    COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", 1024))
+    COMPRESS_GZIP_LEVEL = int(os.environ.get("COMPRESS_GZIP_LEVEL", 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get("COMPRESS_BROTLI_QUALITY", 4))
+
+    # Keyset pagination for list endpoints (?limit=, ?cursor=)
+    DEFAULT_PAGE_SIZE = int(os.environ.get("DEFAULT_PAGE_SIZE", 100))
+    MAX_PAGE_SIZE = int(os.environ.get("MAX_PAGE_SIZE", 500))
+
+    # Orders per server-side cursor fetch in GET /orders/export
+    EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", 1000))
+
+    # Idempotency-Key replays for order POSTs: how long a key is remembered (seconds),
+    # how many recent responses each worker keeps in memory, and how long a claim
+    # whose response was never stored (worker died) blocks retries
+    IDEMPOTENCY_TTL = int(os.environ.get("IDEMPOTENCY_TTL", 86400))
+    IDEMPOTENCY_CACHE_SIZE = int(os.environ.get("IDEMPOTENCY_CACHE_SIZE", 1024))
+    IDEMPOTENCY_LEASE = int(os.environ.get("IDEMPOTENCY_LEASE", 60))
+
+    # GET /sync re-sends rows changed this many seconds before the client's
+    # cursor, covering writes whose transactions committed late
+    SYNC_OVERLAP_SECONDS = float(os.environ.get("SYNC_OVERLAP_SECONDS", 10))
+
+    # Kitchen tags reserved per DB round trip by each worker process (1 = strictly sequential)
+    KITCHEN_TAG_BLOCK_SIZE = int(os.environ.get("KITCHEN_TAG_BLOCK_SIZE", 1))
+    # Connections per worker kept apart from the request pool for those reservations
+    KITCHEN_TAG_POOL_SIZE = int(os.environ.get("KITCHEN_TAG_POOL_SIZE", 2))
+
+    # Seconds a worker trusts its cached menu before re-checking the shared version
+    MENU_CACHE_CHECK_INTERVAL = float(os.environ.get("MENU_CACHE_CHECK_INTERVAL", 2.0))
+
+    # Station feeds: "postgres" (LISTEN/NOTIFY across workers) or "memory" (single process)
+    PUBSUB_BACKEND = os.environ.get("PUBSUB_BACKEND", "postgres")
+    PUBSUB_CHANNEL = os.environ.get("PUBSUB_CHANNEL", "trustnet_events")
+    STATION_FEED_HEARTBEAT = int(os.environ.get("STATION_FEED_HEARTBEAT", 15))
+    # Reconnects replay at most this many missed changes (more: the client reloads the
+    # queue), re-sending those from this many seconds before Last-Event-ID
+    STATION_FEED_REPLAY_LIMIT = int(os.environ.get("STATION_FEED_REPLAY_LIMIT", 500))
+    STATION_FEED_REPLAY_OVERLAP_SECONDS = float(os.environ.get("STATION_FEED_REPLAY_OVERLAP_SECONDS", 5))
+
 class DevelopmentConfig(Config):
     DEBUG = True
 
@@ -23,6 +132,8 @@ class ProductionConfig(Config):
 
 class TestingConfig(Config):
     TESTING = True
+    MENU_CACHE_CHECK_INTERVAL = 0.0
+    PUBSUB_BACKEND = "memory"
     # Override DB_NAME with TEST_DB_NAME env variable or fallback to parent's DB_NAME
     DB_NAME = os.environ.get("TEST_DB_NAME", Config.DB_NAME)
     SQLALCHEMY_DATABASE_URI = (
@@ -1,7 +1,54 @@
+from flask import g, current_app, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
+from sqlalchemy import create_engine
 
-db = SQLAlchemy()
+
+def replica_engine():
+    """Engine for SQLALCHEMY_REPLICA_URI, created on first use; None when unset."""
+    app = current_app._get_current_object()
+    uri = app.config.get("SQLALCHEMY_REPLICA_URI")
+    if not uri:
+        return None
+    engine = app.extensions.get("replica_engine")
+    if engine is None:
+        # Pool/timeout options are libpq specific; a non-Postgres stand-in gets defaults
+        options = app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}) if uri.startswith("postgresql") else {}
+        engine = app.extensions.setdefault("replica_engine", create_engine(uri, **options))
+    return engine
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads of views marked @read_only to the read replica.
+    Flushes and DML statements always go to the primary, as does everything
+    when no replica is configured.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and not getattr(clause, "is_dml", False)
+            and has_request_context()
+            and g.get("use_replica")
+        ):
+            engine = replica_engine()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
+
+
+@jwt.token_in_blocklist_loader
+def token_is_revoked(jwt_header, jwt_payload):
+    """Checked on every protected request; a set lookup unless a refresh is due."""
+    from app.utils.revocation import is_token_revoked
+    return is_token_revoked(jwt_payload)
+
@@ -1,2 +1,2 @@
 # app/models/__init__.py
-from .models import User, Table, MenuItem, Order, OrderItem, KitchenTagCounter
+from .models import User, Table, MenuItem, Order, OrderItem, KitchenTagCounter, CacheVersion, RevokedToken, IdempotencyKey, ChangeRecord, DailySalesRollup
@@ -1,4 +1,5 @@
 from datetime import datetime
+from sqlalchemy import DDL, event
 from ..extensions import db  # use shared db
 
 class User(db.Model):
@@ -45,9 +46,27 @@ class Order(db.Model):
     table_id = db.Column(db.Integer, db.ForeignKey("tables.id"), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     status = db.Column(db.String(20), default="pending")
+    # Derived: maintained from order_items by the order_items_total triggers below
     total_amount = db.Column(db.Numeric(10, 2))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Bumped by every change to the order; ORM flushes compare-and-swap on it
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
+    __mapper_args__ = {"version_id_col": version}
+
+    __table_args__ = (
+        db.Index("ix_orders_table_id_status", "table_id", "status"),
+        db.Index("ix_orders_status_created_at", "status", "created_at", "id"),
+        db.Index("ix_orders_created_at_id", "created_at", "id"),
+        # GET /sync: orders changed since a device's cursor
+        db.Index("ix_orders_updated_at", "updated_at"),
+        # Open/closed orders are a tiny, hot slice of the table
+        db.Index(
+            "ix_orders_unpaid_created_at", "created_at", "id",
+            postgresql_where=db.text("status <> 'paid'"),
+        ),
+    )
 
     table = db.relationship("Table", back_populates="orders")
     user = db.relationship("User")
@@ -67,11 +86,217 @@ class OrderItem(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index("ix_order_items_order_id", "order_id", "id"),
+        db.Index("ix_order_items_station_status", "station", "status", "created_at"),
+        db.Index("ix_order_items_updated_at", "updated_at", "order_id"),
+        # Station queues only ever look at pending items
+        db.Index(
+            "ix_order_items_pending_station", "station", "created_at",
+            postgresql_where=db.text("status = 'pending'"),
+        ),
+    )
+
     order = db.relationship("Order", back_populates="items")
     menu_item = db.relationship("MenuItem")
 
 class KitchenTagCounter(db.Model):
     __tablename__ = "kitchen_tag_counter"
     id = db.Column(db.Integer, primary_key=True)
-    date = db.Column(db.Date, nullable=False, unique=True)
+    date = db.Column(db.Date, nullable=False)
+    station = db.Column(db.String(20), nullable=False, default="kitchen", server_default="kitchen")
     last_number = db.Column(db.Integer, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint("date", "station", name="uq_kitchen_tag_counter_date_station"),
+    )
+
+class DailySalesRollup(db.Model):
+    """
+    Paid sales per (day, menu item, station, waiter), kept up to date as
+    orders are paid. order_count counts the orders containing the item;
+    ticket_count attributes each order to exactly one of its rows, so its
+    sum is the number of orders for any grouping by day and/or waiter.
+    """
+    __tablename__ = "daily_sales_rollup"
+    day = db.Column(db.Date, primary_key=True)
+    menu_item_id = db.Column(db.Integer, primary_key=True)
+    station = db.Column(db.String(20), primary_key=True)
+    waiter_id = db.Column(db.Integer, primary_key=True)
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    ticket_count = db.Column(db.Integer, nullable=False, default=0)
+
+class RevokedToken(db.Model):
+    """Access tokens revoked before their expiry (logout); rows are purged once expired."""
+    __tablename__ = "revoked_tokens"
+    jti = db.Column(db.String(36), primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now(), index=True)
+
+class IdempotencyKey(db.Model):
+    """
+    Stored outcome of a POST sent with an Idempotency-Key header, replayed
+    to retries of the same request. status_code is NULL while the first
+    request is still running; rows are purged once expired.
+    """
+    __tablename__ = "idempotency_keys"
+    user_id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+    fingerprint = db.Column(db.LargeBinary(16), nullable=False)  # blake2b of method, path and body
+    status_code = db.Column(db.SmallInteger)
+    body = db.Column(db.LargeBinary)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+class ChangeRecord(db.Model):
+    """
+    Append-only outbox of writes to orders, order items, tables and menu
+    items, recorded by triggers in the writing transaction (see below).
+    columns lists the columns an update changed; NULL for inserts and
+    deletes. Read in (txid, id) order through app.utils.outbox.
+    """
+    __tablename__ = "change_outbox"
+    id = db.Column(db.BigInteger, primary_key=True)
+    txid = db.Column(db.BigInteger, nullable=False)  # txid_current() of the writer
+    table_name = db.Column(db.String(50), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(6), nullable=False)  # insert | update | delete
+    columns = db.Column(db.JSON)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now(), index=True)
+
+    __table_args__ = (
+        db.Index("ix_change_outbox_txid_id", "txid", "id"),
+    )
+
+class CacheVersion(db.Model):
+    """Version counters shared by every worker process for in-process caches."""
+    __tablename__ = "cache_versions"
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+# --- orders.total_amount maintenance ---
+# Statement-level triggers keep orders.total_amount equal to
+# sum(price * quantity) of the order's items and bump orders.version and
+# orders.updated_at (in UTC, like the ORM's utcnow), in the same statement as any insert, delete or price/quantity change of
+# order_items. One UPDATE per affected order per statement, whatever the
+# batch size; item changes that leave the amount alone touch nothing.
+ORDER_TOTAL_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION order_items_maintain_total() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE orders o
+        SET total_amount = coalesce(o.total_amount, 0) + d.delta, version = o.version + 1,
+            updated_at = timezone('UTC', clock_timestamp())
+        FROM (SELECT order_id, sum(price * quantity) AS delta FROM new_items GROUP BY order_id) d
+        WHERE o.id = d.order_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE orders o
+        SET total_amount = coalesce(o.total_amount, 0) - d.delta, version = o.version + 1,
+            updated_at = timezone('UTC', clock_timestamp())
+        FROM (SELECT order_id, sum(price * quantity) AS delta FROM old_items GROUP BY order_id) d
+        WHERE o.id = d.order_id;
+    ELSE
+        UPDATE orders o
+        SET total_amount = coalesce(o.total_amount, 0) + d.delta, version = o.version + 1,
+            updated_at = timezone('UTC', clock_timestamp())
+        FROM (
+            SELECT order_id, sum(amount) AS delta FROM (
+                SELECT order_id, price * quantity AS amount FROM new_items
+                UNION ALL
+                SELECT order_id, -price * quantity FROM old_items
+            ) changes
+            GROUP BY order_id
+            HAVING sum(amount) <> 0
+        ) d
+        WHERE o.id = d.order_id;
+    END IF;
+    RETURN NULL;
+END
+$$
+""")
+
+ORDER_TOTAL_TRIGGERS = [
+    DDL(
+        "CREATE TRIGGER order_items_total_insert AFTER INSERT ON order_items "
+        "REFERENCING NEW TABLE AS new_items FOR EACH STATEMENT "
+        "EXECUTE FUNCTION order_items_maintain_total()"
+    ),
+    DDL(
+        "CREATE TRIGGER order_items_total_update AFTER UPDATE ON order_items "
+        "REFERENCING OLD TABLE AS old_items NEW TABLE AS new_items FOR EACH STATEMENT "
+        "EXECUTE FUNCTION order_items_maintain_total()"
+    ),
+    DDL(
+        "CREATE TRIGGER order_items_total_delete AFTER DELETE ON order_items "
+        "REFERENCING OLD TABLE AS old_items FOR EACH STATEMENT "
+        "EXECUTE FUNCTION order_items_maintain_total()"
+    ),
+]
+
+event.listen(OrderItem.__table__, "after_create", ORDER_TOTAL_FUNCTION.execute_if(dialect="postgresql"))
+for trigger in ORDER_TOTAL_TRIGGERS:
+    event.listen(OrderItem.__table__, "after_create", trigger.execute_if(dialect="postgresql"))
+
+
+# --- Change outbox ---
+# Statement-level triggers append a change_outbox record for every row an
+# insert, update or delete touches in these tables, whoever issues it: the
+# ORM, bulk statements or the total trigger above. One INSERT per statement;
+# updates record only the columns whose value changed, and rows left as
+# they were record nothing.
+CHANGE_TRACKED_TABLES = ("orders", "order_items", "tables", "menu_items")
+
+CHANGE_OUTBOX_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION change_outbox_record() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO change_outbox (txid, table_name, row_id, op)
+        SELECT txid_current(), TG_TABLE_NAME, n.id, 'insert' FROM new_rows n ORDER BY n.id;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO change_outbox (txid, table_name, row_id, op)
+        SELECT txid_current(), TG_TABLE_NAME, o.id, 'delete' FROM old_rows o ORDER BY o.id;
+    ELSE
+        INSERT INTO change_outbox (txid, table_name, row_id, op, columns)
+        SELECT txid_current(), TG_TABLE_NAME, n.id, 'update', c.columns
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        CROSS JOIN LATERAL (
+            SELECT json_agg(v.key ORDER BY v.key) AS columns
+            FROM jsonb_each(to_jsonb(n)) v
+            WHERE v.value IS DISTINCT FROM to_jsonb(o) -> v.key
+        ) c
+        WHERE c.columns IS NOT NULL
+        ORDER BY n.id;
+    END IF;
+    RETURN NULL;
+END
+$$
+""")
+
+CHANGE_TRANSITION_TABLES = {
+    "insert": "NEW TABLE AS new_rows",
+    "update": "OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "delete": "OLD TABLE AS old_rows",
+}
+
+
+def change_outbox_trigger(table_name, op):
+    return DDL(
+        f"CREATE TRIGGER {table_name}_changes_{op} AFTER {op.upper()} ON {table_name} "
+        f"REFERENCING {CHANGE_TRANSITION_TABLES[op]} FOR EACH STATEMENT "
+        "EXECUTE FUNCTION change_outbox_record()"
+    )
+
+
+event.listen(db.metadata, "before_create", CHANGE_OUTBOX_FUNCTION.execute_if(dialect="postgresql"))
+for tracked in CHANGE_TRACKED_TABLES:
+    for op in CHANGE_TRANSITION_TABLES:
+        event.listen(
+            db.metadata.tables[tracked], "after_create",
+            change_outbox_trigger(tracked, op).execute_if(dialect="postgresql"),
+        )
@@ -1,7 +1,17 @@
-from flask import Blueprint
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+from app.utils.db_pool import pool_metrics
+from app.utils.decorators import roles_required
 
 main_bp = Blueprint('main', __name__)
 
 @main_bp.route('/')
 def index():
     return "Restaurant POS system is running!"
+
+@main_bp.route('/metrics/db-pool')
+@jwt_required()
+@roles_required("admin")
+def db_pool_metrics():
+    """Connection pool gauges and counters of this worker, for monitoring."""
+    return jsonify(pool_metrics())
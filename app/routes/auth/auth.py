@@ -1,8 +1,10 @@
-from flask import Blueprint, request, jsonify
-from werkzeug.security import check_password_hash
+from concurrent.futures import TimeoutError as HashTimeout
+from flask import Blueprint, request, jsonify, current_app
 from app.models.models import User
-from app.extensions import jwt
-from flask_jwt_extended import create_access_token
+from app.extensions import db, jwt
+from app.utils.security import get_password_hasher, needs_rehash, HashPoolBusy
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt
+from app.utils.revocation import revoke_token
 from datetime import timedelta
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
@@ -17,9 +19,27 @@ def login():
         return jsonify({"msg": "Missing username or password"}), 400
 
     user = User.query.filter_by(username=username).first()
-    if not user or not check_password_hash(user.password_hash, password):
+    if not user:
         return jsonify({"msg": "Invalid username or password"}), 401
 
+    # Verification runs on the bounded hashing pool; when it is saturated
+    # (shift-change login storm) answer 503 rather than queueing forever.
+    hasher = get_password_hasher()
+    timeout = current_app.config["PASSWORD_HASH_TIMEOUT"]
+    try:
+        if not hasher.verify(password, user.password_hash, timeout):
+            return jsonify({"msg": "Invalid username or password"}), 401
+
+        # Transparently upgrade hashes made with old algorithm/cost settings
+        method = current_app.config["PASSWORD_HASH_METHOD"]
+        if needs_rehash(user.password_hash, method):
+            user.password_hash = hasher.hash(password, method, timeout)
+            db.session.commit()
+    except (HashPoolBusy, HashTimeout):
+        response = jsonify({"msg": "Login service busy, please retry"})
+        response.headers["Retry-After"] = "1"
+        return response, 503
+
     # Role-based token expiry times
     role_expiry_map = {
         "waiter": timedelta(hours=1),
@@ -36,7 +56,15 @@ def login():
     # Create access token with role in claims
     access_token = create_access_token(
     identity=str(user.id),
-    additional_claims={"role": user.role},
+    additional_claims={"role": user.role, "name": user.name},
     expires_delta=expires
 )
     return jsonify(access_token=access_token, user={"id": user.id, "name": user.name, "role": user.role})
+
+
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required()
+def logout():
+    """Revoke the access token used for this request."""
+    revoke_token(get_jwt())
+    return jsonify({"msg": "Logged out"})
@@ -0,0 +1,121 @@
+# routes/menu_items/menu_cache.py
+import threading
+import time
+from collections import namedtuple
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.dialects.postgresql import insert
+from app.extensions import db
+from app.models.models import MenuItem, CacheVersion
+
+MENU_VERSION_KEY = "menu"
+
+MENU_COLUMNS = (
+    MenuItem.id,
+    MenuItem.name,
+    MenuItem.description,
+    MenuItem.price,
+    MenuItem.category,
+    MenuItem.is_available,
+    MenuItem.image_url,
+)
+
+# Immutable snapshot of a menu row; attribute-compatible with MenuItem for reads
+CachedMenuItem = namedtuple("CachedMenuItem", [c.key for c in MENU_COLUMNS])
+
+
+def read_menu_version(session):
+    version = session.execute(
+        select(CacheVersion.version).where(CacheVersion.name == MENU_VERSION_KEY)
+    ).scalar()
+    return version or 0
+
+
+def bump_menu_version():
+    """
+    Invalidate every worker's menu cache.
+    Runs in the caller's transaction, so the bump becomes visible exactly
+    when the menu change itself commits (and vanishes if it rolls back).
+    """
+    stmt = (
+        insert(CacheVersion)
+        .values(name=MENU_VERSION_KEY, version=1)
+        .on_conflict_do_update(
+            index_elements=["name"],
+            set_={"version": CacheVersion.version + 1},
+        )
+    )
+    db.session.execute(stmt)
+    cache = current_app.extensions.get("menu_cache")
+    if cache is not None:
+        # This worker re-checks right after the commit instead of waiting out the interval
+        event.listen(db.session(), "after_commit", lambda session: cache.expire(), once=True)
+
+
+class MenuCache:
+    """
+    Per-process copy of the whole menu, grouped by category.
+
+    The menu is loaded with one query and kept until the shared version
+    counter in `cache_versions` moves. The counter is re-read at most once
+    per `check_interval` seconds, so a warm worker serves menu reads and
+    order pricing without touching `menu_items` at all.
+    """
+
+    def __init__(self, check_interval=2.0):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self._items = {}        # id -> CachedMenuItem
+        self._by_category = {}  # category (None = all) -> [CachedMenuItem] ordered by id
+
+    def expire(self):
+        """Force the next access to re-check the shared version."""
+        self._checked_at = 0.0
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if self._version is not None and now - self._checked_at < self.check_interval:
+                return
+            # Read the version before the rows: a concurrent bump can only
+            # make us reload once more, never keep stale rows.
+            version = read_menu_version(db.session)
+            if version != self._version:
+                rows = db.session.execute(select(*MENU_COLUMNS).order_by(MenuItem.id)).all()
+                items = [CachedMenuItem(*row) for row in rows]
+                by_category = {None: items}
+                for item in items:
+                    by_category.setdefault(item.category, []).append(item)
+                self._items = {item.id: item for item in items}
+                self._by_category = by_category
+                self._version = version
+            self._checked_at = time.monotonic()
+
+    @property
+    def version(self):
+        """Current shared menu version; doubles as the menu's ETag fingerprint."""
+        self._refresh()
+        return self._version
+
+    def items(self, category=None):
+        """Menu items (all, or one category) ordered by id."""
+        self._refresh()
+        return self._by_category.get(category, [])
+
+    def get(self, item_id):
+        self._refresh()
+        return self._items.get(item_id)
+
+
+def get_menu_cache() -> MenuCache:
+    """Per-app menu cache, checked every MENU_CACHE_CHECK_INTERVAL seconds."""
+    cache = current_app.extensions.get("menu_cache")
+    if cache is None:
+        cache = current_app.extensions.setdefault(
+            "menu_cache", MenuCache(current_app.config.get("MENU_CACHE_CHECK_INTERVAL", 2.0))
+        )
+    return cache
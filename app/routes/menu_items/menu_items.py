@@ -2,46 +2,57 @@ from flask import Blueprint, request, jsonify, abort
 from flask_jwt_extended import jwt_required
 from app.extensions import db
 from app.models.models import MenuItem
-from app.utils.decorators import roles_required
+from app.utils.decorators import roles_required, read_only
+from app.utils.pagination import paginate_rows, requested_fields, page_response
+from app.utils.serializers import Schema
+from app.utils.etag import make_etag, not_modified, with_etag
+from .menu_cache import get_menu_cache, bump_menu_version
 
 menu_items_bp = Blueprint("menu_items_bp", __name__, url_prefix="/menu-items")
 
-
-def menu_item_to_dict(item: MenuItem):
-    return {
-        "id": item.id,
-        "name": item.name,
-        "description": item.description,
-        "price": float(item.price) if item.price is not None else None,
-        "category": item.category,
-        "is_available": item.is_available,
-        "image_url": item.image_url,
-    }
+MENU_ITEM_FIELDS = ("id", "name", "description", "price", "category", "is_available", "image_url")
+MENU_ITEM_SCHEMA = Schema(*MENU_ITEM_FIELDS)
 
 
 # ---- GET ALL MENU ITEMS ----
 @menu_items_bp.route("/", methods=["GET"])
 @jwt_required()
 @roles_required("admin", "manager", "waiter", "kitchen", "butcher", "bar", "cashier")
+@read_only
 def get_menu_items():
-    """Get all menu items (optionally filter by ?category=food|raw_meat|drinks)."""
+    """
+    Get menu items (optionally filter by ?category=food|raw_meat|drinks).
+    Paginated with ?limit=&cursor=, projected with ?fields=.
+    Served from the per-process menu cache, with the menu version as ETag.
+    """
+    menu = get_menu_cache()
+    etag = make_etag(menu.version)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    fields = requested_fields(MENU_ITEM_FIELDS)
     category = request.args.get("category")
-    query = MenuItem.query
-    if category:
-        query = query.filter_by(category=category)
-    items = query.all()
-    return jsonify([menu_item_to_dict(i) for i in items]), 200
+    items, next_cursor = paginate_rows(MenuItem, menu.items(category))
+    return with_etag(page_response(MENU_ITEM_SCHEMA.dump_many(items, fields), next_cursor), etag), 200
 
 
 # ---- GET SINGLE MENU ITEM ----
 @menu_items_bp.route("/<int:item_id>", methods=["GET"])
 @jwt_required()
 @roles_required("admin", "manager", "waiter", "kitchen", "butcher", "bar", "cashier")
+@read_only
 def get_menu_item(item_id):
-    item = db.session.get(MenuItem, item_id)
+    menu = get_menu_cache()
+    etag = make_etag(menu.version)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    item = menu.get(item_id)
     if not item:
         abort(404)
-    return jsonify(menu_item_to_dict(item)), 200
+    return with_etag(jsonify(MENU_ITEM_SCHEMA.dump(item)), etag), 200
 
 
 # ---- CREATE MENU ITEM ----
@@ -73,9 +84,10 @@ def create_menu_item():
         image_url=image_url,
     )
     db.session.add(item)
+    bump_menu_version()
     db.session.commit()
 
-    return jsonify(menu_item_to_dict(item)), 201
+    return jsonify(MENU_ITEM_SCHEMA.dump(item)), 201
 
 
 # ---- UPDATE MENU ITEM ----
@@ -96,8 +108,9 @@ def update_menu_item(item_id):
     item.is_available = data.get("is_available", item.is_available)
     item.image_url = data.get("image_url", item.image_url)
 
+    bump_menu_version()
     db.session.commit()
-    return jsonify(menu_item_to_dict(item)), 200
+    return jsonify(MENU_ITEM_SCHEMA.dump(item)), 200
 
 
 # ---- DELETE MENU ITEM ----
@@ -109,5 +122,6 @@ def delete_menu_item(item_id):
     if not item:
         abort(404)
     db.session.delete(item)
+    bump_menu_version()
     db.session.commit()
     return jsonify({"message": "Menu item deleted"}), 200
@@ -0,0 +1,67 @@
+# routes/orders/export.py
+import csv
+import io
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select
+from app.extensions import db
+from app.models.models import Order
+from .order_queries import ORDER_COLUMNS, fetch_order_items
+
+EXPORT_MIMETYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def export_batches(*criteria):
+    """
+    Yield (order_rows, items_by_order) per batch of EXPORT_BATCH_SIZE
+    matching orders in (created_at, id) order. Orders stream from a
+    server-side cursor and each batch costs one extra query for its items,
+    so memory is bounded by the batch size.
+    """
+    batch_size = current_app.config.get("EXPORT_BATCH_SIZE", 1000)
+    stmt = select(*ORDER_COLUMNS).where(*criteria).order_by(Order.created_at, Order.id)
+    result = db.session.execute(stmt, execution_options={"yield_per": batch_size})
+    for orders in result.partitions():
+        yield orders, fetch_order_items([o.id for o in orders])
+
+
+def ndjson_lines(batches, order_schema, item_schema):
+    """One JSON object per order, items nested; one chunk per batch."""
+    dumps = current_app.json.dumps
+    for orders, items_by_order in batches:
+        lines = []
+        for o in orders:
+            data = order_schema.dump(o)
+            data["items"] = item_schema.dump_many(items_by_order.get(o.id, []))
+            lines.append(dumps(data))
+        yield "\n".join(lines) + "\n"
+
+
+def _csv_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def csv_rows(batches, order_schema, item_schema):
+    """
+    One CSV row per order item, order columns first and item columns
+    prefixed with item_; orders without items get a single row with empty
+    item columns.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    order_fields, item_fields = order_schema.fields, item_schema.fields
+    writer.writerow(order_fields + tuple(f"item_{f}" for f in item_fields))
+    empty = (None,) * len(item_fields)
+    for orders, items_by_order in batches:
+        for o in orders:
+            head = [_csv_value(getattr(o, f)) for f in order_fields]
+            items = items_by_order.get(o.id)
+            if not items:
+                writer.writerow(head + list(empty))
+            for item in items or ():
+                writer.writerow(head + [_csv_value(getattr(item, f)) for f in item_fields])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
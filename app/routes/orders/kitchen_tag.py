@@ -1,25 +1,120 @@
 # routes/orders/kitchen_tag.py
-from app.models.models import KitchenTagCounter, db
+import threading
 from datetime import date
+from flask import current_app
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import insert
+from app.models.models import KitchenTagCounter, db
+
+MAX_TAG = 9999
+
+
+def format_tag(number: int) -> str:
+    """Render a counter value as a 4-digit tag that wraps after 9999."""
+    return f"{(number - 1) % MAX_TAG + 1:04d}"
+
 
-def generate_kitchen_tag() -> str:
+def tag_engine():
     """
-    Generates a 4-digit kitchen tag that resets daily.
-    Format: '0001', '0002', ..., '9999'
+    Engine for tag reservations, with a small pool of its own
+    (KITCHEN_TAG_POOL_SIZE). Item adds reserve tags while their session
+    holds a request-pool connection and the order's row lock; drawing a
+    second connection from that same pool could starve it under load.
+    A reservation holds its connection for one statement, so a couple
+    serve a whole worker.
+    """
+    app = current_app._get_current_object()
+    engine = app.extensions.get("kitchen_tag_engine")
+    if engine is None:
+        options = {
+            **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+            "pool_size": app.config.get("KITCHEN_TAG_POOL_SIZE", 2),
+            "max_overflow": 0,
+        }
+        engine = app.extensions.setdefault("kitchen_tag_engine", create_engine(db.engine.url, **options))
+    return engine
+
+
+class KitchenTagAllocator:
+    """
+    Hands out per-day, per-station tag numbers without read-modify-write.
+
+    A reservation is a single INSERT ... ON CONFLICT DO UPDATE ... RETURNING
+    run on its own short autocommit connection from tag_engine(): the
+    counter row is locked only for that statement and the caller's session
+    is never flushed or committed. Numbers handed out for a request that later rolls back are
+    simply skipped, like a database sequence.
+
+    With block_size > 1 each process reserves that many numbers at a time
+    and serves them from memory, so most allocations never reach the
+    database. Tags stay unique, but are no longer strictly in call order
+    across processes.
     """
-    today = date.today()
 
-    # Get today's counter
-    counter = KitchenTagCounter.query.filter_by(date=today).first()
+    def __init__(self, block_size=1):
+        self.block_size = max(1, int(block_size))
+        self._lock = threading.Lock()
+        self._blocks = {}  # (day, station) -> [next_number, last_number]
+
+    def _reserve(self, day, station, count):
+        """Atomically advance the counter by `count` and return the new last number."""
+        stmt = (
+            insert(KitchenTagCounter)
+            .values(date=day, station=station, last_number=count)
+            .on_conflict_do_update(
+                index_elements=["date", "station"],
+                set_={"last_number": KitchenTagCounter.last_number + count},
+            )
+            .returning(KitchenTagCounter.last_number)
+        )
+        with tag_engine().begin() as conn:
+            return conn.execute(stmt).scalar_one()
+
+    def allocate(self, station, count=1, day=None):
+        """Return `count` unique tags for the station."""
+        day = day or date.today()
+
+        if self.block_size == 1:
+            last = self._reserve(day, station, count)
+            return [format_tag(n) for n in range(last - count + 1, last + 1)]
+
+        numbers = []
+        with self._lock:
+            # Blocks from previous days are useless once the counter resets
+            for key in [k for k in self._blocks if k[0] != day]:
+                del self._blocks[key]
+
+            block = self._blocks.get((day, station))
+            while len(numbers) < count:
+                if block is None or block[0] > block[1]:
+                    size = max(self.block_size, count - len(numbers))
+                    last = self._reserve(day, station, size)
+                    block = self._blocks[(day, station)] = [last - size + 1, last]
+                take = min(count - len(numbers), block[1] - block[0] + 1)
+                numbers.extend(range(block[0], block[0] + take))
+                block[0] += take
+        return [format_tag(n) for n in numbers]
 
-    if not counter:
-        counter = KitchenTagCounter(date=today, last_number=1)
-        db.session.add(counter)
-    else:
-        counter.last_number += 1
-        if counter.last_number > 9999:
-            counter.last_number = 1  # reset after 9999
 
-    db.session.commit()
+def get_tag_allocator() -> KitchenTagAllocator:
+    """Per-app allocator, sized by KITCHEN_TAG_BLOCK_SIZE."""
+    allocator = current_app.extensions.get("kitchen_tag_allocator")
+    if allocator is None:
+        allocator = current_app.extensions.setdefault(
+            "kitchen_tag_allocator",
+            KitchenTagAllocator(current_app.config.get("KITCHEN_TAG_BLOCK_SIZE", 1)),
+        )
+    return allocator
 
-    return f"{counter.last_number:04d}"
+
+def generate_kitchen_tags(station: str, count: int) -> list:
+    """Allocate `count` tags for a station in one reservation."""
+    return get_tag_allocator().allocate(station, count)
+
+
+def generate_kitchen_tag(station: str = "kitchen") -> str:
+    """
+    Generates a 4-digit kitchen tag that resets daily, per station.
+    Format: '0001', '0002', ..., '9999'
+    """
+    return generate_kitchen_tags(station, 1)[0]
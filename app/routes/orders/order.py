@@ -1,79 +1,256 @@
 # routes/orders/order.py
-from flask import Blueprint, request, jsonify, abort
+from flask import Blueprint, Response, request, jsonify, abort, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.extensions import db
-from app.models.models import Order, OrderItem, MenuItem, Table, User
-from app.utils.decorators import roles_required
+from app.models.models import Order, OrderItem, Table
+from app.utils.decorators import roles_required, read_only, current_principal
 from datetime import datetime
-from .kitchen_tag import generate_kitchen_tag  # tag generation helper
+from sqlalchemy import select, insert, update
+from sqlalchemy.orm.exc import StaleDataError
+from .kitchen_tag import generate_kitchen_tag, generate_kitchen_tags  # tag generation helpers
+from .order_queries import fetch_orders, fetch_order_items, orders_fingerprint
+from .export import EXPORT_MIMETYPES, export_batches, ndjson_lines, csv_rows
+from app.routes.menu_items.menu_cache import get_menu_cache
+from app.routes.stations.feed import publish_station_events
+from app.routes.reports.rollups import record_status_change
+from app.utils.pagination import paginate, requested_fields, page_response
+from app.utils.serializers import Schema
+from app.utils.etag import make_etag, not_modified, with_etag
+from app.utils.filters import date_range
+from app.utils.idempotency import idempotent
 from decimal import Decimal
 
 orders_bp = Blueprint("orders_bp", __name__, url_prefix="/orders")
 
+# "items" is not a column: it pulls in the order's items with one extra query
+ORDER_FIELDS = ("id", "table_id", "user_id", "status", "total_amount", "created_at", "updated_at", "version", "items")
+
+# Station responsible for preparing each menu category
+CATEGORY_STATION_MAP = {"raw meat": "butchery", "food": "kitchen", "drinks": "bar"}
+
 # --- Helpers ---
-def serialize_datetime(dt):
-    return dt.isoformat() if dt else None
-
-def order_item_to_dict(item):
-    return {
-        "id": item.id,
-        "order_id": item.order_id,
-        "menu_item_id": item.menu_item_id,
-        "quantity": item.quantity,
-        "price": float(item.price),
-        "notes": item.notes,
-        "prep_tag": item.prep_tag,
-        "status": item.status,
-        "station": item.station,
-        "created_at": serialize_datetime(item.created_at),
-        "updated_at": serialize_datetime(item.updated_at),
-    }
-
-def order_to_dict(order):
-    return {
-        "id": order.id,
-        "table_id": order.table_id,
-        "user_id": order.user_id,
-        "status": order.status,
-        "total_amount": float(order.total_amount or 0),
-        "created_at": serialize_datetime(order.created_at),
-        "updated_at": serialize_datetime(order.updated_at),
-        "items": [order_item_to_dict(i) for i in order.items]
-    }
+def station_for(menu_item):
+    return CATEGORY_STATION_MAP.get(menu_item.category.lower(), "kitchen")
+
+ORDER_SCHEMA = Schema(*(f for f in ORDER_FIELDS if f != "items"))
+ORDER_ITEM_SCHEMA = Schema(
+    "id", "order_id", "menu_item_id", "quantity", "price", "notes",
+    "prep_tag", "status", "station", "created_at", "updated_at",
+)
+
+def dump_order(order, items=None):
+    """Serialize an order with its items; pass preloaded item rows to avoid touching order.items."""
+    if items is None:
+        items = order.items
+    data = ORDER_SCHEMA.dump(order)
+    data["items"] = ORDER_ITEM_SCHEMA.dump_many(items)
+    return data
+
+def lock_order_for_items(order_id):
+    """
+    Check that items may be added to an order and lock its row until the
+    caller commits. Paid orders are final (their sales are in the rollup),
+    so they get a 400; the lock keeps a concurrent payment from slipping in
+    between this check and the insert.
+    """
+    status = db.session.scalar(select(Order.status).where(Order.id == order_id).with_for_update())
+    if status is None:
+        abort(404, description="Order not found")
+    if status == "paid":
+        abort(400, description="Cannot add items to a paid order")
+
+def insert_order_items(order_id, entries):
+    """
+    Validate, price, tag and bulk insert a round of items for an order,
+    in the caller's transaction (no commit). Aborts with 400/404 on bad
+    input or a paid order. Returns the serialized items.
+    """
+    if not isinstance(entries, list) or not entries:
+        abort(400, description="items must be a non-empty list")
+
+    for entry in entries:
+        if not isinstance(entry, dict) or entry.get("menu_item_id") is None:
+            abort(400, description="menu_item_id is required for every item")
+        menu_item_id = entry["menu_item_id"]
+        if not isinstance(menu_item_id, int) or isinstance(menu_item_id, bool):
+            abort(400, description="menu_item_id must be an integer")
+        quantity = entry.get("quantity", 1)
+        if not isinstance(quantity, int) or quantity <= 0:
+            abort(400, description="quantity must be a positive integer")
+
+    lock_order_for_items(order_id)
+
+    menu = get_menu_cache()
+    menu_ids = {entry["menu_item_id"] for entry in entries}
+    menu_items = {i: menu.get(i) for i in menu_ids}
+    unavailable = sorted(i for i, m in menu_items.items() if m is None or not m.is_available)
+    if unavailable:
+        abort(400, description=f"Menu items not available: {unavailable}")
+
+    stations = [station_for(menu_items[entry["menu_item_id"]]) for entry in entries]
+    tags = {}
+    for station in set(stations) - {"bar"}:  # bar doesn't need tag
+        tags[station] = iter(generate_kitchen_tags(station, stations.count(station)))
+
+    rows = []
+    for entry, station in zip(entries, stations):
+        menu_item = menu_items[entry["menu_item_id"]]
+        quantity = entry.get("quantity", 1)
+        rows.append({
+            "order_id": order_id,
+            "menu_item_id": menu_item.id,
+            "quantity": quantity,
+            "price": menu_item.price,
+            "notes": entry.get("notes", ""),
+            "prep_tag": next(tags[station]) if station in tags else None,
+            "status": "pending",
+            "station": station,
+        })
+
+    # render_nulls keeps rows with and without a prep tag in one INSERT batch,
+    # so the total trigger updates the order once for the whole round
+    items = db.session.scalars(
+        insert(OrderItem).returning(OrderItem, sort_by_parameter_order=True),
+        rows,
+        execution_options={"render_nulls": True},
+    ).all()
+    return ORDER_ITEM_SCHEMA.dump_many(items)  # before commit expires them
+
+def change_order_status(order, new_status, expected=None):
+    """
+    Move an order along open → closed → paid with role checks, as a
+    compare-and-swap on its version (`expected`, or the version loaded).
+    Runs in the caller's transaction; raises StaleDataError on a lost race.
+    """
+    valid_statuses = {"open", "closed", "paid"}
+
+    if new_status not in valid_statuses:
+        abort(400, description=f"Status must be one of {sorted(valid_statuses)}")
+    if expected is not None and (not isinstance(expected, int) or isinstance(expected, bool)):
+        abort(400, description="version must be an integer")
+
+    principal = current_principal()
+
+    # Only waiter can close, only cashier can pay
+    if new_status == "closed" and principal.role != "waiter":
+        abort(403, description="Only waiter can close an order")
+    if new_status == "paid" and principal.role != "cashier":
+        abort(403, description="Only cashier can mark order as paid")
+    if new_status == "paid" and order.status != "closed":
+        abort(400, description="Order must be closed before marking as paid")
+
+    # Compare-and-swap: the checks above only hold for the version they saw
+    # (or the one the client last read, if sent). Any change since -> 409.
+    if expected is None:
+        expected = order.version
+    old_status = order.status
+    result = db.session.execute(
+        update(Order)
+        .where(Order.id == order.id, Order.version == expected)
+        .values(status=new_status, version=Order.version + 1)
+        .execution_options(synchronize_session="fetch")
+    )
+    if result.rowcount != 1:
+        raise StaleDataError(f"order {order.id} is no longer at version {expected}")
+
+    record_status_change(order, old_status, new_status)
 
 # --- Routes ---
 
+@orders_bp.errorhandler(StaleDataError)
+def order_conflict(error):
+    """A compare-and-swap on Order.version lost to a concurrent change."""
+    db.session.rollback()
+    return jsonify(msg="Order was changed by someone else; reload it and retry"), 409
+
+
 @orders_bp.route("/", methods=["GET"])
 @jwt_required()
 @roles_required("admin", "manager", "waiter", "cashier", "kitchen", "butchery", "bar")
+@read_only
 def get_orders():
-    """Get all orders (optionally filter by status or table)."""
-    query = Order.query
+    """
+    Get orders (optionally filter by status or table), newest last.
+    Paginated on (created_at, id) with ?limit=&cursor=, projected with ?fields=.
+    """
+    fields = requested_fields(ORDER_FIELDS)
+    columns = [f for f in fields if f != "items"]
+    criteria = []
     status = request.args.get("status")
-    table_id = request.args.get("table_id")
+    table_id = request.args.get("table_id", type=int)
 
     if status:
-        query = query.filter_by(status=status)
+        criteria.append(Order.status == status)
     if table_id:
-        query = query.filter_by(table_id=table_id)
+        criteria.append(Order.table_id == table_id)
+
+    # The ETag covers exactly the page returned, so a 304 still loads the
+    # page but skips serializing and sending it
+    orders, next_cursor = paginate(Order, [*columns, "version", "updated_at"], *criteria, key=("created_at", "id"))
+    items_by_order = fetch_order_items([o.id for o in orders]) if "items" in fields else None
+
+    etag = make_etag(next_cursor, *orders_fingerprint(orders, items_by_order))
+    cached = not_modified(etag)
+    if cached:
+        return cached
 
-    orders = query.all()
-    return jsonify([order_to_dict(o) for o in orders]), 200
+    payload = ORDER_SCHEMA.dump_many(orders, columns)
+    if items_by_order is not None:
+        for o, data in zip(orders, payload):
+            data["items"] = ORDER_ITEM_SCHEMA.dump_many(items_by_order.get(o.id, []))
+    return with_etag(page_response(payload, next_cursor), etag), 200
+
+
+@orders_bp.route("/export", methods=["GET"])
+@jwt_required()
+@roles_required("admin", "manager", "cashier")
+@read_only
+def export_orders():
+    """
+    Stream orders with their items as NDJSON (default) or CSV (?format=csv),
+    filtered by ?from=&to= on created_at and ?status=. Rows come from a
+    server-side cursor in batches, so memory use does not grow with the
+    number of orders exported.
+    """
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in EXPORT_MIMETYPES:
+        abort(400, description=f"format must be one of {sorted(EXPORT_MIMETYPES)}")
+
+    criteria = date_range(Order.created_at)
+    status = request.args.get("status")
+    if status:
+        criteria.append(Order.status == status)
+
+    batches = export_batches(*criteria)
+    writer = csv_rows if fmt == "csv" else ndjson_lines
+    return Response(
+        stream_with_context(writer(batches, ORDER_SCHEMA, ORDER_ITEM_SCHEMA)),
+        mimetype=EXPORT_MIMETYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="orders.{fmt}"'},
+    )
 
 
 @orders_bp.route("/<int:order_id>", methods=["GET"])
 @jwt_required()
 @roles_required("admin", "manager", "waiter", "cashier", "kitchen", "butchery", "bar")
+@read_only
 def get_order(order_id):
-    order = db.session.get(Order, order_id)
-    if not order:
+    orders = fetch_orders(Order.id == order_id)
+    if not orders:
         abort(404, description="Order not found")
-    return jsonify(order_to_dict(order)), 200
+    order, items = orders[0]
+
+    etag = make_etag(*orders_fingerprint([order], {order.id: items}))
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    return with_etag(jsonify(dump_order(order, items)), etag), 200
 
 
 @orders_bp.route("/", methods=["POST"])
 @jwt_required()
 @roles_required("admin", "manager", "waiter")
+@idempotent
 def create_order():
     """Create a new order (status=open)."""
     data = request.get_json() or {}
@@ -91,22 +268,23 @@ def create_order():
     db.session.add(order)
     db.session.commit()
 
-    return jsonify(order_to_dict(order)), 201
+    return jsonify(dump_order(order)), 201
 
 
 @orders_bp.route("/<int:order_id>/items", methods=["POST"])
 @jwt_required()
 @roles_required("admin", "manager", "waiter")
+@idempotent
 def add_order_item(order_id):
     """Add an item to an existing order, determine station and generate prep tag."""
-    order = db.session.get(Order, order_id)
-    if not order:
-        abort(404, description="Order not found")
+    lock_order_for_items(order_id)
 
     data = request.get_json() or {}
     menu_item_id = data.get("menu_item_id")
     if menu_item_id is None:
         abort(400, description="menu_item_id is required")
+    if not isinstance(menu_item_id, int) or isinstance(menu_item_id, bool):
+        abort(400, description="menu_item_id must be an integer")
 
     quantity = data.get("quantity", 1)
     if not isinstance(quantity, int) or quantity <= 0:
@@ -114,18 +292,16 @@ def add_order_item(order_id):
 
     notes = data.get("notes", "")
 
-    menu_item = db.session.get(MenuItem, menu_item_id)
+    menu_item = get_menu_cache().get(menu_item_id)
     if not menu_item or not menu_item.is_available:
         abort(400, description="Menu item not available")
 
-    # Determine station based on category
-    category_station_map = {"raw meat": "butchery", "food": "kitchen", "drinks": "bar"}
-    station = category_station_map.get(menu_item.category.lower(), "kitchen")
+    station = station_for(menu_item)
 
     prep_tag = generate_kitchen_tag(station) if station != "bar" else None  # bar doesn't need tag
 
     item = OrderItem(
-        order_id=order.id,
+        order_id=order_id,
         menu_item_id=menu_item.id,
         quantity=quantity,
         price=menu_item.price,
@@ -135,11 +311,31 @@ def add_order_item(order_id):
         station=station,
     )
 
-    db.session.add(item)
-    order.total_amount += menu_item.price * quantity
+    db.session.add(item)  # the order's total and version follow via trigger
+    db.session.commit()
+
+    payload = ORDER_ITEM_SCHEMA.dump(item)
+    publish_station_events([payload])
+    return jsonify(payload), 201
+
+
+@orders_bp.route("/<int:order_id>/items:batch", methods=["POST"])
+@jwt_required()
+@roles_required("admin", "manager", "waiter")
+@idempotent
+def add_order_items_batch(order_id):
+    """
+    Add a whole round of items to an order in one transaction.
+    Body: {"items": [{"menu_item_id": 1, "quantity": 2, "notes": ""}, ...]}
+    Menu items are priced from the menu cache, prep tags are reserved per
+    station in bulk and the items are written with a single bulk insert.
+    """
+    data = request.get_json() or {}
+    payload = insert_order_items(order_id, data.get("items"))
     db.session.commit()
 
-    return jsonify(order_item_to_dict(item)), 201
+    publish_station_events(payload)
+    return jsonify(payload), 201
 
 
 @orders_bp.route("/<int:order_id>/status", methods=["PUT"])
@@ -152,27 +348,10 @@ def update_order_status(order_id):
         abort(404, description="Order not found")
 
     data = request.get_json() or {}
-    new_status = data.get("status")
-    valid_statuses = {"open", "closed", "paid"}
-
-    if new_status not in valid_statuses:
-        abort(400, description=f"Status must be one of {sorted(valid_statuses)}")
-
-    user_id = get_jwt_identity()
-    user = db.session.get(User, user_id)
-
-    # Only waiter can close, only cashier can pay
-    if new_status == "closed" and user.role != "waiter":
-        abort(403, description="Only waiter can close an order")
-    if new_status == "paid" and user.role != "cashier":
-        abort(403, description="Only cashier can mark order as paid")
-    if new_status == "paid" and order.status != "closed":
-        abort(400, description="Order must be closed before marking as paid")
-
-    order.status = new_status
+    change_order_status(order, data.get("status"), data.get("version"))
     db.session.commit()
 
-    return jsonify(order_to_dict(order)), 200
+    return jsonify(dump_order(order)), 200
 
 
 @orders_bp.route("/items/<int:item_id>/status", methods=["PUT"])
@@ -184,9 +363,7 @@ def update_order_item_status(item_id):
     if not item:
         abort(404, description="Order item not found")
 
-    user_id = get_jwt_identity()
-    user = db.session.get(User, user_id)
-    if not user or user.role != item.station:
+    if current_principal().role != item.station:
         abort(403, description="You are not authorized to update this item")
 
     data = request.get_json() or {}
@@ -199,4 +376,6 @@ def update_order_item_status(item_id):
     item.status = new_status
     db.session.commit()
 
-    return jsonify(order_item_to_dict(item)), 200
+    payload = ORDER_ITEM_SCHEMA.dump(item)
+    publish_station_events([payload])
+    return jsonify(payload), 200
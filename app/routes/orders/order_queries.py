@@ -0,0 +1,77 @@
+# routes/orders/order_queries.py
+from collections import defaultdict
+from sqlalchemy import select
+from app.extensions import db
+from app.models.models import Order, OrderItem
+
+# Columns selected for the order read path. Rows are plain tuples, so no ORM
+# identity map or lazy relationship is involved when serializing them.
+ORDER_COLUMNS = (
+    Order.id,
+    Order.table_id,
+    Order.user_id,
+    Order.status,
+    Order.total_amount,
+    Order.created_at,
+    Order.updated_at,
+    Order.version,
+)
+
+ORDER_ITEM_COLUMNS = (
+    OrderItem.id,
+    OrderItem.order_id,
+    OrderItem.menu_item_id,
+    OrderItem.quantity,
+    OrderItem.price,
+    OrderItem.notes,
+    OrderItem.prep_tag,
+    OrderItem.status,
+    OrderItem.station,
+    OrderItem.created_at,
+    OrderItem.updated_at,
+)
+
+
+def fetch_order_items(order_ids):
+    """
+    Load the items of all given orders in a single query.
+    Returns {order_id: [item_row, ...]} with items in insertion order.
+    """
+    items_by_order = defaultdict(list)
+    if not order_ids:
+        return items_by_order
+
+    stmt = (
+        select(*ORDER_ITEM_COLUMNS)
+        .where(OrderItem.order_id.in_(order_ids))
+        .order_by(OrderItem.order_id, OrderItem.id)
+    )
+    for row in db.session.execute(stmt):
+        items_by_order[row.order_id].append(row)
+    return items_by_order
+
+
+def orders_fingerprint(orders, items_by_order=None):
+    """
+    ETag parts for order rows about to be returned: id, version and
+    updated_at of each order (version moves on every change to the order,
+    including total changes made by the order_items triggers), plus id
+    and updated_at of their items when the response includes them.
+    Costs no query beyond loading the rows themselves.
+    """
+    parts = tuple((o.id, o.version, o.updated_at) for o in orders)
+    if items_by_order is not None:
+        parts += tuple((i.id, i.updated_at) for o in orders for i in items_by_order.get(o.id, ()))
+    return parts
+
+
+def fetch_orders(*criteria):
+    """
+    Load orders matching the given criteria together with their items.
+    Always issues exactly two queries regardless of how many orders match.
+    Returns a list of (order_row, [item_row, ...]) pairs ordered by id.
+    """
+    stmt = select(*ORDER_COLUMNS).where(*criteria).order_by(Order.id)
+    orders = db.session.execute(stmt).all()
+    items_by_order = fetch_order_items([o.id for o in orders])
+    return [(o, items_by_order.get(o.id, [])) for o in orders]
@@ -0,0 +1,161 @@
+# routes/reports/reports.py
+from flask import Blueprint, request, abort
+from flask_jwt_extended import jwt_required
+from sqlalchemy import select, func, distinct, cast
+from app.extensions import db
+from app.models.models import Order, OrderItem, MenuItem, User, DailySalesRollup
+from app.utils.decorators import roles_required, read_only
+from app.utils.filters import date_arg, date_range
+from app.utils.pagination import encode_cursor, decode_cursor, page_limit, page_response
+from app.utils.serializers import Schema
+
+reports_bp = Blueprint("reports_bp", __name__, url_prefix="/reports")
+
+# Group key columns per ?group_by=. The first column orders and pages the
+# groups; any others (names) depend on it.
+SALES_GROUPS = {
+    "day": (func.date_trunc("day", Order.created_at, type_=db.DateTime).label("day"),),
+    "hour": (func.date_trunc("hour", Order.created_at, type_=db.DateTime).label("hour"),),
+    "category": (MenuItem.category.label("category"),),
+    "menu_item": (MenuItem.id.label("menu_item_id"), MenuItem.name.label("menu_item_name")),
+    "waiter": (Order.user_id.label("waiter_id"), User.name.label("waiter_name")),
+}
+
+# The same groups read from daily_sales_rollup, for those it can answer
+ROLLUP_GROUPS = {
+    "day": (cast(DailySalesRollup.day, db.DateTime).label("day"),),
+    "menu_item": (DailySalesRollup.menu_item_id.label("menu_item_id"), MenuItem.name.label("menu_item_name")),
+    "waiter": (DailySalesRollup.waiter_id.label("waiter_id"), User.name.label("waiter_name")),
+}
+
+SALES_METRICS = ("revenue", "item_count", "order_count", "average_ticket")
+SALES_SCHEMAS = {
+    name: Schema(*(c.name for c in columns), *SALES_METRICS) for name, columns in SALES_GROUPS.items()
+}
+
+
+def sales_query(group_by, *criteria, after=None, limit=None):
+    """
+    Sales aggregated per group in one GROUP BY over order_items joined to
+    their orders (and menu items / waiters when grouped by those).
+    `after` continues after a previous page's last group key.
+    """
+    columns = SALES_GROUPS[group_by]
+    key = columns[0]
+    revenue = func.sum(OrderItem.quantity * OrderItem.price)
+    order_count = func.count(distinct(OrderItem.order_id))
+
+    stmt = (
+        select(
+            *columns,
+            revenue.label("revenue"),
+            func.sum(OrderItem.quantity).label("item_count"),
+            order_count.label("order_count"),
+            func.round(revenue / order_count, 2).label("average_ticket"),
+        )
+        .select_from(OrderItem)
+        .join(Order, Order.id == OrderItem.order_id)
+    )
+    if group_by in ("category", "menu_item"):
+        stmt = stmt.join(MenuItem, MenuItem.id == OrderItem.menu_item_id)
+    if group_by == "waiter":
+        stmt = stmt.join(User, User.id == Order.user_id)
+    if after is not None:
+        # The key is a plain expression over row columns, so this prunes rows
+        # before they are aggregated rather than filtering groups afterwards
+        criteria = (*criteria, key.element > after)
+    return stmt.where(*criteria).group_by(*columns).order_by(key).limit(limit)
+
+
+def rollup_sales_query(group_by, *criteria, after=None, limit=None):
+    """
+    sales_query() answered from the precomputed daily rows. Orders are
+    counted through ticket_count (one per order) except per menu item,
+    where order_count already is the number of orders containing it.
+    """
+    columns = ROLLUP_GROUPS[group_by]
+    key = columns[0]
+    revenue = func.sum(DailySalesRollup.revenue)
+    counted = DailySalesRollup.order_count if group_by == "menu_item" else DailySalesRollup.ticket_count
+    order_count = func.sum(counted)
+
+    stmt = select(
+        *columns,
+        revenue.label("revenue"),
+        func.sum(DailySalesRollup.item_count).label("item_count"),
+        order_count.label("order_count"),
+        func.round(revenue / func.nullif(order_count, 0), 2).label("average_ticket"),
+    )
+    if group_by == "menu_item":
+        stmt = stmt.join(MenuItem, MenuItem.id == DailySalesRollup.menu_item_id)
+    if group_by == "waiter":
+        stmt = stmt.join(User, User.id == DailySalesRollup.waiter_id)
+    if after is not None:
+        criteria = (*criteria, key.element > after)
+    return stmt.where(*criteria).group_by(*columns).order_by(key).limit(limit)
+
+
+def rollup_criteria(group_by, status):
+    """
+    Criteria on daily_sales_rollup equivalent to the request's filters, or
+    None when the rollup cannot answer it (other statuses, hour/category
+    groups, or bounds that are timestamps rather than whole days).
+    """
+    if status != "paid" or group_by not in ROLLUP_GROUPS:
+        return None
+    start, end = date_arg("from"), date_arg("to")
+    if (start and not start[1]) or (end and not end[1]):
+        return None
+    criteria = []
+    if start:
+        criteria.append(DailySalesRollup.day >= start[0].date())
+    if end:
+        criteria.append(DailySalesRollup.day <= end[0].date())
+    return criteria
+
+
+# ---- SALES REPORT ----
+@reports_bp.route("/sales", methods=["GET"])
+@jwt_required()
+@roles_required("admin", "manager")
+@read_only
+def sales_report():
+    """
+    Revenue, items sold, order count and average ticket per day, hour,
+    category, menu item or waiter (?group_by=, default day). Filtered by
+    ?from=&to= on the order's created_at (UTC) and ?status= (default paid;
+    "any" for all orders). Groups are paginated with ?limit=&cursor=.
+
+    Paid sales by day, menu item or waiter over whole days are read from
+    daily_sales_rollup; everything else aggregates order_items directly.
+    """
+    group_by = request.args.get("group_by", "day")
+    if group_by not in SALES_GROUPS:
+        abort(400, description=f"group_by must be one of {sorted(SALES_GROUPS)}")
+    key = SALES_GROUPS[group_by][0]
+
+    status = request.args.get("status", "paid")
+    criteria = rollup_criteria(group_by, status)
+    if criteria is not None:
+        source, query = "rollup", rollup_sales_query
+    else:
+        source, query = "live", sales_query
+        criteria = date_range(Order.created_at)
+        if status != "any":
+            criteria.append(Order.status == status)
+
+    after = None
+    cursor = request.args.get("cursor")
+    if cursor:
+        after = decode_cursor(cursor, [key])[0]
+
+    limit = page_limit()
+    rows = db.session.execute(query(group_by, *criteria, after=after, limit=limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], key.name)])
+
+    response = page_response(SALES_SCHEMAS[group_by].dump_many(rows), next_cursor)
+    response.headers["X-Report-Source"] = source
+    return response
@@ -0,0 +1,112 @@
+# routes/reports/rollups.py
+from datetime import datetime, timedelta
+import click
+from flask.cli import AppGroup
+from sqlalchemy import select, func, delete, cast, tuple_, Date, Integer
+from sqlalchemy.dialects.postgresql import insert
+from app.extensions import db
+from app.models.models import Order, OrderItem, DailySalesRollup
+
+ROLLUP_KEY = ("day", "menu_item_id", "station", "waiter_id")
+ROLLUP_MEASURES = ("revenue", "item_count", "order_count", "ticket_count")
+
+
+def rollup_select(*criteria, sign=1):
+    """
+    Rollup rows for the orders matching `criteria`, computed from their
+    items. Each order's ticket goes to its lowest (menu_item_id, station)
+    line. `sign=-1` produces the rows to subtract.
+    """
+    lines = (
+        select(
+            cast(Order.created_at, Date).label("day"),
+            OrderItem.menu_item_id,
+            OrderItem.station,
+            Order.user_id.label("waiter_id"),
+            func.sum(OrderItem.quantity * OrderItem.price).label("revenue"),
+            func.sum(OrderItem.quantity).label("item_count"),
+            cast(
+                func.row_number().over(
+                    partition_by=OrderItem.order_id,
+                    order_by=(OrderItem.menu_item_id, OrderItem.station),
+                ) == 1,
+                Integer,
+            ).label("ticket"),
+        )
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(*criteria)
+        .group_by(OrderItem.order_id, "day", OrderItem.menu_item_id, OrderItem.station, Order.user_id)
+        .subquery()
+    )
+    return select(
+        lines.c.day,
+        lines.c.menu_item_id,
+        lines.c.station,
+        lines.c.waiter_id,
+        sign * func.sum(lines.c.revenue),
+        sign * func.sum(lines.c.item_count),
+        sign * func.count(),
+        sign * func.sum(lines.c.ticket),
+    ).group_by(lines.c.day, lines.c.menu_item_id, lines.c.station, lines.c.waiter_id)
+
+
+def apply_to_rollup(*criteria, sign=1):
+    """Add (or with sign=-1 remove) the matching orders' sales in the caller's transaction."""
+    stmt = insert(DailySalesRollup).from_select(
+        ROLLUP_KEY + ROLLUP_MEASURES, rollup_select(*criteria, sign=sign)
+    )
+    key_columns = [getattr(DailySalesRollup, k) for k in ROLLUP_KEY]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(ROLLUP_KEY),
+        set_={m: getattr(DailySalesRollup, m) + getattr(stmt.excluded, m) for m in ROLLUP_MEASURES},
+    ).returning(*key_columns, DailySalesRollup.order_count)
+    emptied = [tuple(row[:-1]) for row in db.session.execute(stmt) if row.order_count <= 0]
+    if emptied:
+        # Only the rows just decremented: other days are not touched or locked
+        db.session.execute(delete(DailySalesRollup).where(
+            tuple_(*key_columns).in_(emptied), DailySalesRollup.order_count <= 0,
+        ))
+
+
+def record_status_change(order, old_status, new_status):
+    """
+    Keep the rollup in step with an order entering or leaving `paid`.
+    Runs in the status update's transaction, so both commit together.
+    """
+    if old_status == new_status:
+        return
+    if new_status == "paid":
+        apply_to_rollup(Order.id == order.id)
+    elif old_status == "paid":
+        apply_to_rollup(Order.id == order.id, sign=-1)
+
+
+def backfill(start=None, end=None):
+    """
+    Rebuild the rollup for paid orders created on days start..end
+    (inclusive, either open-ended) in one transaction. Returns the number
+    of rollup rows in the range.
+    """
+    criteria, cleared = [Order.status == "paid"], []
+    if start:
+        criteria.append(Order.created_at >= datetime.combine(start, datetime.min.time()))
+        cleared.append(DailySalesRollup.day >= start)
+    if end:
+        criteria.append(Order.created_at < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+        cleared.append(DailySalesRollup.day <= end)
+    db.session.execute(delete(DailySalesRollup).where(*cleared))
+    apply_to_rollup(*criteria)
+    db.session.commit()
+    return db.session.execute(select(func.count()).select_from(DailySalesRollup).where(*cleared)).scalar()
+
+
+rollups_cli = AppGroup("rollups", help="Maintain the daily sales rollup.")
+
+
+@rollups_cli.command("backfill")
+@click.option("--from", "start", type=click.DateTime(["%Y-%m-%d"]), help="First day (default: all history).")
+@click.option("--to", "end", type=click.DateTime(["%Y-%m-%d"]), help="Last day (default: no limit).")
+def backfill_command(start, end):
+    """Recompute daily_sales_rollup from paid orders."""
+    rows = backfill(start and start.date(), end and end.date())
+    click.echo(f"daily_sales_rollup rebuilt: {rows} rows")
@@ -0,0 +1,63 @@
+# routes/stations/feed.py
+import logging
+from datetime import datetime, timedelta
+from flask import current_app
+from app.extensions import db
+
+logger = logging.getLogger(__name__)
+
+STATIONS = ("kitchen", "butchery", "bar")
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def event_id(updated_at, item_id):
+    """
+    SSE event id of an item change: '<updated_at in µs>-<item id>'.
+    Ids sort like (updated_at, id), which is what Last-Event-ID resumes from.
+    """
+    return f"{(updated_at - _EPOCH) // timedelta(microseconds=1)}-{item_id}"
+
+
+def parse_event_id(value):
+    """Inverse of event_id(); returns None for anything malformed."""
+    try:
+        micros, item_id = value.split("-", 1)
+        return _EPOCH + timedelta(microseconds=int(micros)), int(item_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def get_broker():
+    broker = current_app.extensions["broker"]
+    broker.start(db.engine)
+    return broker
+
+
+def format_event(event):
+    """Render one feed event (data already JSON-encoded) in text/event-stream framing."""
+    return f"id: {event['id']}\nevent: item\ndata: {event['data']}\n\n"
+
+
+def publish_station_events(items):
+    """
+    Tell station feeds about serialized order items. Notifications carry
+    only the event and item ids: pg_notify payloads are capped at 8000
+    bytes and item notes are not, so feeds load the rows themselves.
+    Call after commit: subscribers must never see rows that may roll back.
+    The write has committed by then, so a failure here is logged rather
+    than raised; feeds pick the items up on their next replay.
+    """
+    by_station = {}
+    for data in items:
+        by_station.setdefault(data["station"], []).append(
+            {"id": event_id(data["updated_at"], data["id"]), "item_id": data["id"]}
+        )
+    if not by_station:
+        return
+    broker = current_app.extensions["broker"]
+    try:
+        for station, events in by_station.items():
+            broker.publish(station, events, engine=db.engine)
+    except Exception:
+        logger.exception("Could not publish station events for %s", sorted(by_station))
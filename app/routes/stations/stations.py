@@ -0,0 +1,168 @@
+# routes/stations/stations.py
+import queue
+from datetime import timedelta
+from flask import Blueprint, Response, request, jsonify, abort, current_app, stream_with_context
+from flask_jwt_extended import jwt_required
+from sqlalchemy import select, tuple_
+from app.extensions import db
+from app.models.models import Order, OrderItem, MenuItem, Table
+from app.utils.decorators import roles_required, current_principal
+from app.routes.orders.order import ORDER_ITEM_SCHEMA
+from app.routes.orders.order_queries import ORDER_ITEM_COLUMNS
+from app.utils.pagination import page_limit
+from app.utils.serializers import Schema
+from .feed import STATIONS, event_id, parse_event_id, get_broker, format_event
+
+stations_bp = Blueprint("stations_bp", __name__, url_prefix="/stations")
+
+QUEUE_ITEM_SCHEMA = Schema(*ORDER_ITEM_SCHEMA.fields, "menu_item_name", "table_number")
+
+
+def station_queue_query(station, limit):
+    """
+    Pending items for a station, oldest first, with menu item name and table
+    number joined in. The station/status predicate and the created_at order
+    match ix_order_items_pending_station, so this is an ordered index range
+    scan that stops after `limit` rows.
+    """
+    return (
+        select(*ORDER_ITEM_COLUMNS, MenuItem.name.label("menu_item_name"), Table.number.label("table_number"))
+        .join(MenuItem, MenuItem.id == OrderItem.menu_item_id)
+        .join(Order, Order.id == OrderItem.order_id)
+        .join(Table, Table.id == Order.table_id)
+        .where(OrderItem.station == station, OrderItem.status == "pending")
+        .order_by(OrderItem.created_at, OrderItem.id)
+        .limit(limit)
+    )
+
+
+def replay_events(station, after):
+    """
+    Item changes a client reconnecting from the (updated_at, id) position
+    `after` missed, oldest first. Changes from STATION_FEED_REPLAY_OVERLAP_SECONDS
+    before `after` are sent again: a transaction that commits late can carry
+    an older updated_at than events already delivered. Clients apply events
+    by item id, so a repeat is harmless. Returns None when more than
+    STATION_FEED_REPLAY_LIMIT changes are due; the client reloads the queue.
+    """
+    overlap = timedelta(seconds=current_app.config.get("STATION_FEED_REPLAY_OVERLAP_SECONDS", 5))
+    limit = current_app.config.get("STATION_FEED_REPLAY_LIMIT", 500)
+    stmt = (
+        select(*ORDER_ITEM_COLUMNS)
+        .where(OrderItem.station == station,
+               tuple_(OrderItem.updated_at, OrderItem.id) > tuple_(after[0] - overlap, after[1]))
+        .order_by(OrderItem.updated_at, OrderItem.id)
+        .limit(limit + 1)
+    )
+    rows = db.session.execute(stmt).all()
+    if len(rows) > limit:
+        return None
+    return item_events(rows)
+
+
+def item_events(rows):
+    """Feed events for order item rows: the item as it is now, JSON-encoded once."""
+    dumps = current_app.json.dumps
+    return [
+        {"id": event_id(row.updated_at, row.id), "data": dumps(ORDER_ITEM_SCHEMA.dump(row))}
+        for row in rows
+    ]
+
+
+def load_item_events(station, item_ids):
+    """Feed events for the station's items among `item_ids`, in feed order. Commits."""
+    rows = db.session.execute(
+        select(*ORDER_ITEM_COLUMNS)
+        .where(OrderItem.id.in_(item_ids), OrderItem.station == station)
+        .order_by(OrderItem.updated_at, OrderItem.id)
+    ).all()
+    db.session.commit()  # hand the connection back while the stream waits
+    return item_events(rows)
+
+
+def check_station_access(station):
+    """404 for unknown stations; station staff may only see their own station."""
+    if station not in STATIONS:
+        abort(404, description="Unknown station")
+    role = current_principal().role
+    if role in STATIONS and role != station:
+        abort(403, description="You are not authorized to view this station")
+
+
+# ---- STATION WORK QUEUE ----
+@stations_bp.route("/<station>/queue", methods=["GET"])
+@jwt_required()
+@roles_required("admin", "manager", "kitchen", "butchery", "bar")
+def station_queue(station):
+    """Pending items for a station ordered by created_at (?limit= caps the count)."""
+    check_station_access(station)
+
+    rows = db.session.execute(station_queue_query(station, page_limit()))
+    return jsonify(QUEUE_ITEM_SCHEMA.dump_many(rows)), 200
+
+
+# ---- LIVE STATION FEED (SSE) ----
+@stations_bp.route("/<station>/feed", methods=["GET"])
+@jwt_required()
+@roles_required("admin", "manager", "kitchen", "butchery", "bar")
+def station_feed(station):
+    """
+    Stream new and status-changed items for a station as Server-Sent Events.
+    Reconnecting clients send Last-Event-ID and first receive the changes
+    they missed (see replay_events), then the live stream. When too many
+    were missed they get a single "reset" event instead and should reload
+    /stations/<station>/queue.
+    """
+    check_station_access(station)
+
+    broker = get_broker()
+    # Subscribe before replaying so nothing committed in between is lost
+    subscription = broker.subscribe(station)
+
+    backlog, reset = [], False
+    after = parse_event_id(request.headers.get("Last-Event-ID") or request.args.get("last_event_id"))
+    if after:
+        backlog = replay_events(station, after)
+        if backlog is None:
+            backlog, reset = [], True
+    # End the read transaction so the pooled connection is returned while
+    # the stream stays open; it only comes back briefly to load notified items
+    db.session.commit()
+
+    heartbeat = current_app.config.get("STATION_FEED_HEARTBEAT", 15)
+
+    def stream():
+        replayed = {event["id"] for event in backlog}
+        try:
+            yield "retry: 3000\n\n"
+            if reset:
+                yield "event: reset\ndata: {}\n\n"
+            for event in backlog:
+                yield format_event(event)
+            while True:
+                try:
+                    notices = [subscription.get(timeout=heartbeat)]
+                except queue.Empty:
+                    notices = []
+                # Take whatever else has arrived, to load it in one query
+                while not subscription.empty():
+                    notices.append(subscription.get_nowait())
+                if subscription.overflowed:
+                    # Notifications were dropped: end the stream so the client
+                    # reconnects and replays everything after its last event
+                    return
+                if not notices:
+                    yield ": keep-alive\n\n"
+                    continue
+                item_ids = {n["item_id"] for n in notices if n["id"] not in replayed}  # skip replayed
+                if item_ids:
+                    for event in load_item_events(station, item_ids):
+                        yield format_event(event)
+        finally:
+            broker.unsubscribe(station, subscription)
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
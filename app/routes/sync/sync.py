@@ -0,0 +1,209 @@
+# routes/sync/sync.py
+from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify, abort, current_app
+from flask_jwt_extended import jwt_required
+from sqlalchemy import select, union
+from sqlalchemy.orm.exc import StaleDataError
+from werkzeug.exceptions import HTTPException
+from app.extensions import db
+from app.models.models import Order, OrderItem, Table, ChangeRecord
+from app.routes.orders.order import (
+    ORDER_SCHEMA, ORDER_ITEM_SCHEMA, insert_order_items, change_order_status,
+)
+from app.routes.orders.order_queries import ORDER_COLUMNS, ORDER_ITEM_COLUMNS, fetch_order_items
+from app.routes.tables.tables import TABLE_FIELDS, TABLE_SCHEMA, tables_fingerprint
+from app.routes.menu_items.menu_items import MENU_ITEM_SCHEMA
+from app.routes.menu_items.menu_cache import get_menu_cache
+from app.routes.stations.feed import publish_station_events
+from app.utils.decorators import roles_required, current_principal
+from app.utils.idempotency import idempotent
+from app.utils.pagination import encode_cursor, decode_cursor
+
+sync_bp = Blueprint("sync_bp", __name__, url_prefix="/sync")
+
+# A sync cursor holds the changed-since watermark for orders and items, the
+# menu version and the tables fingerprint the device last received
+SYNC_CURSOR_TYPES = (datetime, int, str)
+
+ORDER_WRITER_ROLES = {"admin", "manager", "waiter"}
+
+
+def order_changes(since):
+    """Orders whose row or any of whose items changed after `since`, and those items."""
+    changed_ids = union(
+        select(Order.id).where(Order.updated_at > since),
+        select(OrderItem.order_id).where(OrderItem.updated_at > since),
+    )
+    orders = db.session.execute(
+        select(*ORDER_COLUMNS).where(Order.id.in_(changed_ids)).order_by(Order.id)
+    ).all()
+    items = db.session.execute(
+        select(*ORDER_ITEM_COLUMNS).where(OrderItem.updated_at > since).order_by(OrderItem.id)
+    ).all()
+    return orders, items
+
+
+def deleted_items(since):
+    """Ids of order items deleted after `since`, from the change outbox."""
+    return db.session.scalars(
+        select(ChangeRecord.row_id)
+        .where(ChangeRecord.table_name == "order_items", ChangeRecord.op == "delete",
+               ChangeRecord.created_at > since)
+        .order_by(ChangeRecord.row_id)
+        .distinct()
+    ).all()
+
+
+def open_orders():
+    """Snapshot for a device without a cursor: every unpaid order with all its items."""
+    orders = db.session.execute(
+        select(*ORDER_COLUMNS).where(Order.status != "paid").order_by(Order.id)
+    ).all()
+    items_by_order = fetch_order_items([o.id for o in orders])
+    return orders, [item for o in orders for item in items_by_order[o.id]]
+
+
+@sync_bp.route("", methods=["GET"])
+@jwt_required()
+@roles_required("admin", "manager", "waiter", "cashier")
+def pull():
+    """
+    Changes since ?since=<cursor>, for devices that keep a local copy.
+
+    Without a cursor: all unpaid orders with their items, plus the full
+    tables list and menu. With one: only orders and items changed since
+    (paid ones included, so devices can drop them), the ids of items
+    deleted since, and the tables list and menu only if they changed at
+    all (null otherwise; when present they replace the device's copy,
+    which also covers deletions). Every response carries the cursor for
+    the next call. Deletions are read from the change outbox, so a device
+    away for longer than it is kept should sync again without a cursor.
+
+    Rows changed within SYNC_OVERLAP_SECONDS before the cursor are sent
+    again, so a write whose transaction committed late is never missed.
+    Applying a response is an upsert by id.
+    """
+    now = datetime.utcnow()
+    menu = get_menu_cache()
+    menu_version = menu.version
+    _, tables_md5 = tables_fingerprint()
+
+    since = request.args.get("since")
+    if since:
+        watermark, seen_menu_version, seen_tables_md5 = decode_cursor(since, SYNC_CURSOR_TYPES)
+        overlap = timedelta(seconds=current_app.config.get("SYNC_OVERLAP_SECONDS", 10))
+        orders, items = order_changes(watermark - overlap)
+        deleted = deleted_items(watermark - overlap)
+    else:
+        seen_menu_version = seen_tables_md5 = None
+        orders, items = open_orders()
+        deleted = []
+
+    tables = None
+    if tables_md5 != seen_tables_md5:
+        tables = TABLE_SCHEMA.dump_many(
+            db.session.execute(select(*[getattr(Table, f) for f in TABLE_FIELDS]).order_by(Table.id))
+        )
+    menu_items = None
+    if menu_version != seen_menu_version:
+        menu_items = MENU_ITEM_SCHEMA.dump_many(menu.items())
+
+    return jsonify({
+        "orders": ORDER_SCHEMA.dump_many(orders),
+        "order_items": ORDER_ITEM_SCHEMA.dump_many(items),
+        "deleted_order_items": deleted,
+        "tables": tables,
+        "menu_items": menu_items,
+        "cursor": encode_cursor([now, menu_version, tables_md5]),
+    }), 200
+
+
+def resolve_order(mutation, refs):
+    """The order a mutation targets, by server "order_id" or by an earlier mutation's "order_ref"."""
+    if "order_ref" in mutation:
+        order_id = refs.get(mutation["order_ref"])
+        if order_id is None:
+            abort(400, description=f"Unknown order_ref {mutation['order_ref']!r}")
+    else:
+        order_id = mutation.get("order_id")
+    # Fresh state: earlier mutations may have changed the order via triggers
+    order = db.session.get(Order, order_id, populate_existing=True) if order_id is not None else None
+    if order is None:
+        abort(404, description="Order not found")
+    return order
+
+
+def apply_mutation(mutation, refs, principal):
+    """Apply one queued mutation; returns (result, new station items)."""
+    op = mutation.get("op")
+    if op in ("create_order", "add_items") and principal.role not in ORDER_WRITER_ROLES:
+        abort(403, description="Forbidden: Insufficient role")
+
+    if op == "create_order":
+        table_id = mutation.get("table_id")
+        if not table_id:
+            abort(400, description="Table ID is required")
+        if db.session.get(Table, table_id) is None:
+            abort(404, description="Table not found")
+        order = Order(table_id=table_id, user_id=principal.id, status="open", total_amount=0)
+        db.session.add(order)
+        db.session.flush()
+        if mutation.get("ref") is not None:
+            refs[mutation["ref"]] = order.id
+        return {"order_id": order.id}, []
+
+    if op == "add_items":
+        order = resolve_order(mutation, refs)
+        items = insert_order_items(order.id, mutation.get("items"))
+        return {"order_id": order.id, "item_ids": [item["id"] for item in items]}, items
+
+    if op == "set_status":
+        order = resolve_order(mutation, refs)
+        change_order_status(order, mutation.get("status"), mutation.get("version"))
+        return {"order_id": order.id}, []
+
+    abort(400, description="op must be one of ['add_items', 'create_order', 'set_status']")
+
+
+@sync_bp.route("", methods=["POST"])
+@jwt_required()
+@roles_required("admin", "manager", "waiter", "cashier")
+@idempotent
+def push():
+    """
+    Apply a device's queue of offline mutations in one transaction.
+    Body: {"mutations": [
+        {"op": "create_order", "ref": "t1", "table_id": 3},
+        {"op": "add_items", "order_ref": "t1", "items": [{"menu_item_id": 1, "quantity": 2}]},
+        {"op": "set_status", "order_id": 12, "status": "closed", "version": 4}
+    ]}
+    Orders created in the batch are referenced by their "ref"; existing
+    ones by "order_id". Mutations are validated exactly like the
+    corresponding /orders endpoints. Either all apply or none do: the
+    first failure is reported with its index. Send an Idempotency-Key so
+    a retried upload is not applied twice.
+    """
+    data = request.get_json() or {}
+    mutations = data.get("mutations")
+    if not isinstance(mutations, list) or not mutations:
+        abort(400, description="mutations must be a non-empty list")
+
+    principal = current_principal()
+    refs, results, station_items = {}, [], []
+    for index, mutation in enumerate(mutations):
+        try:
+            if not isinstance(mutation, dict):
+                abort(400, description="Each mutation must be an object")
+            result, items = apply_mutation(mutation, refs, principal)
+        except HTTPException as error:
+            db.session.rollback()
+            return jsonify(msg=error.description, index=index), error.code
+        except StaleDataError:
+            db.session.rollback()
+            return jsonify(msg="Order was changed by someone else; reload it and retry", index=index), 409
+        results.append(result)
+        station_items.extend(items)
+    db.session.commit()
+
+    publish_station_events(station_items)
+    return jsonify(results=results, refs=refs), 200
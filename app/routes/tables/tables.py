@@ -1,28 +1,46 @@
+import hashlib
 from flask import Blueprint, request, jsonify, abort
 from flask_jwt_extended import jwt_required
+from sqlalchemy import select
 from app.extensions import db
 from app.models.models import Table
-from app.utils.decorators import roles_required
+from app.utils.decorators import roles_required, read_only
+from app.utils.pagination import paginate, requested_fields, page_response
+from app.utils.serializers import Schema
+from app.utils.etag import make_etag, not_modified, with_etag
 
 tables_bp = Blueprint("tables_bp", __name__, url_prefix="/tables")
 
-def table_to_dict(table):
-    """Helper to convert Table model to JSON-safe dict."""
-    return {
-        "id": table.id,
-        "number": table.number,
-        "status": table.status,
-        "is_vip": table.is_vip,
-    }
+TABLE_FIELDS = ("id", "number", "status", "is_vip")
+TABLE_SCHEMA = Schema(*TABLE_FIELDS)
+
+def tables_fingerprint(*criteria):
+    """
+    (count, content hash) of the matching rows. The floor plan is a few
+    dozen narrow rows, so they are hashed in Python: plain SQL that runs
+    on the read replica whatever its dialect.
+    """
+    rows = db.session.execute(
+        select(*[getattr(Table, f) for f in TABLE_FIELDS]).where(*criteria).order_by(Table.id)
+    ).all()
+    digest = hashlib.md5(repr([tuple(row) for row in rows]).encode())
+    return len(rows), digest.hexdigest()
 
 # ---- GET ALL TABLES ----
 @tables_bp.route("/", methods=["GET"])
 @jwt_required()
 @roles_required("admin", "manager", "waiter")
+@read_only
 def get_tables():
-    """Return all tables."""
-    tables = Table.query.all()
-    return jsonify([table_to_dict(t) for t in tables])
+    """Return tables, paginated with ?limit=&cursor= and projected with ?fields=."""
+    etag = make_etag(*tables_fingerprint())
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    fields = requested_fields(TABLE_FIELDS)
+    tables, next_cursor = paginate(Table, fields)
+    return with_etag(page_response(TABLE_SCHEMA.dump_many(tables, fields), next_cursor), etag)
 
 # ---- CREATE TABLE ----
 @tables_bp.route("/", methods=["POST"])
@@ -46,17 +64,24 @@ def create_table():
     db.session.add(table)
     db.session.commit()
 
-    return jsonify(table_to_dict(table)), 201
+    return jsonify(TABLE_SCHEMA.dump(table)), 201
 
 # ---- GET SINGLE TABLE ----
 @tables_bp.route("/<int:table_id>", methods=["GET"])
 @jwt_required()
 @roles_required("admin", "manager", "waiter")
+@read_only
 def get_table(table_id):
-    table = db.session.get(Table, table_id)
-    if not table:
+    count, fingerprint = tables_fingerprint(Table.id == table_id)
+    if not count:
         abort(404)
-    return jsonify(table_to_dict(table))
+    etag = make_etag(fingerprint)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    table = db.session.get(Table, table_id)
+    return with_etag(jsonify(TABLE_SCHEMA.dump(table)), etag)
 
 # ---- UPDATE TABLE ----
 @tables_bp.route("/<int:table_id>", methods=["PUT"])
@@ -71,7 +96,7 @@ def update_table(table_id):
     table.status = data.get("status", table.status)
     table.is_vip = data.get("is_vip", table.is_vip)
     db.session.commit()
-    return jsonify(table_to_dict(table))
+    return jsonify(TABLE_SCHEMA.dump(table))
 
 # ---- DELETE TABLE ----
 @tables_bp.route("/<int:table_id>", methods=["DELETE"])
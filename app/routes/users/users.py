@@ -1,30 +1,32 @@
 # app/routes/users/users.py
 from flask import Blueprint, request, jsonify, abort
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from app.extensions import db
 from app.models.models import User
-from werkzeug.security import generate_password_hash
-from app.utils.decorators import roles_required
+from app.utils.security import hash_password
+from app.utils.decorators import roles_required, read_only, current_principal, forget_user
+from app.utils.pagination import paginate, requested_fields, page_response
+from app.utils.serializers import Schema
 
 users_bp = Blueprint("users_bp", __name__, url_prefix="/users")
 
-def user_to_dict(user):
-    """Helper to convert User model to JSON-safe dict."""
-    return {
-        "id": user.id,
-        "name": user.name,
-        "username": user.username,
-        "role": user.role,
-    }
+# password_hash is deliberately not selectable
+USER_FIELDS = ("id", "name", "username", "role")
+USER_SCHEMA = Schema(*USER_FIELDS)
 
 # ---- GET ALL USERS ----
 @users_bp.route("/", methods=["GET"])
 @jwt_required()
 @roles_required("admin", "manager")  # <-- pass roles as separate arguments
+@read_only
 def get_users():
-    """Return list of all users. Restricted to admin and manager."""
-    users = User.query.all()
-    return jsonify([user_to_dict(u) for u in users])
+    """
+    Return list of users. Restricted to admin and manager.
+    Paginated with ?limit=&cursor=, projected with ?fields=.
+    """
+    fields = requested_fields(USER_FIELDS)
+    users, next_cursor = paginate(User, fields)
+    return page_response(USER_SCHEMA.dump_many(users, fields), next_cursor)
 
 # ---- CREATE USER ----
 @users_bp.route("/", methods=["POST"])
@@ -48,26 +50,26 @@ def create_user():
     user = User(
         name=name,
         username=username,
-        password_hash=generate_password_hash(password),
+        password_hash=hash_password(password),
         role=role,
     )
     db.session.add(user)
     db.session.commit()
 
-    return jsonify(user_to_dict(user)), 201
+    return jsonify(USER_SCHEMA.dump(user)), 201
 
 # ---- GET SINGLE USER ----
 @users_bp.route("/<int:user_id>", methods=["GET"])
 @jwt_required()
 @roles_required("admin", "manager", "waiter", "kitchen", "butcher", "bar", "cashier")
+@read_only
 def get_user(user_id):
     """
     Get user details by ID.
     Allowed roles: admin, manager, and all staff roles.
     Users can only see their own info unless admin/manager.
     """
-    current_user_id = get_jwt_identity()
-    current_user = db.session.get(User, current_user_id)
+    current_user = current_principal()
 
     user = db.session.get(User, user_id)
     if user is None:
@@ -77,7 +79,7 @@ def get_user(user_id):
     if current_user.role not in ["admin", "manager"] and current_user.id != user_id:
         abort(403, "Forbidden")
 
-    return jsonify(user_to_dict(user))
+    return jsonify(USER_SCHEMA.dump(user))
 
 # ---- UPDATE USER ----
 @users_bp.route("/<int:user_id>", methods=["PUT"])
@@ -96,7 +98,8 @@ def update_user(user_id):
     # We won't allow username or password update here for now
 
     db.session.commit()
-    return jsonify(user_to_dict(user))
+    forget_user(user.id)
+    return jsonify(USER_SCHEMA.dump(user))
 
 # ---- DELETE USER ----
 @users_bp.route("/<int:user_id>", methods=["DELETE"])
@@ -109,4 +112,5 @@ def delete_user(user_id):
         abort(404, description="User not found")
     db.session.delete(user)
     db.session.commit()
+    forget_user(user_id)
     return jsonify({"message": "User deleted"})
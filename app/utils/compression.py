@@ -0,0 +1,118 @@
+# app/utils/compression.py
+
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional; without it only gzip is offered
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "text/csv",
+    "text/html",
+    "text/plain",
+}
+
+
+class GzipCompressor:
+    def __init__(self, level):
+        # wbits 31: zlib stream with a gzip header and trailer
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._z.compress(data)
+
+    def finish(self):
+        return self._z.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, quality):
+        self._c = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._c.process(data)
+
+    def finish(self):
+        return self._c.finish()
+
+
+def available_encodings(app):
+    """COMPRESS_ENCODINGS in server preference order, minus any whose library is missing."""
+    wanted = [e.strip() for e in app.config.get("COMPRESS_ENCODINGS", "br,gzip").split(",")]
+    return [e for e in wanted if e == "gzip" or (e == "br" and brotli is not None)]
+
+
+def compress_stream(chunks, compressor):
+    """Compress a response iterable chunk by chunk, never holding the whole body."""
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def init_compression(app):
+    """
+    Compress responses with brotli or gzip, whichever the client's
+    Accept-Encoding ranks highest (server order breaks ties).
+
+    Buffered bodies are compressed when at least COMPRESS_MIN_SIZE bytes;
+    streamed bodies (exports) are compressed incrementally as they are
+    generated. Server-Sent Events, responses marked Cache-Control:
+    no-transform and non-text types are left alone. Compressed responses
+    get a weak ETag, since the bytes differ per encoding.
+    """
+    encodings = available_encodings(app)
+    min_size = app.config.get("COMPRESS_MIN_SIZE", 1024)
+    gzip_level = app.config.get("COMPRESS_GZIP_LEVEL", 6)
+    brotli_quality = app.config.get("COMPRESS_BROTLI_QUALITY", 4)
+
+    def compressor(encoding):
+        if encoding == "br":
+            return BrotliCompressor(brotli_quality)
+        return GzipCompressor(gzip_level)
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            not encodings
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or "no-transform" in response.headers.get("Cache-Control", "")
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = compress_stream(response.response, compressor(encoding))
+            response.headers.pop("Content-Length", None)
+        else:
+            body = response.get_data()
+            if len(body) < min_size:
+                return response
+            c = compressor(encoding)
+            response.set_data(c.compress(body) + c.finish())
+
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
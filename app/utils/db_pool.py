@@ -0,0 +1,69 @@
+# app/utils/db_pool.py
+
+import threading
+from flask import jsonify, current_app
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app.extensions import db
+
+
+class PoolStats:
+    """Cumulative pool counters, fed by SQLAlchemy pool events."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidations = 0
+        self.timeouts = 0
+
+    def incr(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self, pool):
+        stats = {
+            "pool": type(pool).__name__,
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+        }
+        # Gauges exist only on queue-based pools (not NullPool)
+        for gauge in ("size", "checkedin", "checkedout", "overflow"):
+            if hasattr(pool, gauge):
+                stats[gauge] = getattr(pool, gauge)()
+        return stats
+
+
+def init_db_pool(app):
+    """
+    Attach pool metrics, the pool-exhaustion handler and, in PgBouncer mode,
+    the per-transaction statement_timeout. Must run inside an app context.
+    """
+    engine = db.engine
+    stats = PoolStats()
+    app.extensions["db_pool_stats"] = stats
+
+    event.listen(engine.pool, "connect", lambda *args: stats.incr("connects"))
+    event.listen(engine.pool, "checkout", lambda *args: stats.incr("checkouts"))
+    event.listen(engine.pool, "invalidate", lambda *args: stats.incr("invalidations"))
+
+    timeout_ms = app.config.get("DB_STATEMENT_TIMEOUT_MS")
+    if app.config.get("DB_PGBOUNCER") and timeout_ms:
+        @event.listens_for(engine, "begin")
+        def set_statement_timeout(conn):
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+    @app.errorhandler(PoolTimeoutError)
+    def pool_exhausted(error):
+        stats.incr("timeouts")
+        db.session.rollback()
+        response = jsonify(msg="Database busy, please retry")
+        response.headers["Retry-After"] = "1"
+        return response, 503
+
+
+def pool_metrics():
+    stats = current_app.extensions["db_pool_stats"]
+    return stats.snapshot(db.engine.pool)
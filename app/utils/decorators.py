@@ -1,8 +1,76 @@
 # app/utils/decorators.py
 
+import threading
+import time
+from collections import namedtuple
 from functools import wraps
 from flask_jwt_extended import verify_jwt_in_request, get_jwt
-from flask import jsonify
+from flask import jsonify, g, current_app
+from app.utils.replica import should_use_replica
+
+# The authenticated user as described by the access token claims
+Principal = namedtuple("Principal", ["id", "role", "name"])
+
+
+def current_principal():
+    """
+    Principal of the current request, built from the JWT claims set at login.
+    Call only after the token has been verified (inside @roles_required or
+    @jwt_required views). No database access.
+    """
+    claims = get_jwt()
+    return Principal(int(claims["sub"]), claims.get("role"), claims.get("name"))
+
+
+class UserCache:
+    """
+    Per-process map of user id -> current role, each entry trusted for `ttl`
+    seconds. Lets role checks notice deleted users and role changes within
+    `ttl` without a query on every request. A role of None means the user
+    no longer exists.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def role(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry and entry[0] > now:
+            return entry[1]
+
+        from app.extensions import db
+        from app.models.models import User
+        role = db.session.execute(db.select(User.role).where(User.id == user_id)).scalar()
+        with self._lock:
+            self._entries[user_id] = (now + self.ttl, role)
+        return role
+
+    def forget(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+def get_user_cache():
+    """Per-app UserCache, or None when AUTH_USER_CACHE_TTL is 0 (purely stateless checks)."""
+    ttl = current_app.config.get("AUTH_USER_CACHE_TTL", 0)
+    if not ttl:
+        return None
+    cache = current_app.extensions.get("user_cache")
+    if cache is None:
+        cache = current_app.extensions.setdefault("user_cache", UserCache(ttl))
+    return cache
+
+
+def forget_user(user_id):
+    """Drop a user's cached role after it was changed or the user deleted."""
+    cache = current_app.extensions.get("user_cache")
+    if cache is not None:
+        cache.forget(user_id)
+
 
 def roles_required(*allowed_roles):
     """
@@ -13,6 +81,9 @@ def roles_required(*allowed_roles):
     - A valid JWT is present
     - The JWT contains a 'role' claim
     - The 'role' claim matches one of the allowed_roles
+    - With AUTH_USER_CACHE_TTL set, that the user still exists with that role
+
+    The verified principal is available through current_principal().
     """
 
     def wrapper(fn):
@@ -21,16 +92,36 @@ def roles_required(*allowed_roles):
             # Ensure JWT is present and valid
             verify_jwt_in_request()
 
-            # Get claims from the token
-            claims = get_jwt()
+            principal = current_principal()
 
             # Check if 'role' is present in claims and allowed
-            user_role = claims.get('role', None)
-            if user_role is None or user_role not in allowed_roles:
+            if principal.role is None or principal.role not in allowed_roles:
                 return jsonify(msg="Forbidden: Insufficient role"), 403
 
+            # Optionally re-check the role against a short-lived cache so
+            # deleted users and role changes take effect before token expiry
+            cache = get_user_cache()
+            if cache is not None and cache.role(principal.id) != principal.role:
+                return jsonify(msg="Token no longer valid for this user"), 401
+
             # Role allowed — proceed with the original function
             return fn(*args, **kwargs)
 
         return decorator
     return wrapper
+
+
+def read_only(fn):
+    """
+    Marks a view as read-only so its queries may be served by the read
+    replica (SQLALCHEMY_REPLICA_URI). Place it below @roles_required.
+    Users who wrote within REPLICA_STICKY_SECONDS keep reading from the
+    primary so they always see their own changes.
+    """
+
+    @wraps(fn)
+    def decorator(*args, **kwargs):
+        g.use_replica = should_use_replica()
+        return fn(*args, **kwargs)
+
+    return decorator
@@ -0,0 +1,33 @@
+# app/utils/etag.py
+
+import hashlib
+from flask import request, current_app
+
+
+def make_etag(*parts):
+    """
+    Build a strong ETag from a cheap fingerprint of the data behind a response
+    (version counters, row counts, max(updated_at), ...) plus the request's
+    path and query string, since those select and shape the body.
+    """
+    digest = hashlib.sha1(repr((request.full_path,) + parts).encode())
+    return digest.hexdigest()
+
+
+def not_modified(etag):
+    """
+    Return a bodiless 304 response when the client already holds `etag`,
+    otherwise None so the view goes on to build the full body. Uses the weak
+    comparison If-None-Match calls for, so the W/ tags of compressed
+    responses match too.
+    """
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def with_etag(response, etag):
+    response.set_etag(etag)
+    return response
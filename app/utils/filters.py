@@ -0,0 +1,33 @@
+# app/utils/filters.py
+
+from datetime import date, datetime, timedelta
+from flask import request, abort
+
+
+def date_arg(name):
+    """Parse ?<name>=YYYY-MM-DD (or a full ISO timestamp); None when absent, 400 when malformed."""
+    raw = request.args.get(name)
+    if not raw:
+        return None
+    try:
+        if len(raw) == 10:
+            return datetime.combine(date.fromisoformat(raw), datetime.min.time()), True
+        return datetime.fromisoformat(raw), False
+    except ValueError:
+        abort(400, description=f"{name} must be an ISO date (YYYY-MM-DD) or timestamp")
+
+
+def date_range(column):
+    """
+    Criteria for ?from=&to= on a timestamp column. Both bounds are
+    inclusive; a bare date in `to` covers that whole day. Expressed as a
+    half-open range on the raw column so an index on it stays usable.
+    """
+    criteria = []
+    start, end = date_arg("from"), date_arg("to")
+    if start:
+        criteria.append(column >= start[0])
+    if end:
+        value, whole_day = end
+        criteria.append(column < value + timedelta(days=1) if whole_day else column <= value)
+    return criteria
@@ -0,0 +1,222 @@
+# app/utils/idempotency.py
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, request, jsonify, make_response
+from sqlalchemy import event, select, update, delete
+from sqlalchemy.dialects.postgresql import insert
+from app.extensions import db
+from app.models.models import IdempotencyKey
+from app.utils.decorators import current_principal
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+# Expired keys are deleted at most this often per process, piggybacking on a save
+PURGE_INTERVAL = 60.0
+
+StoredResponse = namedtuple("StoredResponse", ["fingerprint", "status_code", "body", "expires_at"])
+
+
+def request_fingerprint():
+    """Digest of what makes two requests "the same": method, path and raw body."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{request.method} {request.path}\n".encode())
+    h.update(request.get_data(cache=True))
+    return h.digest()
+
+
+class IdempotencyStore:
+    """
+    Responses of keyed requests: an LRU of the `size` most recent ones in
+    front of the idempotency_keys table, which every worker shares.
+
+    A new key is claimed by inserting its row in the same transaction as
+    the request's own writes, so the claim commits (or rolls back) with
+    them. A concurrent retry blocks on that row until the first request
+    finishes, then finds the key taken. The response is stored right
+    after, and a retry usually hits the LRU without touching the database.
+
+    Until its response is stored a claim only holds a `lease`: should the
+    worker die between the view's commit and the save, retries get 409s
+    for at most that long and then take the key over.
+    """
+
+    def __init__(self, ttl, size, lease=60):
+        self.ttl = timedelta(seconds=ttl)
+        self.size = size
+        self.lease = timedelta(seconds=lease)
+        self._lock = threading.Lock()
+        self._recent = OrderedDict()  # (user_id, key) -> StoredResponse
+        self._purged_at = None
+
+    def cached(self, user_id, key):
+        with self._lock:
+            stored = self._recent.get((user_id, key))
+            if stored is None:
+                return None
+            if stored.expires_at <= datetime.utcnow():
+                del self._recent[(user_id, key)]
+                return None
+            self._recent.move_to_end((user_id, key))
+            return stored
+
+    def _remember(self, user_id, key, stored):
+        with self._lock:
+            self._recent[(user_id, key)] = stored
+            self._recent.move_to_end((user_id, key))
+            while len(self._recent) > self.size:
+                self._recent.popitem(last=False)
+
+    def claim(self, user_id, key, fingerprint):
+        """
+        Claim the key in the current transaction. Returns None when claimed,
+        otherwise the StoredResponse of the request that holds it (with a
+        status_code of None while that one is still in flight).
+        An expired row, or an in-flight claim whose lease ran out, is taken
+        over as if it did not exist.
+        """
+        now = datetime.utcnow()
+        stmt = insert(IdempotencyKey).values(
+            user_id=user_id, key=key, fingerprint=fingerprint, expires_at=now + self.lease,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "key"],
+            set_={
+                "fingerprint": stmt.excluded.fingerprint,
+                "status_code": None,
+                "body": None,
+                "expires_at": stmt.excluded.expires_at,
+            },
+            where=IdempotencyKey.expires_at <= now,
+        ).returning(IdempotencyKey.user_id)
+        if db.session.execute(stmt).first() is not None:
+            return None
+
+        row = db.session.execute(
+            select(IdempotencyKey.fingerprint, IdempotencyKey.status_code,
+                   IdempotencyKey.body, IdempotencyKey.expires_at)
+            .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        ).first()
+        db.session.rollback()  # nothing was claimed; don't keep the row lock
+        stored = StoredResponse(*row)
+        if stored.status_code is not None:
+            self._remember(user_id, key, stored)
+        return stored
+
+    def save(self, user_id, key, fingerprint, response):
+        """
+        Store the response of a request whose claim has committed, and
+        commit. Anything the request left uncommitted is rolled back first.
+        """
+        db.session.rollback()
+        body = response.get_data()
+        expires_at = datetime.utcnow() + self.ttl
+        db.session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            .values(status_code=response.status_code, body=body, expires_at=expires_at)
+        )
+        now = time.monotonic()
+        if self._purged_at is None or now - self._purged_at >= PURGE_INTERVAL:
+            self._purged_at = now
+            db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.utcnow()))
+        db.session.commit()
+        self._remember(user_id, key, StoredResponse(fingerprint, response.status_code, body, expires_at))
+
+
+def get_idempotency_store():
+    store = current_app.extensions.get("idempotency_store")
+    if store is None:
+        store = current_app.extensions.setdefault(
+            "idempotency_store",
+            IdempotencyStore(
+                current_app.config.get("IDEMPOTENCY_TTL", 86400),
+                current_app.config.get("IDEMPOTENCY_CACHE_SIZE", 1024),
+                current_app.config.get("IDEMPOTENCY_LEASE", 60),
+            ),
+        )
+    return store
+
+
+def replay(stored, fingerprint):
+    if stored.fingerprint != fingerprint:
+        return jsonify(msg=f"{HEADER} was already used for a different request"), 422
+    if stored.status_code is None:
+        response = jsonify(msg="A request with this Idempotency-Key is still being processed")
+        response.status_code = 409
+        response.headers["Retry-After"] = "1"
+        return response
+    response = current_app.response_class(stored.body, status=stored.status_code, mimetype="application/json")
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(fn):
+    """
+    Lets clients safely retry a POST by sending an Idempotency-Key header:
+    the first request with a key runs the view, later ones with the same
+    key (per user, within IDEMPOTENCY_TTL) get its stored response back
+    without running it again. Reusing a key for a different request is a
+    422. A request that failed before committing anything leaves no trace,
+    so the key may be retried; once the view has committed, its outcome is
+    stored whatever it was, errors included, so the writes never run twice.
+    Requests without the header are unaffected.
+
+    Place it below @roles_required. The view must commit its own writes.
+    """
+
+    @wraps(fn)
+    def decorator(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return fn(*args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return jsonify(msg=f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters"), 400
+
+        user_id = current_principal().id
+        fingerprint = request_fingerprint()
+        store = get_idempotency_store()
+
+        stored = store.cached(user_id, key)
+        if stored is None:
+            stored = store.claim(user_id, key, fingerprint)
+        if stored is not None:
+            return replay(stored, fingerprint)
+
+        # Whether the view committed, taking the claim with its writes
+        committed = []
+        session = db.session()
+
+        def claim_committed(_session):
+            committed.append(True)
+
+        event.listen(session, "after_commit", claim_committed)
+        try:
+            response = make_response(fn(*args, **kwargs))
+        except Exception as error:
+            if not committed:
+                db.session.rollback()  # the claim goes with the view's writes
+                raise
+            # Handled errors (aborts, 409s) become the stored outcome as they are
+            try:
+                response = make_response(current_app.handle_user_exception(error))
+            except Exception:
+                # Unhandled: store a 500, so a retry is answered rather than run again
+                failed = jsonify(msg="Internal server error")
+                failed.status_code = 500
+                store.save(user_id, key, fingerprint, failed)
+                raise
+        finally:
+            event.remove(session, "after_commit", claim_committed)
+
+        if committed:
+            store.save(user_id, key, fingerprint, response)
+        else:
+            db.session.rollback()
+        return response
+
+    return decorator
@@ -0,0 +1,56 @@
+# app/utils/json_provider.py
+
+from datetime import date
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; the stdlib provider below is used instead
+    orjson = None
+
+
+class JSONProvider(DefaultJSONProvider):
+    """
+    Stdlib json provider with the API's value conventions: Decimal as a
+    number and datetimes as ISO 8601 (Flask's default would emit strings
+    and RFC 822 dates respectively).
+    """
+
+    sort_keys = False
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Decimal):
+            return float(o)
+        if isinstance(o, date):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    orjson-backed provider. datetimes, dates, UUIDs and dataclasses are
+    encoded natively in C; only Decimal goes through `default`. Responses
+    are built straight from the encoded bytes.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default) + b"\n", mimetype=self.mimetype
+        )
+
+
+def init_json(app):
+    """Install the provider named by JSON_PROVIDER ("orjson" or "json")."""
+    if app.config.get("JSON_PROVIDER", "orjson") == "orjson" and orjson is not None:
+        app.json = OrjsonProvider(app)
+    else:
+        app.json = JSONProvider(app)
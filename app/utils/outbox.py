@@ -0,0 +1,63 @@
+# app/utils/outbox.py
+
+from datetime import datetime, timedelta
+import click
+from flask.cli import AppGroup
+from sqlalchemy import select, delete, func, tuple_
+from app.extensions import db
+from app.models.models import ChangeRecord
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.serializers import Schema
+
+CHANGE_FIELDS = ("id", "txid", "table_name", "row_id", "op", "columns", "created_at")
+CHANGE_SCHEMA = Schema(*CHANGE_FIELDS)
+CHANGE_CURSOR_COLUMNS = (ChangeRecord.txid, ChangeRecord.id)
+
+
+def read_changes(cursor=None, limit=1000, tables=None):
+    """
+    Change records after `cursor` (None: from the start), oldest first.
+    Returns (records, next_cursor); pass next_cursor to the next call. It
+    equals `cursor` when there is nothing new.
+
+    Records are ordered by the writing transaction's id, then by id, and
+    only transactions older than every one still in progress are read. A
+    transaction that commits later therefore always sorts after the
+    cursor, so no record is ever skipped. A long-running transaction
+    holds readers back until it ends. `tables` restricts the result to
+    the named tables.
+    """
+    stmt = (
+        select(*[getattr(ChangeRecord, f) for f in CHANGE_FIELDS])
+        .where(ChangeRecord.txid < func.txid_snapshot_xmin(func.txid_current_snapshot()))
+        .order_by(*CHANGE_CURSOR_COLUMNS)
+        .limit(limit)
+    )
+    if cursor:
+        stmt = stmt.where(tuple_(*CHANGE_CURSOR_COLUMNS) > tuple_(*decode_cursor(cursor, CHANGE_CURSOR_COLUMNS)))
+    if tables:
+        stmt = stmt.where(ChangeRecord.table_name.in_(tables))
+
+    records = db.session.execute(stmt).all()
+    if not records:
+        return [], cursor
+    return records, encode_cursor([records[-1].txid, records[-1].id])
+
+
+def prune_changes(before):
+    """Delete change records written before `before`; returns how many. Commits."""
+    deleted = db.session.execute(delete(ChangeRecord).where(ChangeRecord.created_at < before)).rowcount
+    db.session.commit()
+    return deleted
+
+
+outbox_cli = AppGroup("outbox", help="Maintain the change outbox.")
+
+
+@outbox_cli.command("prune")
+@click.option("--days", type=int, default=7, show_default=True,
+              help="Keep change records from the last DAYS days.")
+def prune_command(days):
+    """Delete change records older than --days."""
+    deleted = prune_changes(datetime.utcnow() - timedelta(days=days))
+    click.echo(f"Deleted {deleted} change records")
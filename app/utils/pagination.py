@@ -0,0 +1,143 @@
+# app/utils/pagination.py
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from urllib.parse import urlencode
+from flask import request, jsonify, abort, current_app
+from sqlalchemy import select, tuple_
+from app.extensions import db
+
+
+def encode_cursor(values):
+    """Encode the sort-key values of the last row into an opaque cursor token."""
+    payload = [
+        v.isoformat() if isinstance(v, datetime) else str(v) if isinstance(v, Decimal) else v
+        for v in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def cursor_value(value, python_type):
+    """Check or convert one decoded cursor value to its column's Python type."""
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is Decimal:
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise TypeError("cursor value is not a number")
+        return Decimal(str(value))
+    if python_type is int and isinstance(value, bool):
+        raise TypeError("cursor value is not an integer")
+    if python_type is float and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    if not isinstance(value, python_type):
+        raise TypeError(f"cursor value is not {python_type.__name__}")
+    return value
+
+
+def decode_cursor(token, key_columns):
+    """
+    Decode a cursor token back into sort-key values, each checked against
+    its column's Python type, so a tampered cursor is a 400 rather than a
+    database error. Values that are not column values (versions, hashes)
+    are given as plain Python types in `key_columns` instead.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(key_columns):
+            raise ValueError("cursor length mismatch")
+        return [
+            cursor_value(v, col if isinstance(col, type) else col.type.python_type)
+            for v, col in zip(values, key_columns)
+        ]
+    except (binascii.Error, ValueError, TypeError, InvalidOperation):
+        abort(400, description="Invalid cursor")
+
+
+def page_limit():
+    """Read ?limit=, falling back to DEFAULT_PAGE_SIZE and capped at MAX_PAGE_SIZE."""
+    limit = request.args.get("limit", type=int)
+    if limit is None:
+        if "limit" in request.args:
+            abort(400, description="limit must be a positive integer")
+        limit = current_app.config["DEFAULT_PAGE_SIZE"]
+    if limit <= 0:
+        abort(400, description="limit must be a positive integer")
+    return min(limit, current_app.config["MAX_PAGE_SIZE"])
+
+
+def requested_fields(allowed):
+    """
+    Parse ?fields=a,b,c against the allowed field names.
+    Returns every allowed field when the parameter is absent.
+    """
+    raw = request.args.get("fields")
+    if not raw:
+        return list(allowed)
+    fields = [f.strip() for f in raw.split(",") if f.strip()]
+    unknown = sorted(set(fields) - set(allowed))
+    if unknown or not fields:
+        abort(400, description=f"Unknown fields: {unknown}. Allowed: {list(allowed)}")
+    return fields
+
+
+def paginate(model, fields, *criteria, key=("id",)):
+    """
+    Run a keyset-paginated SELECT of only the given columns of `model`.
+
+    Rows are ordered by the `key` columns and the ?cursor= token resumes
+    strictly after the last row of the previous page, so every page is an
+    index range scan no matter how deep the client has paged.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    key_columns = [getattr(model, k) for k in key]
+    names = list(dict.fromkeys([*fields, *key]))
+    stmt = select(*[getattr(model, n) for n in names]).where(*criteria)
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        after = decode_cursor(cursor, key_columns)
+        stmt = stmt.where(tuple_(*key_columns) > tuple_(*after))
+
+    limit = page_limit()
+    rows = db.session.execute(stmt.order_by(*key_columns).limit(limit + 1)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], k) for k in key])
+    return rows, next_cursor
+
+
+def paginate_rows(model, rows, key=("id",)):
+    """
+    In-memory counterpart of paginate() for rows already sorted by `key`,
+    e.g. served from a cache. Accepts and emits the same cursors.
+    """
+    key_columns = [getattr(model, k) for k in key]
+    cursor = request.args.get("cursor")
+    if cursor:
+        after = tuple(decode_cursor(cursor, key_columns))
+        rows = [r for r in rows if tuple(getattr(r, k) for k in key) > after]
+
+    limit = page_limit()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], k) for k in key])
+    return rows, next_cursor
+
+
+def page_response(payload, next_cursor):
+    """JSON list response carrying the next cursor in X-Next-Cursor / Link headers."""
+    response = jsonify(payload)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+        args = request.args.to_dict()
+        args["cursor"] = next_cursor
+        response.headers["Link"] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
@@ -0,0 +1,132 @@
+# app/utils/pubsub.py
+
+import json
+import logging
+import queue
+import select
+import threading
+import time
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription(queue.Queue):
+    """A subscriber's queue; `overflowed` is set once a message had to be dropped."""
+
+    def __init__(self, maxsize):
+        super().__init__(maxsize=maxsize)
+        self.overflowed = False
+
+
+class LocalBroker:
+    """
+    In-process fan-out: every subscriber of a topic gets its own queue.
+    Used directly in tests and single-process deployments, and as the
+    delivery layer behind PostgresBroker.
+    """
+
+    def __init__(self, max_queue=1000):
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscribers = {}  # topic -> set of queues
+
+    def start(self, engine):
+        """Nothing to connect for the in-process broker."""
+
+    def subscribe(self, topic):
+        q = Subscription(self.max_queue)
+        with self._lock:
+            self._subscribers.setdefault(topic, set()).add(q)
+        return q
+
+    def unsubscribe(self, topic, q):
+        with self._lock:
+            self._subscribers.get(topic, set()).discard(q)
+
+    def _deliver(self, topic, message):
+        with self._lock:
+            targets = list(self._subscribers.get(topic, ()))
+        for q in targets:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                # A stalled client must not block publishers. Its reader sees
+                # the flag and closes the stream, so the client reconnects and
+                # replays from Last-Event-ID.
+                q.overflowed = True
+                logger.warning("Dropping message for slow subscriber on %s", topic)
+
+    def publish(self, topic, messages, engine=None):
+        for message in messages:
+            self._deliver(topic, message)
+
+
+class PostgresBroker(LocalBroker):
+    """
+    Cross-process pub/sub over Postgres LISTEN/NOTIFY.
+
+    Every worker keeps one dedicated connection LISTENing on `channel` and
+    fans notifications out to its local subscribers, so each worker holds a
+    single extra connection no matter how many clients are streaming.
+    """
+
+    def __init__(self, channel, max_queue=1000):
+        super().__init__(max_queue)
+        self.channel = channel
+        self._listener = None
+        self._engine = None
+
+    def publish(self, topic, messages, engine=None):
+        payloads = [json.dumps({"topic": topic, "message": m}) for m in messages]
+        with engine.connect() as conn:
+            for payload in payloads:
+                conn.execute(text("SELECT pg_notify(:channel, :payload)"),
+                             {"channel": self.channel, "payload": payload})
+            conn.commit()
+
+    def start(self, engine):
+        """Start the listener thread once; subsequent calls are no-ops."""
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._engine = engine
+            self._listener = threading.Thread(target=self._listen_forever, name="pg-listen", daemon=True)
+            self._listener.start()
+
+    def _listen_forever(self):
+        while True:
+            try:
+                self._listen()
+            except Exception:
+                logger.exception("LISTEN connection lost; reconnecting")
+                time.sleep(1)
+
+    def _listen(self):
+        # Detach a connection from the pool so it never counts against it
+        pooled = self._engine.raw_connection()
+        pooled.detach()
+        conn = pooled.dbapi_connection
+        conn.autocommit = True
+        try:
+            conn.cursor().execute(f'LISTEN "{self.channel}"')
+            while True:
+                if select.select([conn], [], [], 5) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    event = json.loads(notify.payload)
+                    self._deliver(event["topic"], event["message"])
+        finally:
+            conn.close()
+
+
+def init_broker(app):
+    """Attach the broker selected by PUBSUB_BACKEND ("postgres" or "memory")."""
+    if app.config.get("PUBSUB_BACKEND", "postgres") == "memory":
+        broker = LocalBroker()
+    else:
+        broker = PostgresBroker(app.config.get("PUBSUB_CHANNEL", "trustnet_events"))
+    app.extensions["broker"] = broker
+    return broker
@@ -0,0 +1,60 @@
+# app/utils/replica.py
+
+import threading
+import time
+from flask import request, current_app
+from flask_jwt_extended import get_jwt_identity
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class WriteTracker:
+    """
+    Remembers when each user last wrote, so their reads can stick to the
+    primary until the replica has caught up (read-your-writes). Kept per
+    worker process: a user whose next read lands on another worker may
+    briefly see replica lag.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._last_write = {}
+
+    def record(self, identity):
+        now = time.monotonic()
+        with self._lock:
+            self._last_write[identity] = now
+            if len(self._last_write) > self.max_entries:
+                # Forget the oldest half; those windows have long expired
+                keep = sorted(self._last_write.items(), key=lambda kv: kv[1])[len(self._last_write) // 2:]
+                self._last_write = dict(keep)
+
+    def wrote_recently(self, identity, window):
+        last = self._last_write.get(identity)
+        return last is not None and time.monotonic() - last < window
+
+
+def should_use_replica():
+    """True unless the current user wrote within REPLICA_STICKY_SECONDS."""
+    if not current_app.config.get("SQLALCHEMY_REPLICA_URI"):
+        return False
+    tracker = current_app.extensions["write_tracker"]
+    window = current_app.config.get("REPLICA_STICKY_SECONDS", 5)
+    return not tracker.wrote_recently(get_jwt_identity(), window)
+
+
+def init_replica(app):
+    tracker = WriteTracker()
+    app.extensions["write_tracker"] = tracker
+
+    @app.after_request
+    def remember_writes(response):
+        if request.method in WRITE_METHODS and response.status_code < 400:
+            try:
+                identity = get_jwt_identity()
+            except RuntimeError:  # endpoint without JWT
+                identity = None
+            if identity is not None:
+                tracker.record(identity)
+        return response
@@ -0,0 +1,101 @@
+# app/utils/revocation.py
+
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert
+from app.extensions import db
+from app.models.models import RevokedToken
+
+# Re-read rows revoked this long before the newest one already seen, so a
+# revocation whose transaction committed late is still picked up
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+class RevocationList:
+    """
+    Per-process copy of the unexpired revoked token ids (jti).
+
+    The full list is loaded once; afterwards at most one query every
+    `interval` seconds fetches only the rows revoked since the last one
+    seen. Checking a token is then a set lookup. Revocations made in this
+    process are visible at once, those made by other workers within
+    `interval`. Entries are dropped when their token would have expired
+    anyway, which keeps the set as small as the number of live revoked
+    tokens.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._revoked = {}  # jti -> expires_at
+        self._watermark = None  # newest revoked_at seen
+        self._checked_at = None
+
+    def _refresh(self):
+        stmt = select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at).where(
+            RevokedToken.expires_at > datetime.utcnow()
+        )
+        if self._watermark is not None:
+            stmt = stmt.where(RevokedToken.revoked_at > self._watermark - REFRESH_OVERLAP)
+        # Straight on the primary: the caller may be a replica-routed view
+        with db.engine.connect() as conn:
+            rows = conn.execute(stmt).all()
+
+        now = datetime.utcnow()
+        for jti, expires_at, revoked_at in rows:
+            self._revoked[jti] = expires_at
+            if self._watermark is None or revoked_at > self._watermark:
+                self._watermark = revoked_at
+        for jti in [jti for jti, expires_at in self._revoked.items() if expires_at <= now]:
+            del self._revoked[jti]
+        if self._watermark is None:
+            self._watermark = datetime.min + REFRESH_OVERLAP
+
+    def is_revoked(self, jti):
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.interval:
+            with self._lock:
+                if self._checked_at is None or now - self._checked_at >= self.interval:
+                    self._refresh()
+                    self._checked_at = now
+        return jti in self._revoked
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._revoked[jti] = expires_at
+
+
+def get_revocation_list():
+    revocations = current_app.extensions.get("revocation_list")
+    if revocations is None:
+        revocations = current_app.extensions.setdefault(
+            "revocation_list",
+            RevocationList(current_app.config.get("REVOCATION_REFRESH_INTERVAL", 1.0)),
+        )
+    return revocations
+
+
+def is_token_revoked(jwt_payload):
+    return get_revocation_list().is_revoked(jwt_payload["jti"])
+
+
+def revoke_token(jwt_payload):
+    """
+    Record a token as revoked until it expires, and purge revocations of
+    tokens that have expired since. Commits the current session.
+    """
+    jti = jwt_payload["jti"]
+    expires_at = datetime.utcfromtimestamp(jwt_payload["exp"])
+    user_id = int(jwt_payload["sub"])
+
+    db.session.execute(
+        insert(RevokedToken)
+        .values(jti=jti, user_id=user_id, expires_at=expires_at)
+        .on_conflict_do_nothing(index_elements=["jti"])
+    )
+    db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+    db.session.commit()
+    get_revocation_list().add(jti, expires_at)
@@ -1,7 +1,94 @@
-from passlib.hash import bcrypt
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HashPoolBusy(Exception):
+    """Raised when too many password hashes are already queued in this process."""
+
+
+def _method(method=None):
+    return method or current_app.config.get("PASSWORD_HASH_METHOD", "scrypt")
+
+
+@lru_cache(maxsize=8)
+def _method_prefix(method):
+    """Fully parameterised method string werkzeug stores for `method`, e.g. 'scrypt:32768:8:1'."""
+    return generate_password_hash("", method=method, salt_length=1).split("$", 1)[0]
+
+
+def hash_password(password: str, method: str = None) -> str:
+    """Hash with PASSWORD_HASH_METHOD (any werkzeug method string, e.g. 'pbkdf2:sha256:600000')."""
+    return generate_password_hash(password, method=_method(method))
 
-def hash_password(password: str) -> str:
-    return bcrypt.hash(password)
 
 def verify_password(password: str, password_hash: str) -> bool:
-    return bcrypt.verify(password, password_hash)
+    return check_password_hash(password_hash, password)
+
+
+def needs_rehash(password_hash: str, method: str = None) -> bool:
+    """True when the hash was made with other parameters than the configured ones."""
+    return password_hash.split("$", 1)[0] != _method_prefix(_method(method))
+
+
+def _executor(workers):
+    """
+    A pool of real OS threads. Under gevent's monkey-patching (gunicorn's
+    gevent worker class) threading.Thread is a greenlet, so a stdlib pool
+    would run the hash on the event loop and stall every connection of
+    the worker; gevent's own executor keeps native threads and lets the
+    waiting greenlet yield.
+    """
+    if "gevent" in sys.modules:
+        from gevent import monkey
+        if monkey.is_module_patched("threading"):
+            from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+            return NativeThreadPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash")
+
+
+class PasswordHasher:
+    """
+    Runs hash work on a bounded pool of threads.
+
+    At most `workers` hashes run at once per process, so a login storm
+    cannot take every core, and at most `max_pending` more wait in line:
+    beyond that callers get HashPoolBusy straight away instead of tying
+    up a request thread or greenlet. hashlib's scrypt/pbkdf2 release the
+    GIL, so other requests keep being served while a hash runs.
+    """
+
+    def __init__(self, workers=2, max_pending=32):
+        self._executor = _executor(workers)
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashPoolBusy()
+        future = self._executor.submit(fn, *args)
+        # Free the slot when the work finishes, not when the caller stops waiting
+        future.add_done_callback(lambda f: self._slots.release())
+        return future
+
+    def verify(self, password, password_hash, timeout=None):
+        return self._submit(verify_password, password, password_hash).result(timeout)
+
+    def hash(self, password, method, timeout=None):
+        return self._submit(generate_password_hash, password, method).result(timeout)
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Per-app hasher sized by PASSWORD_HASH_WORKERS / PASSWORD_HASH_MAX_PENDING."""
+    hasher = current_app.extensions.get("password_hasher")
+    if hasher is None:
+        hasher = current_app.extensions.setdefault(
+            "password_hasher",
+            PasswordHasher(
+                current_app.config.get("PASSWORD_HASH_WORKERS", 2),
+                current_app.config.get("PASSWORD_HASH_MAX_PENDING", 32),
+            ),
+        )
+    return hasher
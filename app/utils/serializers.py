@@ -0,0 +1,40 @@
+# app/utils/serializers.py
+
+from operator import attrgetter
+
+
+class Schema:
+    """
+    Declarative serializer: maps objects to dicts of the listed attributes.
+
+    Works on ORM instances and projected rows alike. Values are passed
+    through untouched (Decimal, datetime, ...); turning them into JSON is
+    the app's JSON provider's job, so each value is converted exactly once,
+    while encoding.
+
+        TABLE_SCHEMA = Schema("id", "number", "status", "is_vip")
+        TABLE_SCHEMA.dump(table)                 # every field
+        TABLE_SCHEMA.dump(row, ("id", "number"))  # a ?fields= projection
+    """
+
+    def __init__(self, *fields):
+        self.fields = fields
+        self._getters = {}
+
+    def _getter(self, fields):
+        getter = self._getters.get(fields)
+        if getter is None:
+            get = attrgetter(*fields)
+            # attrgetter returns a bare value, not a 1-tuple, for a single name
+            getter = get if len(fields) > 1 else (lambda obj: (get(obj),))
+            self._getters[fields] = getter
+        return getter
+
+    def dump(self, obj, fields=None):
+        fields = tuple(fields) if fields is not None else self.fields
+        return dict(zip(fields, self._getter(fields)(obj)))
+
+    def dump_many(self, objs, fields=None):
+        fields = tuple(fields) if fields is not None else self.fields
+        getter = self._getter(fields)
+        return [dict(zip(fields, getter(obj))) for obj in objs]
@@ -0,0 +1,88 @@
+# benchmarks/bench_export.py
+"""
+Peak Python memory and throughput of GET /orders/export as the export grows.
+
+    python benchmarks/bench_export.py --orders 20000 200000
+
+Seeds the given numbers of orders (two items each) with generate_series in
+the database configured through the usual DB_* environment variables,
+consumes the streamed export for each size and reports the tracemalloc
+peak. Peak memory should stay flat while the row count grows. Seeded rows
+are deleted afterwards.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.models.models import User, Table, MenuItem  # noqa: E402
+
+SEED = """
+WITH o AS (
+    INSERT INTO orders (table_id, user_id, status, total_amount, created_at, updated_at)
+    SELECT :table_id, :user_id, 'paid', 25, now() - (n || ' seconds')::interval, now()
+    FROM generate_series(1, :count) AS n
+    RETURNING id
+)
+INSERT INTO order_items (order_id, menu_item_id, quantity, price, status, station, created_at, updated_at)
+SELECT o.id, :menu_item_id, 1, 12.50, 'ready', 'kitchen', now(), now()
+FROM o, generate_series(1, 2)
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--config", default="testing")
+    parser.add_argument("--orders", nargs="+", type=int, default=[20000, 200000])
+    parser.add_argument("--format", default="ndjson", choices=["ndjson", "csv"])
+    args = parser.parse_args()
+
+    app = create_app(args.config)
+    with app.app_context():
+        db.create_all()
+        user = User(name="Bench", username="bench_export", password_hash="-", role="admin")
+        table = Table(number="BX")
+        item = MenuItem(name="Bench dish", category="food", price=12.5)
+        db.session.add_all([user, table, item])
+        db.session.commit()
+        ids = {"user_id": user.id, "table_id": table.id, "menu_item_id": item.id}
+        headers = {"Authorization": f"Bearer {create_access_token(identity=str(user.id), additional_claims={'role': 'admin'})}"}
+
+    client = app.test_client()
+    seeded = 0
+    print(f"{'orders':>8}{'seconds':>9}{'orders/s':>10}{'MB out':>8}{'peak MB':>9}")
+    try:
+        for count in sorted(args.orders):
+            with app.app_context():
+                db.session.execute(text(SEED), {**ids, "count": count - seeded})
+                db.session.commit()
+            seeded = count
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            res = client.get(f"/orders/export?format={args.format}", headers=headers, buffered=False)
+            size = sum(len(chunk) for chunk in res.response)
+            res.close()
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{count:>8}{elapsed:>9.2f}{count / elapsed:>10.0f}{size / 1e6:>8.1f}{peak / 1e6:>9.1f}")
+    finally:
+        with app.app_context():
+            db.session.execute(text("DELETE FROM order_items WHERE menu_item_id = :id"), {"id": ids["menu_item_id"]})
+            db.session.execute(text("DELETE FROM orders WHERE user_id = :id"), {"id": ids["user_id"]})
+            db.session.execute(text("DELETE FROM menu_items WHERE id = :id"), {"id": ids["menu_item_id"]})
+            db.session.execute(text("DELETE FROM tables WHERE id = :id"), {"id": ids["table_id"]})
+            db.session.execute(text("DELETE FROM users WHERE id = :id"), {"id": ids["user_id"]})
+            db.session.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# benchmarks/bench_json.py
+"""
+Serialization cost of a 5,000-order GET /orders/ payload.
+
+    python benchmarks/bench_json.py
+    python benchmarks/bench_json.py --orders 5000 --items 3 --repeat 5
+
+Builds projected order/item rows in memory (no database needed) and times
+turning them into a JSON response body three ways:
+
+  legacy    hand-written *_to_dict builders (float()/isoformat() per field)
+            encoded by Flask's default provider
+  schema    Schema serializers encoded by the stdlib JSONProvider
+  orjson    Schema serializers encoded by the OrjsonProvider
+"""
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+from app.utils.json_provider import JSONProvider, OrjsonProvider  # noqa: E402
+from app.routes.orders.order import ORDER_SCHEMA, ORDER_ITEM_SCHEMA  # noqa: E402
+
+OrderRow = namedtuple("OrderRow", ORDER_SCHEMA.fields)
+ItemRow = namedtuple("ItemRow", ORDER_ITEM_SCHEMA.fields)
+
+
+def build_rows(orders, items_per_order):
+    start = datetime(2026, 10, 18, 11, 0, 0)
+    rows = []
+    for o in range(1, orders + 1):
+        at = start + timedelta(seconds=o, microseconds=o)
+        items = [
+            ItemRow(o * 10 + i, o, i + 1, 1 + i % 3, Decimal("12.50"), None, f"{o % 9999:04d}",
+                    "pending", "kitchen", at, at)
+            for i in range(items_per_order)
+        ]
+        rows.append((OrderRow(o, o % 40 + 1, o % 12 + 1, "open", Decimal("37.50"), at, at), items))
+    return rows
+
+
+# The builders the routes used before the Schema serializers
+def legacy_item(item):
+    return {
+        "id": item.id,
+        "order_id": item.order_id,
+        "menu_item_id": item.menu_item_id,
+        "quantity": item.quantity,
+        "price": float(item.price),
+        "notes": item.notes,
+        "prep_tag": item.prep_tag,
+        "status": item.status,
+        "station": item.station,
+        "created_at": item.created_at.isoformat() if item.created_at else None,
+        "updated_at": item.updated_at.isoformat() if item.updated_at else None,
+    }
+
+
+def legacy_order(order, items):
+    return {
+        "id": order.id,
+        "table_id": order.table_id,
+        "user_id": order.user_id,
+        "status": order.status,
+        "total_amount": float(order.total_amount or 0),
+        "created_at": order.created_at.isoformat() if order.created_at else None,
+        "updated_at": order.updated_at.isoformat() if order.updated_at else None,
+        "items": [legacy_item(i) for i in items],
+    }
+
+
+def schema_orders(rows):
+    payload = ORDER_SCHEMA.dump_many([order for order, _ in rows])
+    for data, (_, items) in zip(payload, rows):
+        data["items"] = ORDER_ITEM_SCHEMA.dump_many(items)
+    return payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--items", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = build_rows(args.orders, args.items)
+    app = Flask(__name__)
+    variants = {
+        "legacy": (DefaultJSONProvider(app), lambda: [legacy_order(o, i) for o, i in rows]),
+        "schema": (JSONProvider(app), lambda: schema_orders(rows)),
+        "orjson": (OrjsonProvider(app), lambda: schema_orders(rows)),
+    }
+
+    print(f"{args.orders} orders x {args.items} items, best of {args.repeat}")
+    print(f"{'variant':<10}{'build ms':>10}{'encode ms':>11}{'total ms':>10}{'bytes':>10}")
+    with app.app_context():
+        for name, (provider, build) in variants.items():
+            best = None
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                payload = build()
+                t1 = time.perf_counter()
+                body = provider.response(payload).get_data()
+                t2 = time.perf_counter()
+                if best is None or t2 - t0 < best[0] + best[1]:
+                    best = (t1 - t0, t2 - t1, len(body))
+            build_s, encode_s, size = best
+            print(f"{name:<10}{build_s * 1000:>10.1f}{encode_s * 1000:>11.1f}{(build_s + encode_s) * 1000:>10.1f}{size:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_login.py
+"""
+Logins/sec for each password hash method and client concurrency.
+
+    python benchmarks/bench_login.py
+    python benchmarks/bench_login.py --methods scrypt pbkdf2:sha256:600000 --concurrency 1 8 32
+
+Creates one user per method in the database configured through the usual
+DB_* environment variables, drives POST /auth/login through the test
+client from --concurrency threads and prints throughput plus how many
+requests were shed with 503 by the bounded hashing pool.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import create_app, db  # noqa: E402
+from app.models.models import User  # noqa: E402
+from app.utils.security import hash_password  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--config", default="testing")
+    parser.add_argument("--methods", nargs="+", default=["scrypt", "pbkdf2:sha256:600000", "pbkdf2:sha256:100000"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=64)
+    args = parser.parse_args()
+
+    app = create_app(args.config)
+    with app.app_context():
+        db.create_all()
+        for i, method in enumerate(args.methods):
+            username = f"bench_login_{i}"
+            User.query.filter_by(username=username).delete()
+            db.session.add(User(name=method, username=username, role="waiter",
+                                password_hash=hash_password("benchpass", method)))
+        db.session.commit()
+
+    print(f"{'method':<24}{'clients':>8}{'logins/s':>10}{'503s':>6}")
+    try:
+        for i, method in enumerate(args.methods):
+            # Keep the stored hash's method so logins don't trigger an upgrade
+            app.config["PASSWORD_HASH_METHOD"] = method
+            body = {"username": f"bench_login_{i}", "password": "benchpass"}
+
+            def login(_):
+                with app.test_client() as client:
+                    return client.post("/auth/login", json=body).status_code
+
+            for clients in args.concurrency:
+                start = time.perf_counter()
+                with ThreadPoolExecutor(clients) as pool:
+                    codes = list(pool.map(login, range(args.requests)))
+                elapsed = time.perf_counter() - start
+                print(f"{method:<24}{clients:>8}{codes.count(200) / elapsed:>10.1f}{codes.count(503):>6}")
+    finally:
+        with app.app_context():
+            User.query.filter(User.username.like("bench_login_%")).delete(synchronize_session=False)
+            db.session.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# benchmarks/bench_serving.py
+"""
+Requests/sec of the read-heavy endpoints under each serving mode.
+
+    python benchmarks/bench_serving.py --seed
+    python benchmarks/bench_serving.py --modes werkzeug gthread gevent --concurrency 64
+
+Starts the app on a local port in each mode (Werkzeug dev server as in
+run.py, gunicorn gthread, gunicorn gevent), fires --requests GETs from
+--concurrency client threads per path and prints throughput. Uses the
+database configured through the usual DB_* environment variables.
+"""
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.models.models import User, Table, MenuItem, Order, OrderItem  # noqa: E402
+
+PORT = 8765
+
+
+def server_command(mode, workers):
+    if mode == "werkzeug":
+        code = "from wsgi import app; app.run(port=%d, threaded=True)" % PORT
+        return [sys.executable, "-c", code]
+    return [
+        sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+        "--bind", f"127.0.0.1:{PORT}", "--workers", str(workers),
+        "--worker-class", mode, "--access-logfile", "/dev/null", "wsgi:app",
+    ]
+
+
+def seed(orders=500, items_per_order=4):
+    user = User(name="Bench", username=f"bench{time.time_ns()}", password_hash="x", role="admin")
+    table = Table(number=f"B{time.time_ns() % 10**8}")
+    db.session.add_all([user, table])
+    menu = [MenuItem(name=f"Bench dish {n}", category="food", price=5 + n, is_available=True) for n in range(40)]
+    db.session.add_all(menu)
+    db.session.flush()
+    for n in range(orders):
+        order = Order(table_id=table.id, user_id=user.id, status="open", total_amount=0)
+        db.session.add(order)
+        db.session.flush()
+        db.session.add_all([
+            OrderItem(order_id=order.id, menu_item_id=menu[(n + k) % 40].id, quantity=1,
+                      price=menu[(n + k) % 40].price, station="kitchen")
+            for k in range(items_per_order)
+        ])
+    db.session.commit()
+
+
+def wait_ready(timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=1)
+            conn.request("GET", "/")
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def hammer(path, token, total, concurrency):
+    per_client = total // concurrency
+
+    def client(_):
+        conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=30)
+        errors = 0
+        for _ in range(per_client):
+            conn.request("GET", path, headers={"Authorization": f"Bearer {token}"})
+            response = conn.getresponse()
+            response.read()
+            errors += response.status != 200
+        return errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        errors = sum(pool.map(client, range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return per_client * concurrency / elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["werkzeug", "gthread", "gevent"])
+    parser.add_argument("--paths", nargs="+", default=["/menu-items/", "/orders/?limit=100"])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", action="store_true", help="insert sample menu items and orders first")
+    args = parser.parse_args()
+
+    app = create_app(os.environ.get("FLASK_CONFIG", "production"))
+    with app.app_context():
+        db.create_all()
+        if args.seed:
+            seed()
+        token = create_access_token(identity="1", additional_claims={"role": "admin"})
+
+    print(f"{'mode':<10} {'path':<22} {'req/s':>10} {'errors':>7}")
+    for mode in args.modes:
+        server = subprocess.Popen(server_command(mode, args.workers), cwd=ROOT,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_ready()
+            for path in args.paths:
+                hammer(path, token, args.concurrency * 5, args.concurrency)  # warm up
+                rate, errors = hammer(path, token, args.requests, args.concurrency)
+                print(f"{mode:<10} {path:<22} {rate:>10.0f} {errors:>7}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
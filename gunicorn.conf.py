@@ -0,0 +1,45 @@
+# gunicorn.conf.py
+# Worker/concurrency settings for `gunicorn -c gunicorn.conf.py wsgi:app`.
+# Every value can be overridden through the environment.
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+
+# "gthread": N threads per worker, each request holds a thread (and at most
+#            one connection from the request pool) for its whole duration.
+#            Kitchen tags come from a separate KITCHEN_TAG_POOL_SIZE pool.
+# "gevent":  cooperative greenlets; psycopg2 is made gevent-aware in
+#            post_fork, so thousands of requests that wait on the database,
+#            and long-lived /stations/<station>/feed streams, share one
+#            process. Needs `pip install gevent psycogreen`.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+
+# Processes: one per core for CPU-bound work (password hashing, JSON).
+# Each worker has its own DB pools, so workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW
+# + KITCHEN_TAG_POOL_SIZE), plus one LISTEN connection each, must fit under
+# Postgres max_connections (or PgBouncer's pool).
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+
+# gthread only. Keep threads <= DB_POOL_SIZE + DB_MAX_OVERFLOW, or requests
+# will queue on the connection pool (each holds at most one of those).
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+
+# gevent only: concurrent greenlets per worker
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 500))
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 5000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 500))
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-")
+
+
+def post_fork(server, worker):
+    if worker_class == "gevent":
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
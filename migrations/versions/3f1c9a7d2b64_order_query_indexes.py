@@ -0,0 +1,44 @@
+"""Order Query Indexes
+
+Revision ID: 3f1c9a7d2b64
+Revises: 949ed7e6e4df
+Create Date: 2026-10-17 09:12:44.318205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c9a7d2b64'
+down_revision = '949ed7e6e4df'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.create_index('ix_orders_table_id_status', ['table_id', 'status'], unique=False)
+        batch_op.create_index('ix_orders_status_created_at', ['status', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_orders_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_orders_unpaid_created_at', ['created_at', 'id'], unique=False,
+                              postgresql_where=sa.text("status <> 'paid'"))
+
+    with op.batch_alter_table('order_items', schema=None) as batch_op:
+        batch_op.create_index('ix_order_items_order_id', ['order_id', 'id'], unique=False)
+        batch_op.create_index('ix_order_items_station_status', ['station', 'status', 'created_at'], unique=False)
+        batch_op.create_index('ix_order_items_pending_station', ['station', 'created_at'], unique=False,
+                              postgresql_where=sa.text("status = 'pending'"))
+
+
+def downgrade():
+    with op.batch_alter_table('order_items', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_items_pending_station')
+        batch_op.drop_index('ix_order_items_station_status')
+        batch_op.drop_index('ix_order_items_order_id')
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index('ix_orders_unpaid_created_at')
+        batch_op.drop_index('ix_orders_created_at_id')
+        batch_op.drop_index('ix_orders_status_created_at')
+        batch_op.drop_index('ix_orders_table_id_status')
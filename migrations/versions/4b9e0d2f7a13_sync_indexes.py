@@ -0,0 +1,31 @@
+"""Sync Indexes
+
+Revision ID: 4b9e0d2f7a13
+Revises: d58f2a0c6e19
+Create Date: 2026-10-18 18:02:17.446031
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '4b9e0d2f7a13'
+down_revision = 'd58f2a0c6e19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.create_index('ix_orders_updated_at', ['updated_at'], unique=False)
+
+    with op.batch_alter_table('order_items', schema=None) as batch_op:
+        batch_op.create_index('ix_order_items_updated_at', ['updated_at', 'order_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('order_items', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_items_updated_at')
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index('ix_orders_updated_at')
@@ -0,0 +1,90 @@
+"""Order Total Updated At
+
+Revision ID: 6f2b8c0d4e91
+Revises: a9d3e6f14b70
+Create Date: 2026-10-18 22:05:31.774210
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '6f2b8c0d4e91'
+down_revision = 'a9d3e6f14b70'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The total trigger now also bumps orders.updated_at, so changed-since
+    # readers (/sync) see total and version changes made by item writes
+    op.execute("""
+CREATE OR REPLACE FUNCTION order_items_maintain_total() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE orders o
+        SET total_amount = coalesce(o.total_amount, 0) + d.delta, version = o.version + 1,
+            updated_at = timezone('UTC', clock_timestamp())
+        FROM (SELECT order_id, sum(price * quantity) AS delta FROM new_items GROUP BY order_id) d
+        WHERE o.id = d.order_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE orders o
+        SET total_amount = coalesce(o.total_amount, 0) - d.delta, version = o.version + 1,
+            updated_at = timezone('UTC', clock_timestamp())
+        FROM (SELECT order_id, sum(price * quantity) AS delta FROM old_items GROUP BY order_id) d
+        WHERE o.id = d.order_id;
+    ELSE
+        UPDATE orders o
+        SET total_amount = coalesce(o.total_amount, 0) + d.delta, version = o.version + 1,
+            updated_at = timezone('UTC', clock_timestamp())
+        FROM (
+            SELECT order_id, sum(amount) AS delta FROM (
+                SELECT order_id, price * quantity AS amount FROM new_items
+                UNION ALL
+                SELECT order_id, -price * quantity FROM old_items
+            ) changes
+            GROUP BY order_id
+            HAVING sum(amount) <> 0
+        ) d
+        WHERE o.id = d.order_id;
+    END IF;
+    RETURN NULL;
+END
+$$
+    """)
+
+
+def downgrade():
+    op.execute("""
+CREATE OR REPLACE FUNCTION order_items_maintain_total() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE orders o
+        SET total_amount = coalesce(o.total_amount, 0) + d.delta, version = o.version + 1
+        FROM (SELECT order_id, sum(price * quantity) AS delta FROM new_items GROUP BY order_id) d
+        WHERE o.id = d.order_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE orders o
+        SET total_amount = coalesce(o.total_amount, 0) - d.delta, version = o.version + 1
+        FROM (SELECT order_id, sum(price * quantity) AS delta FROM old_items GROUP BY order_id) d
+        WHERE o.id = d.order_id;
+    ELSE
+        UPDATE orders o
+        SET total_amount = coalesce(o.total_amount, 0) + d.delta, version = o.version + 1
+        FROM (
+            SELECT order_id, sum(amount) AS delta FROM (
+                SELECT order_id, price * quantity AS amount FROM new_items
+                UNION ALL
+                SELECT order_id, -price * quantity FROM old_items
+            ) changes
+            GROUP BY order_id
+            HAVING sum(amount) <> 0
+        ) d
+        WHERE o.id = d.order_id;
+    END IF;
+    RETURN NULL;
+END
+$$
+    """)
@@ -0,0 +1,79 @@
+"""Derived Order Totals
+
+Revision ID: 7c1e58a9b4d2
+Revises: e93b1f5c2a70
+Create Date: 2026-10-18 16:20:54.318902
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e58a9b4d2'
+down_revision = 'e93b1f5c2a70'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+CREATE OR REPLACE FUNCTION order_items_maintain_total() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE orders o
+        SET total_amount = coalesce(o.total_amount, 0) + d.delta, version = o.version + 1
+        FROM (SELECT order_id, sum(price * quantity) AS delta FROM new_items GROUP BY order_id) d
+        WHERE o.id = d.order_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE orders o
+        SET total_amount = coalesce(o.total_amount, 0) - d.delta, version = o.version + 1
+        FROM (SELECT order_id, sum(price * quantity) AS delta FROM old_items GROUP BY order_id) d
+        WHERE o.id = d.order_id;
+    ELSE
+        UPDATE orders o
+        SET total_amount = coalesce(o.total_amount, 0) + d.delta, version = o.version + 1
+        FROM (
+            SELECT order_id, sum(amount) AS delta FROM (
+                SELECT order_id, price * quantity AS amount FROM new_items
+                UNION ALL
+                SELECT order_id, -price * quantity FROM old_items
+            ) changes
+            GROUP BY order_id
+            HAVING sum(amount) <> 0
+        ) d
+        WHERE o.id = d.order_id;
+    END IF;
+    RETURN NULL;
+END
+$$
+    """)
+    op.execute(
+        "CREATE TRIGGER order_items_total_insert AFTER INSERT ON order_items "
+        "REFERENCING NEW TABLE AS new_items FOR EACH STATEMENT "
+        "EXECUTE FUNCTION order_items_maintain_total()"
+    )
+    op.execute(
+        "CREATE TRIGGER order_items_total_update AFTER UPDATE ON order_items "
+        "REFERENCING OLD TABLE AS old_items NEW TABLE AS new_items FOR EACH STATEMENT "
+        "EXECUTE FUNCTION order_items_maintain_total()"
+    )
+    op.execute(
+        "CREATE TRIGGER order_items_total_delete AFTER DELETE ON order_items "
+        "REFERENCING OLD TABLE AS old_items FOR EACH STATEMENT "
+        "EXECUTE FUNCTION order_items_maintain_total()"
+    )
+    # Start from totals that match the items exactly
+    op.execute("""
+        UPDATE orders o
+        SET total_amount = coalesce(
+            (SELECT sum(oi.price * oi.quantity) FROM order_items oi WHERE oi.order_id = o.id), 0
+        )
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS order_items_total_delete ON order_items")
+    op.execute("DROP TRIGGER IF EXISTS order_items_total_update ON order_items")
+    op.execute("DROP TRIGGER IF EXISTS order_items_total_insert ON order_items")
+    op.execute("DROP FUNCTION IF EXISTS order_items_maintain_total()")
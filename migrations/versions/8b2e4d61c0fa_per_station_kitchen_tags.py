@@ -0,0 +1,35 @@
+"""Per Station Kitchen Tags
+
+Revision ID: 8b2e4d61c0fa
+Revises: 3f1c9a7d2b64
+Create Date: 2026-10-17 10:03:27.540912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4d61c0fa'
+down_revision = '3f1c9a7d2b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('kitchen_tag_counter', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('station', sa.String(length=20), nullable=False, server_default='kitchen'))
+        batch_op.drop_constraint('kitchen_tag_counter_date_key', type_='unique')
+        batch_op.create_unique_constraint('uq_kitchen_tag_counter_date_station', ['date', 'station'])
+
+
+def downgrade():
+    # Collapse per-station rows back into a single counter per day
+    op.execute(
+        "DELETE FROM kitchen_tag_counter a USING kitchen_tag_counter b "
+        "WHERE a.date = b.date AND (a.last_number, a.id) < (b.last_number, b.id)"
+    )
+    with op.batch_alter_table('kitchen_tag_counter', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_kitchen_tag_counter_date_station', type_='unique')
+        batch_op.create_unique_constraint('kitchen_tag_counter_date_key', ['date'])
+        batch_op.drop_column('station')
@@ -0,0 +1,50 @@
+"""Daily Sales Rollup
+
+Revision ID: a2d64f0b7e31
+Revises: 5e0a7c93d1b8
+Create Date: 2026-10-18 13:47:09.581226
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2d64f0b7e31'
+down_revision = '5e0a7c93d1b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_sales_rollup',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('menu_item_id', sa.Integer(), nullable=False),
+    sa.Column('station', sa.String(length=20), nullable=False),
+    sa.Column('waiter_id', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('item_count', sa.Integer(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('ticket_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'menu_item_id', 'station', 'waiter_id')
+    )
+    # Populate from existing history; afterwards paying orders keeps it current
+    # (`flask rollups backfill` rebuilds any range on demand)
+    op.execute("""
+        INSERT INTO daily_sales_rollup
+            (day, menu_item_id, station, waiter_id, revenue, item_count, order_count, ticket_count)
+        SELECT day, menu_item_id, station, waiter_id, sum(revenue), sum(item_count), count(*), sum(ticket)
+        FROM (
+            SELECT CAST(o.created_at AS DATE) AS day, oi.menu_item_id, oi.station, o.user_id AS waiter_id,
+                   sum(oi.quantity * oi.price) AS revenue, sum(oi.quantity) AS item_count,
+                   CAST(row_number() OVER (PARTITION BY oi.order_id ORDER BY oi.menu_item_id, oi.station) = 1 AS INTEGER) AS ticket
+            FROM order_items oi JOIN orders o ON o.id = oi.order_id
+            WHERE o.status = 'paid'
+            GROUP BY oi.order_id, CAST(o.created_at AS DATE), oi.menu_item_id, oi.station, o.user_id
+        ) AS lines
+        GROUP BY day, menu_item_id, station, waiter_id
+    """)
+
+
+def downgrade():
+    op.drop_table('daily_sales_rollup')
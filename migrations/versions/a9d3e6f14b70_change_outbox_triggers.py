@@ -0,0 +1,66 @@
+"""Change Outbox Triggers
+
+Revision ID: a9d3e6f14b70
+Revises: f0a3c81e5d47
+Create Date: 2026-10-18 21:37:42.160594
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d3e6f14b70'
+down_revision = 'f0a3c81e5d47'
+branch_labels = None
+depends_on = None
+
+TRACKED_TABLES = ("orders", "order_items", "tables", "menu_items")
+TRANSITION_TABLES = {
+    "insert": "NEW TABLE AS new_rows",
+    "update": "OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "delete": "OLD TABLE AS old_rows",
+}
+
+
+def upgrade():
+    op.execute("""
+CREATE OR REPLACE FUNCTION change_outbox_record() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO change_outbox (txid, table_name, row_id, op)
+        SELECT txid_current(), TG_TABLE_NAME, n.id, 'insert' FROM new_rows n ORDER BY n.id;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO change_outbox (txid, table_name, row_id, op)
+        SELECT txid_current(), TG_TABLE_NAME, o.id, 'delete' FROM old_rows o ORDER BY o.id;
+    ELSE
+        INSERT INTO change_outbox (txid, table_name, row_id, op, columns)
+        SELECT txid_current(), TG_TABLE_NAME, n.id, 'update', c.columns
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        CROSS JOIN LATERAL (
+            SELECT json_agg(v.key ORDER BY v.key) AS columns
+            FROM jsonb_each(to_jsonb(n)) v
+            WHERE v.value IS DISTINCT FROM to_jsonb(o) -> v.key
+        ) c
+        WHERE c.columns IS NOT NULL
+        ORDER BY n.id;
+    END IF;
+    RETURN NULL;
+END
+$$
+    """)
+    for table in TRACKED_TABLES:
+        for event, transition in TRANSITION_TABLES.items():
+            op.execute(
+                f"CREATE TRIGGER {table}_changes_{event} AFTER {event.upper()} ON {table} "
+                f"REFERENCING {transition} FOR EACH STATEMENT "
+                "EXECUTE FUNCTION change_outbox_record()"
+            )
+
+
+def downgrade():
+    for table in TRACKED_TABLES:
+        for event in TRANSITION_TABLES:
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_changes_{event} ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS change_outbox_record()")
@@ -0,0 +1,28 @@
+"""Cache Versions
+
+Revision ID: c47a19e3f582
+Revises: 8b2e4d61c0fa
+Create Date: 2026-10-17 11:26:05.847113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47a19e3f582'
+down_revision = '8b2e4d61c0fa'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cache_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('cache_versions')
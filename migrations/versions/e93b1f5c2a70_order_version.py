@@ -0,0 +1,26 @@
+"""Order Version
+
+Revision ID: e93b1f5c2a70
+Revises: a2d64f0b7e31
+Create Date: 2026-10-18 15:02:31.774065
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e93b1f5c2a70'
+down_revision = 'a2d64f0b7e31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,40 @@
+"""Change Outbox
+
+Revision ID: f0a3c81e5d47
+Revises: 4b9e0d2f7a13
+Create Date: 2026-10-18 19:11:08.905263
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f0a3c81e5d47'
+down_revision = '4b9e0d2f7a13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('change_outbox',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('txid', sa.BigInteger(), nullable=False),
+    sa.Column('table_name', sa.String(length=50), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=False),
+    sa.Column('op', sa.String(length=6), nullable=False),
+    sa.Column('columns', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('change_outbox', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_change_outbox_created_at'), ['created_at'], unique=False)
+        batch_op.create_index('ix_change_outbox_txid_id', ['txid', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('change_outbox', schema=None) as batch_op:
+        batch_op.drop_index('ix_change_outbox_txid_id')
+        batch_op.drop_index(batch_op.f('ix_change_outbox_created_at'))
+
+    op.drop_table('change_outbox')
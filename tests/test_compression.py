@@ -0,0 +1,94 @@
+# tests/test_compression.py
+import gzip
+import brotli
+import pytest
+from flask import Response, stream_with_context
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.models import MenuItem
+
+
+@pytest.fixture
+def app():
+    app = create_app("testing")
+
+    @app.route("/_test/stream")
+    def stream():
+        def rows():
+            for i in range(500):
+                yield f'{{"row": {i}}}\n'
+        return Response(stream_with_context(rows()), mimetype="application/x-ndjson")
+
+    @app.route("/_test/events")
+    def events():
+        return Response(iter(["data: x\n\n"] * 200), mimetype="text/event-stream")
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            MenuItem(name=f"Dish {i}", description="Slow-cooked with berbere and niter kibbeh " * 3,
+                     price=10 + i, category="food", image_url=f"https://cdn.example.com/menu/{i}.jpg")
+            for i in range(40)
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def headers(app):
+    return {"Authorization": f"Bearer {create_access_token(identity='1', additional_claims={'role': 'waiter'})}"}
+
+
+def test_large_list_is_compressed_per_accept_encoding(client, headers):
+    plain = client.get("/menu-items/", headers=headers)
+    assert "Content-Encoding" not in plain.headers
+    assert plain.headers["Vary"] == "Accept-Encoding"
+
+    gz = client.get("/menu-items/", headers={**headers, "Accept-Encoding": "gzip, deflate"})
+    assert gz.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(gz.data) == plain.data
+    assert len(gz.data) < len(plain.data) / 3
+
+    br = client.get("/menu-items/", headers={**headers, "Accept-Encoding": "gzip, br"})
+    assert br.headers["Content-Encoding"] == "br"
+    assert brotli.decompress(br.data) == plain.data
+
+    # Client preference wins over server order
+    gz = client.get("/menu-items/", headers={**headers, "Accept-Encoding": "gzip;q=1.0, br;q=0.5"})
+    assert gz.headers["Content-Encoding"] == "gzip"
+
+
+def test_small_responses_stay_uncompressed(client, headers):
+    res = client.get("/menu-items/?limit=1&fields=id", headers={**headers, "Accept-Encoding": "gzip"})
+    assert res.status_code == 200
+    assert "Content-Encoding" not in res.headers
+
+
+def test_compressed_etag_is_weak_and_still_validates(client, headers):
+    accept = {**headers, "Accept-Encoding": "gzip"}
+    res = client.get("/menu-items/", headers=accept)
+    assert res.headers["ETag"].startswith('W/"')
+
+    again = client.get("/menu-items/", headers={**accept, "If-None-Match": res.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_streamed_response_is_compressed_incrementally(client):
+    res = client.get("/_test/stream", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in res.headers
+    lines = gzip.decompress(res.data).decode().splitlines()
+    assert len(lines) == 500 and lines[-1] == '{"row": 499}'
+
+
+def test_event_streams_are_never_compressed(client):
+    res = client.get("/_test/events", headers={"Accept-Encoding": "gzip, br"})
+    assert "Content-Encoding" not in res.headers
+    assert res.data.startswith(b"data: x")
@@ -0,0 +1,59 @@
+# tests/test_db_pool.py
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.config import engine_options
+
+@pytest.fixture
+def app():
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def test_engine_options_from_profile():
+    direct = engine_options(10, 5, 5, 1800, True, 15000, pgbouncer=False)
+    assert direct["pool_size"] == 10
+    assert direct["connect_args"] == {"options": "-c statement_timeout=15000"}
+
+    # PgBouncer rejects startup options; the timeout moves to SET LOCAL
+    bouncer = engine_options(10, 5, 5, 1800, True, 15000, pgbouncer=True)
+    assert "connect_args" not in bouncer
+
+def test_statement_timeout_applies_to_connections(app):
+    expected = f"{app.config['DB_STATEMENT_TIMEOUT_MS'] // 1000}s"
+    assert db.session.execute(text("SHOW statement_timeout")).scalar() == expected
+    assert db.engine.pool.size() == app.config["DB_POOL_SIZE"]
+
+def headers_for(role):
+    return {"Authorization": f"Bearer {create_access_token(identity='1', additional_claims={'role': role})}"}
+
+def test_pool_metrics_endpoint(app, client):
+    assert client.get("/metrics/db-pool").status_code == 401
+    assert client.get("/metrics/db-pool", headers=headers_for("waiter")).status_code == 403
+
+    db.session.execute(text("SELECT 1"))
+    resp = client.get("/metrics/db-pool", headers=headers_for("admin"))
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data["pool"] == "QueuePool"
+    assert data["checkouts"] >= 1
+    assert {"size", "checkedin", "checkedout", "overflow", "timeouts"} <= set(data)
+
+def test_pool_exhaustion_returns_503(app, client):
+    @app.route("/_busy")
+    def busy():
+        raise PoolTimeoutError("QueuePool limit reached")
+
+    resp = client.get("/_busy")
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
+    assert client.get("/metrics/db-pool", headers=headers_for("admin")).get_json()["timeouts"] == 1
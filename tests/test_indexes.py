@@ -0,0 +1,105 @@
+# tests/test_indexes.py
+"""
+EXPLAIN-based guard for the hot query paths.
+
+Test tables are tiny, so the planner would happily seq-scan everything.
+With enable_seqscan off it only falls back to a Seq Scan when no usable
+index exists, which is exactly the regression these tests catch.
+"""
+import pytest
+from sqlalchemy import select, text
+from app import create_app, db
+from app.models.models import Order, OrderItem
+from app.routes.stations.stations import station_queue_query
+from app.routes.reports.reports import sales_query
+
+
+@pytest.fixture
+def app():
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def explain(stmt):
+    """Return the JSON plan of a statement with sequential scans discouraged."""
+    sql = stmt.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True})
+    db.session.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = db.session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    db.session.rollback()
+    return plan[0]["Plan"]
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def assert_uses_index(stmt, relation):
+    nodes = list(plan_nodes(explain(stmt)))
+    seq_scans = [n for n in nodes if n["Node Type"] == "Seq Scan" and n.get("Relation Name") == relation]
+    assert not seq_scans, f"sequential scan on {relation}: {nodes}"
+    return {n["Index Name"] for n in nodes if "Index Name" in n}
+
+
+HOT_QUERIES = {
+    "orders by status": (
+        select(Order.id).where(Order.status == "open").order_by(Order.created_at, Order.id),
+        "orders",
+    ),
+    "orders by table": (
+        select(Order.id).where(Order.table_id == 1),
+        "orders",
+    ),
+    "unpaid orders": (
+        select(Order.id).where(Order.status != "paid").order_by(Order.created_at, Order.id),
+        "orders",
+    ),
+    "order list page": (
+        select(Order.id).order_by(Order.created_at, Order.id).limit(100),
+        "orders",
+    ),
+    "items of orders": (
+        select(OrderItem.id).where(OrderItem.order_id.in_([1, 2, 3])).order_by(OrderItem.order_id, OrderItem.id),
+        "order_items",
+    ),
+    "station pending queue": (
+        select(OrderItem.id)
+        .where(OrderItem.station == "kitchen", OrderItem.status == "pending")
+        .order_by(OrderItem.created_at),
+        "order_items",
+    ),
+    "station queue endpoint": (
+        station_queue_query("kitchen", 50),
+        "order_items",
+    ),
+    "sales report for a day": (
+        sales_query("day", Order.status == "paid", Order.created_at >= "2026-10-16", Order.created_at < "2026-10-17"),
+        "orders",
+    ),
+    "station items by status": (
+        select(OrderItem.id).where(OrderItem.station == "bar", OrderItem.status == "ready"),
+        "order_items",
+    ),
+}
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_is_index_backed(app, name):
+    stmt, relation = HOT_QUERIES[name]
+    assert assert_uses_index(stmt, relation)
+
+
+def test_partial_indexes_are_chosen(app):
+    stmt, relation = HOT_QUERIES["station pending queue"]
+    assert "ix_order_items_pending_station" in assert_uses_index(stmt, relation)
+
+    stmt, relation = HOT_QUERIES["station queue endpoint"]
+    assert "ix_order_items_pending_station" in assert_uses_index(stmt, relation)
+
+    stmt, relation = HOT_QUERIES["unpaid orders"]
+    assert "ix_orders_unpaid_created_at" in assert_uses_index(stmt, relation)
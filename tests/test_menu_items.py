@@ -1,5 +1,6 @@
 import os
 import pytest
+from sqlalchemy import event
 from werkzeug.security import generate_password_hash
 from flask_jwt_extended import create_access_token
 
@@ -176,3 +177,90 @@ def test_manager_can_delete_item(client):
     waiter_h = auth_headers(3, "waiter", app)
     get_resp = client.get(f"/menu-items/{item_id}", headers=waiter_h)
     assert get_resp.status_code == 404
+
+
+def test_list_is_paginated_with_cursor(client):
+    app = client.application
+    admin_h = auth_headers(1, "admin", app)
+    for n in range(5):
+        client.post("/menu-items/", json={"name": f"Dish {n}", "price": 5 + n, "category": "food"}, headers=admin_h)
+
+    seen = []
+    resp = client.get("/menu-items/?limit=2", headers=admin_h)
+    while True:
+        assert resp.status_code == 200
+        page = resp.get_json()
+        assert len(page) <= 2
+        seen.extend(i["name"] for i in page)
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        resp = client.get(f"/menu-items/?limit=2&cursor={cursor}", headers=admin_h)
+
+    assert seen == [f"Dish {n}" for n in range(5)]
+
+
+def test_fields_projection_and_bad_params(client):
+    app = client.application
+    admin_h = auth_headers(1, "admin", app)
+    client.post("/menu-items/", json={"name": "Soup", "price": 4.5, "category": "food"}, headers=admin_h)
+
+    resp = client.get("/menu-items/?fields=name,price", headers=admin_h)
+    assert resp.status_code == 200
+    assert resp.get_json() == [{"name": "Soup", "price": 4.5}]
+
+    assert client.get("/menu-items/?fields=password", headers=admin_h).status_code == 400
+    assert client.get("/menu-items/?limit=0", headers=admin_h).status_code == 400
+    assert client.get("/menu-items/?cursor=not-a-cursor", headers=admin_h).status_code == 400
+
+
+def test_menu_cache_serves_warm_reads_without_menu_queries(client):
+    app = client.application
+    admin_h = auth_headers(1, "admin", app)
+    client.post("/menu-items/", json={"name": "Bread", "price": 1.0, "category": "food"}, headers=admin_h)
+    client.get("/menu-items/", headers=admin_h)  # warm up
+
+    statements = []
+    with app.app_context():
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            assert client.get("/menu-items/", headers=admin_h).status_code == 200
+            assert client.get("/menu-items/?category=food", headers=admin_h).status_code == 200
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+
+    assert not any("FROM menu_items" in s for s in statements)
+
+
+def test_menu_cache_invalidated_across_workers(client):
+    app = client.application
+    admin_h = auth_headers(1, "admin", app)
+    created = client.post("/menu-items/", json={"name": "Wine", "price": 8.0, "category": "drinks"}, headers=admin_h)
+    item_id = created.get_json()["id"]
+
+    # A second app instance stands in for another gunicorn worker
+    other = create_app("testing").test_client()
+    assert other.get(f"/menu-items/{item_id}", headers=admin_h).get_json()["price"] == 8.0
+
+    client.put(f"/menu-items/{item_id}", json={"price": 9.5}, headers=admin_h)
+    assert client.get(f"/menu-items/{item_id}", headers=admin_h).get_json()["price"] == 9.5
+    assert other.get(f"/menu-items/{item_id}", headers=admin_h).get_json()["price"] == 9.5
+
+    client.delete(f"/menu-items/{item_id}", headers=admin_h)
+    assert other.get(f"/menu-items/{item_id}", headers=admin_h).status_code == 404
+    assert other.get("/menu-items/?category=drinks", headers=admin_h).get_json() == []
+
+
+def test_menu_conditional_get(client):
+    app = client.application
+    admin_h = auth_headers(1, "admin", app)
+    created = client.post("/menu-items/", json={"name": "Fries", "price": 3.0, "category": "food"}, headers=admin_h)
+    item_id = created.get_json()["id"]
+
+    first = client.get("/menu-items/", headers=admin_h)
+    etag = first.headers["ETag"]
+    assert client.get("/menu-items/", headers={**admin_h, "If-None-Match": etag}).status_code == 304
+
+    client.put(f"/menu-items/{item_id}", json={"price": 3.5}, headers=admin_h)
+    assert client.get("/menu-items/", headers={**admin_h, "If-None-Match": etag}).status_code == 200
@@ -1,9 +1,22 @@
 # tests/test_orders.py
+import csv
+import io
+import json
 import pytest
-from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from sqlalchemy import event, update, delete
+from sqlalchemy.orm.exc import StaleDataError
+from flask import abort
+from flask_jwt_extended import create_access_token, jwt_required
 from app import create_app, db
-from app.models.models import User, Table, MenuItem, Order, OrderItem, KitchenTagCounter
-from app.routes.orders.kitchen_tag import generate_kitchen_tag
+from app.models.models import User, Table, MenuItem, Order, OrderItem, KitchenTagCounter, IdempotencyKey
+from app.utils.idempotency import idempotent, request_fingerprint
+from app.utils.pagination import encode_cursor
+from app.routes.orders.kitchen_tag import (
+    KitchenTagAllocator, format_tag, generate_kitchen_tag, generate_kitchen_tags,
+)
 
 @pytest.fixture
 def app():
@@ -39,6 +52,40 @@ def sample_menu_item(app):
     db.session.commit()
     return item
 
+def auth_headers(user_id, role):
+    token = create_access_token(identity=str(user_id), additional_claims={"role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+@contextmanager
+def count_queries():
+    """Collect every SQL statement executed on the engine inside the block."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+def seed_orders(user, table, menu_item, count, items_per_order=2):
+    for _ in range(count):
+        order = Order(table_id=table.id, user_id=user.id, status="open", total_amount=0)
+        db.session.add(order)
+        db.session.flush()
+        for _ in range(items_per_order):
+            db.session.add(OrderItem(
+                order_id=order.id,
+                menu_item_id=menu_item.id,
+                quantity=1,
+                price=menu_item.price,
+                status="pending",
+                station="butchery",
+            ))
+    db.session.commit()
+
 def test_kitchen_tag_counter_simple(app):
     # Generate first tag today
     tag1 = generate_kitchen_tag()
@@ -74,11 +121,11 @@ def test_create_order_and_add_item(app, sample_user, sample_table, sample_menu_i
         prep_tag=kitchen_tag
     )
     db.session.add(item)
-    order.total_amount = (order.total_amount or 0) + (item.price * item.quantity)
     db.session.commit()
 
     assert item.id is not None
     assert item.prep_tag == "0003" or int(item.prep_tag) >= 1
+    # Derived from the items by the database
     assert order.total_amount == 20.0
 
 def test_order_item_status_update(app, sample_user, sample_table, sample_menu_item):
@@ -104,3 +151,514 @@ def test_order_item_status_update(app, sample_user, sample_table, sample_menu_it
 
     updated_item = OrderItem.query.get(item.id)
     assert updated_item.status == "ready"
+
+def test_get_orders_query_count_is_constant(app, client, sample_user, sample_table, sample_menu_item):
+    headers = auth_headers(sample_user.id, "waiter")
+
+    seed_orders(sample_user, sample_table, sample_menu_item, 3)
+    with count_queries() as few:
+        resp = client.get("/orders/", headers=headers)
+    assert resp.status_code == 200
+    assert len(resp.get_json()) == 3
+
+    seed_orders(sample_user, sample_table, sample_menu_item, 30)
+    with count_queries() as many:
+        resp = client.get("/orders/", headers=headers)
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert len(data) == 33
+    assert all(len(o["items"]) == 2 for o in data)
+
+    # The revocation list loads once per process, not per request
+    few, many = ([s for s in queries if "revoked_tokens" not in s] for queries in (few, many))
+    assert len(few) == len(many) == 2  # orders page, items
+
+def test_get_single_order_includes_items(app, client, sample_user, sample_table, sample_menu_item):
+    seed_orders(sample_user, sample_table, sample_menu_item, 1, items_per_order=3)
+    order = Order.query.first()
+
+    resp = client.get(f"/orders/{order.id}", headers=auth_headers(sample_user.id, "waiter"))
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data["id"] == order.id
+    assert [i["order_id"] for i in data["items"]] == [order.id] * 3
+
+    missing = client.get("/orders/99999", headers=auth_headers(sample_user.id, "waiter"))
+    assert missing.status_code == 404
+
+def test_get_orders_pages_on_created_at_and_projects_fields(app, client, sample_user, sample_table, sample_menu_item):
+    headers = auth_headers(sample_user.id, "waiter")
+    seed_orders(sample_user, sample_table, sample_menu_item, 5, items_per_order=1)
+
+    first = client.get("/orders/?limit=3&fields=id,status", headers=headers)
+    assert first.status_code == 200
+    page1 = first.get_json()
+    assert [set(o) for o in page1] == [{"id", "status"}] * 3
+
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get(f"/orders/?limit=3&fields=id,items&cursor={cursor}", headers=headers)
+    page2 = second.get_json()
+    assert len(page2) == 2
+    assert "X-Next-Cursor" not in second.headers
+    assert all(len(o["items"]) == 1 for o in page2)
+    assert {o["id"] for o in page1}.isdisjoint(o["id"] for o in page2)
+
+    # Well-formed cursors carrying values of the wrong type are rejected up front
+    for values in (["2026-10-18T12:00:00", "1 OR 1=1"], [12, 1], ["2026-10-18T12:00:00", True]):
+        assert client.get(f"/orders/?cursor={encode_cursor(values)}", headers=headers).status_code == 400
+
+def test_kitchen_tags_are_per_station(app):
+    assert generate_kitchen_tag("kitchen") == "0001"
+    assert generate_kitchen_tag("butchery") == "0001"
+    assert generate_kitchen_tag("kitchen") == "0002"
+    assert generate_kitchen_tags("butchery", 3) == ["0002", "0003", "0004"]
+
+def test_kitchen_tag_does_not_commit_caller_session(app, sample_user):
+    table = Table(number="99")
+    db.session.add(table)
+    db.session.flush()
+
+    generate_kitchen_tag("kitchen")
+    db.session.rollback()
+
+    assert Table.query.filter_by(number="99").first() is None
+    assert KitchenTagCounter.query.filter_by(station="kitchen").one().last_number == 1
+
+def test_item_add_holds_one_request_pool_connection(app, client, sample_user, sample_table, sample_menu_item):
+    order = Order(table_id=sample_table.id, user_id=sample_user.id, status="open", total_amount=0)
+    db.session.add(order)
+    db.session.commit()
+    url, body = f"/orders/{order.id}/items", {"menu_item_id": sample_menu_item.id}
+    headers = auth_headers(sample_user.id, "waiter")
+    db.session.remove()  # start from an idle pool
+
+    peak = []
+    def checkout(*args):
+        peak.append(db.engine.pool.checkedout())
+    event.listen(db.engine, "checkout", checkout)
+    try:
+        assert client.post(url, json=body, headers=headers).status_code == 201
+    finally:
+        event.remove(db.engine, "checkout", checkout)
+    assert max(peak) == 1  # tags come from their own pool, not a second request connection
+
+def test_kitchen_tag_allocator_wraps_after_9999():
+    assert format_tag(9999) == "9999"
+    assert format_tag(10000) == "0001"
+
+def test_block_allocators_never_hand_out_duplicates(app):
+    # Two allocators stand in for two worker processes sharing the counter row
+    workers = [KitchenTagAllocator(block_size=10), KitchenTagAllocator(block_size=10)]
+    tags = []
+    for n in range(45):
+        tags.extend(workers[n % 2].allocate("kitchen"))
+    assert len(set(tags)) == 45
+    assert KitchenTagCounter.query.filter_by(station="kitchen").one().last_number == 60  # 3 blocks each
+
+@pytest.mark.parametrize("block_size", [1, 25])
+def test_concurrent_tag_allocation_is_unique(app, block_size):
+    allocator = KitchenTagAllocator(block_size=block_size)
+    total = 300
+
+    def allocate(_):
+        with app.app_context():
+            return allocator.allocate("kitchen")[0]
+
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        tags = list(pool.map(allocate, range(total)))
+
+    assert len(tags) == total
+    assert len(set(tags)) == total
+
+def test_batch_add_items(app, client, sample_user, sample_table, sample_menu_item):
+    soup = MenuItem(name="Soup", category="food", price=4.5, is_available=True)
+    beer = MenuItem(name="Beer", category="drinks", price=3.0, is_available=True)
+    db.session.add_all([soup, beer])
+    order = Order(table_id=sample_table.id, user_id=sample_user.id, status="open", total_amount=0)
+    db.session.add(order)
+    db.session.commit()
+
+    payload = {"items": [
+        {"menu_item_id": sample_menu_item.id, "quantity": 2},
+        {"menu_item_id": soup.id, "notes": "no salt"},
+        {"menu_item_id": beer.id, "quantity": 3},
+        {"menu_item_id": soup.id},
+    ]}
+    with count_queries() as statements:
+        resp = client.post(f"/orders/{order.id}/items:batch", json=payload,
+                           headers=auth_headers(sample_user.id, "waiter"))
+    assert resp.status_code == 201
+    items = resp.get_json()
+    assert [i["station"] for i in items] == ["butchery", "kitchen", "bar", "kitchen"]
+    assert [i["prep_tag"] for i in items] == ["0001", "0001", None, "0002"]
+    assert items[1]["notes"] == "no salt"
+    assert sum("INSERT INTO order_items" in s for s in statements) == 1
+    assert sum("FROM menu_items" in s for s in statements) <= 1
+    assert not any("FROM order_items" in s for s in statements)
+
+    db.session.expire_all()
+    assert float(db.session.get(Order, order.id).total_amount) == 20.0 + 4.5 + 9.0 + 4.5
+
+def test_batch_add_items_is_all_or_nothing(app, client, sample_user, sample_table, sample_menu_item):
+    order = Order(table_id=sample_table.id, user_id=sample_user.id, status="open", total_amount=0)
+    db.session.add(order)
+    db.session.commit()
+    headers = auth_headers(sample_user.id, "waiter")
+
+    resp = client.post(f"/orders/{order.id}/items:batch",
+                       json={"items": [{"menu_item_id": sample_menu_item.id}, {"menu_item_id": 12345}]},
+                       headers=headers)
+    assert resp.status_code == 400
+    assert OrderItem.query.count() == 0
+
+    bad_qty = client.post(f"/orders/{order.id}/items:batch",
+                          json={"items": [{"menu_item_id": sample_menu_item.id, "quantity": 0}]},
+                          headers=headers)
+    assert bad_qty.status_code == 400
+    for items in ([{"menu_item_id": [1]}], [{"menu_item_id": "x"}, {"menu_item_id": 99}]):
+        assert client.post(f"/orders/{order.id}/items:batch", json={"items": items},
+                           headers=headers).status_code == 400
+    assert client.post(f"/orders/{order.id}/items", json={"menu_item_id": [1]}, headers=headers).status_code == 400
+    assert client.post("/orders/999/items:batch", json={"items": [{"menu_item_id": 1}]},
+                       headers=headers).status_code == 404
+
+def test_orders_etag_short_circuits_and_tracks_item_changes(app, client, sample_user, sample_table, sample_menu_item):
+    headers = auth_headers(sample_user.id, "waiter")
+    seed_orders(sample_user, sample_table, sample_menu_item, 2, items_per_order=1)
+
+    first = client.get("/orders/", headers=headers)
+    etag = first.headers["ETag"]
+
+    with count_queries() as statements:
+        again = client.get("/orders/", headers={**headers, "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+    # Only the page and its items are read: no aggregate over all orders
+    assert len(statements) == 2
+    assert not any("count(" in s.lower() for s in statements)
+
+    item = OrderItem.query.first()
+    item.status = "ready"
+    db.session.commit()
+    changed = client.get("/orders/", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+    single = client.get(f"/orders/{item.order_id}", headers=headers)
+    assert client.get(f"/orders/{item.order_id}",
+                      headers={**headers, "If-None-Match": single.headers["ETag"]}).status_code == 304
+
+    # Without items in the response, only order changes move the ETag
+    projected = client.get("/orders/?fields=id,status", headers=headers)
+    item.status = "pending"
+    db.session.commit()
+    assert client.get("/orders/?fields=id,status",
+                      headers={**headers, "If-None-Match": projected.headers["ETag"]}).status_code == 304
+    client.put(f"/orders/{item.order_id}/status", json={"status": "closed"}, headers=headers)
+    assert client.get("/orders/?fields=id,status",
+                      headers={**headers, "If-None-Match": projected.headers["ETag"]}).status_code == 200
+
+def test_status_updates_authorize_from_token_claims(app, client, sample_user, sample_table, sample_menu_item):
+    seed_orders(sample_user, sample_table, sample_menu_item, 1, items_per_order=1)
+    order = Order.query.first()
+    item = OrderItem.query.first()
+    waiter, butchery = auth_headers(sample_user.id, "waiter"), auth_headers(sample_user.id, "butchery")
+
+    with count_queries() as statements:
+        res = client.put(f"/orders/{order.id}/status", json={"status": "closed"}, headers=waiter)
+        assert res.status_code == 200
+        res = client.put(f"/orders/items/{item.id}/status", json={"status": "ready"}, headers=butchery)
+        assert res.status_code == 200
+    assert not [s for s in statements if "FROM users" in s]
+
+    res = client.put(f"/orders/items/{item.id}/status", json={"status": "pending"},
+                     headers=auth_headers(sample_user.id, "bar"))
+    assert res.status_code == 403
+
+def test_user_cache_rejects_stale_roles(app, client, sample_user, sample_table, sample_menu_item):
+    app.config["AUTH_USER_CACHE_TTL"] = 60
+    seed_orders(sample_user, sample_table, sample_menu_item, 1, items_per_order=1)
+    order = Order.query.first()
+    headers = auth_headers(sample_user.id, "waiter")
+
+    with count_queries() as statements:
+        for status in ("open", "closed", "open"):
+            assert client.put(f"/orders/{order.id}/status", json={"status": status},
+                              headers=headers).status_code == 200
+    # One lookup, then served from the per-process cache
+    assert len([s for s in statements if "FROM users" in s]) == 1
+
+    admin = auth_headers(sample_user.id, "admin")
+    assert client.put(f"/users/{sample_user.id}", json={"role": "cashier"}, headers=admin).status_code == 401
+    app.extensions["user_cache"].forget(sample_user.id)
+    sample_user.role = "admin"
+    db.session.commit()
+    assert client.put(f"/users/{sample_user.id}", json={"role": "cashier"}, headers=admin).status_code == 200
+
+    # The role change is seen at once by this process; the old waiter token is refused
+    res = client.put(f"/orders/{order.id}/status", json={"status": "closed"}, headers=headers)
+    assert res.status_code == 401
+
+def test_export_streams_ndjson_in_batches(app, client, sample_user, sample_table, sample_menu_item):
+    app.config["EXPORT_BATCH_SIZE"] = 4
+    seed_orders(sample_user, sample_table, sample_menu_item, 10)
+    headers = auth_headers(sample_user.id, "cashier")
+
+    with count_queries() as statements:
+        res = client.get("/orders/export", headers=headers)
+        body = res.get_data(as_text=True)
+    assert res.status_code == 200
+    assert res.mimetype == "application/x-ndjson"
+    assert "Content-Length" not in res.headers
+
+    lines = [json.loads(line) for line in body.splitlines()]
+    assert [o["id"] for o in lines] == sorted(o["id"] for o in lines)
+    assert len(lines) == 10 and all(len(o["items"]) == 2 for o in lines)
+    # Orders come from one server-side cursor, items are fetched per batch of 4
+    assert len([s for s in statements if "FROM order_items" in s]) == 3
+
+def test_export_csv_filters_by_status_and_date(app, client, sample_user, sample_table, sample_menu_item):
+    seed_orders(sample_user, sample_table, sample_menu_item, 3)
+    first, second, third = Order.query.order_by(Order.id).all()
+    first.status = "paid"
+    third.created_at = datetime.utcnow() - timedelta(days=3)
+    db.session.commit()
+    headers = auth_headers(sample_user.id, "manager")
+
+    res = client.get("/orders/export?format=csv&status=open", headers=headers)
+    assert res.mimetype == "text/csv"
+    rows = list(csv.DictReader(io.StringIO(res.get_data(as_text=True))))
+    assert {int(r["id"]) for r in rows} == {second.id, third.id}
+    assert len(rows) == 4 and rows[0]["item_station"] == "butchery"
+
+    today = date.today().isoformat()
+    res = client.get(f"/orders/export?format=csv&from={today}&to={today}", headers=headers)
+    rows = list(csv.DictReader(io.StringIO(res.get_data(as_text=True))))
+    assert {int(r["id"]) for r in rows} == {first.id, second.id}
+
+    assert client.get("/orders/export?from=yesterday", headers=headers).status_code == 400
+    assert client.get("/orders/export?format=xml", headers=headers).status_code == 400
+    assert client.get("/orders/export", headers=auth_headers(sample_user.id, "waiter")).status_code == 403
+
+def test_parallel_writers_lose_no_total_updates(app, sample_user, sample_table, sample_menu_item):
+    order = Order(table_id=sample_table.id, user_id=sample_user.id, status="open", total_amount=0)
+    db.session.add(order)
+    db.session.commit()
+    order_id, menu_id = order.id, sample_menu_item.id
+    headers = auth_headers(sample_user.id, "waiter")
+
+    def writer(n):
+        client = app.test_client()
+        codes = []
+        for i in range(25):
+            if i % 5 == 4:
+                body = {"items": [{"menu_item_id": menu_id}, {"menu_item_id": menu_id, "quantity": 2}]}
+                codes.append(client.post(f"/orders/{order_id}/items:batch", json=body, headers=headers).status_code)
+            else:
+                codes.append(client.post(f"/orders/{order_id}/items", json={"menu_item_id": menu_id},
+                                         headers=headers).status_code)
+        return codes
+
+    with ThreadPoolExecutor(8) as pool:
+        codes = [c for batch in pool.map(writer, range(8)) for c in batch]
+    assert set(codes) == {201}
+
+    db.session.expire_all()
+    order = db.session.get(Order, order_id)
+    # 8 writers x (20 single adds of 1 + 5 batches of 3) at 10.00 each
+    assert float(order.total_amount) == 8 * (20 + 5 * 3) * 10.0
+    assert order.version == 1 + 8 * 25
+    assert OrderItem.query.filter_by(order_id=order_id).count() == 8 * (20 + 5 * 2)
+
+def test_status_transitions_compare_and_swap(app, client, sample_user, sample_table, sample_menu_item):
+    order = Order(table_id=sample_table.id, user_id=sample_user.id, status="open", total_amount=0)
+    db.session.add(order)
+    db.session.commit()
+    order_id, version = order.id, order.version
+    waiter = auth_headers(sample_user.id, "waiter")
+
+    # Racing closes based on the same read: exactly one wins
+    def close(_):
+        return app.test_client().put(f"/orders/{order_id}/status", json={"status": "closed", "version": version},
+                                     headers=waiter).status_code
+    with ThreadPoolExecutor(8) as pool:
+        codes = list(pool.map(close, range(8)))
+    assert sorted(codes) == [200] + [409] * 7
+
+    # A cashier paying from a stale read loses to an item added meanwhile
+    current = client.get(f"/orders/{order_id}", headers=waiter).get_json()["version"]
+    assert current == version + 1
+    client.post(f"/orders/{order_id}/items", json={"menu_item_id": sample_menu_item.id}, headers=waiter)
+    cashier = auth_headers(sample_user.id, "cashier")
+    res = client.put(f"/orders/{order_id}/status", json={"status": "paid", "version": current}, headers=cashier)
+    assert res.status_code == 409
+    res = client.put(f"/orders/{order_id}/status", json={"status": "paid"}, headers=cashier)
+    assert res.status_code == 200
+    assert res.get_json()["version"] == current + 2
+
+    # The client's version must be an integer
+    for version in ("abc", [1], True):
+        res = client.put(f"/orders/{order_id}/status", json={"status": "closed", "version": version}, headers=waiter)
+        assert res.status_code == 400
+
+    # ORM writers are version-checked too
+    stale = db.session.get(Order, order_id)
+    db.session.execute(db.text("UPDATE orders SET version = version + 1 WHERE id = :id"), {"id": order_id})
+    stale.status = "closed"
+    with pytest.raises(StaleDataError):
+        db.session.commit()
+    db.session.rollback()
+
+def test_order_total_is_derived_from_items(app, client, sample_user, sample_table, sample_menu_item):
+    seed_orders(sample_user, sample_table, sample_menu_item, 2, items_per_order=3)
+    first, second = Order.query.order_by(Order.id).all()
+    assert float(first.total_amount) == float(second.total_amount) == 30.0
+
+    def reload(order):
+        db.session.expire_all()
+        return db.session.get(Order, order.id)
+
+    # Price correction and quantity change, without touching the order row
+    item = OrderItem.query.filter_by(order_id=first.id).first()
+    db.session.execute(update(OrderItem).where(OrderItem.id == item.id).values(price=12.5, quantity=2))
+    db.session.commit()
+    assert float(reload(first).total_amount) == 45.0
+
+    # Moving an item between orders and deleting one
+    db.session.execute(update(OrderItem).where(OrderItem.id == item.id).values(order_id=second.id))
+    db.session.execute(delete(OrderItem).where(OrderItem.order_id == first.id))
+    db.session.commit()
+    assert float(reload(first).total_amount) == 0
+    assert float(reload(second).total_amount) == 55.0
+
+    # Changes that leave amounts alone (kitchen status updates) don't bump the version
+    version = reload(second).version
+    client.put(f"/orders/items/{item.id}/status", json={"status": "ready"},
+               headers=auth_headers(sample_user.id, "butchery"))
+    assert reload(second).version == version
+
+def test_idempotency_key_replays_order_writes(app, client, sample_user, sample_table, sample_menu_item):
+    headers = auth_headers(sample_user.id, "waiter")
+    keyed = {**headers, "Idempotency-Key": "tablet-7:create:1"}
+    body = {"table_id": sample_table.id}
+
+    first = client.post("/orders/", json=body, headers=keyed)
+    assert first.status_code == 201
+    order_id = first.get_json()["id"]
+
+    # A retry is answered from memory without running the view
+    with count_queries() as statements:
+        retry = client.post("/orders/", json=body, headers=keyed)
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.get_json() == first.get_json()
+    assert statements == []
+    assert Order.query.count() == 1
+
+    # Another worker (empty LRU) replays from the table
+    app.extensions["idempotency_store"]._recent.clear()
+    assert client.post("/orders/", json=body, headers=keyed).get_json()["id"] == order_id
+    assert Order.query.count() == 1
+
+    # Same key, different request; same key, other user
+    assert client.post("/orders/", json={"table_id": 999}, headers=keyed).status_code == 422
+    colleague = User(name="Other Waiter", username="other", password_hash="pass", role="waiter")
+    db.session.add(colleague)
+    db.session.commit()
+    other = {**auth_headers(colleague.id, "waiter"), "Idempotency-Key": "tablet-7:create:1"}
+    assert client.post("/orders/", json=body, headers=other).status_code == 201
+    assert Order.query.count() == 2
+
+    # Concurrent retries of an item add produce a single item and ticket
+    item_key = {**headers, "Idempotency-Key": "tablet-7:item:1"}
+    item_body = {"menu_item_id": sample_menu_item.id}
+    def add(_):
+        return app.test_client().post(f"/orders/{order_id}/items", json=item_body, headers=item_key)
+    with ThreadPoolExecutor(6) as pool:
+        responses = list(pool.map(add, range(6)))
+    assert {r.status_code for r in responses} <= {201, 409}
+    assert len({r.get_json()["id"] for r in responses if r.status_code == 201}) == 1
+    assert OrderItem.query.filter_by(order_id=order_id).count() == 1
+
+def test_idempotency_key_is_released_on_error_and_expires(app, client, sample_user, sample_table, sample_menu_item):
+    headers = {**auth_headers(sample_user.id, "waiter"), "Idempotency-Key": "k1"}
+    order = Order(table_id=sample_table.id, user_id=sample_user.id, status="open", total_amount=0)
+    db.session.add(order)
+    db.session.commit()
+
+    # Failed requests are not stored: the same key may be retried
+    payload = {"items": [{"menu_item_id": sample_menu_item.id}]}
+    assert client.post(f"/orders/{order.id}/items:batch", json={"items": [{**payload["items"][0], "quantity": 0}]},
+                       headers=headers).status_code == 400
+    assert IdempotencyKey.query.count() == 0
+    assert client.post(f"/orders/{order.id}/items:batch", json=payload, headers=headers).status_code == 201
+    assert client.post(f"/orders/{order.id}/items:batch", json=payload, headers=headers).status_code == 201
+    assert OrderItem.query.count() == 1
+
+    # Expired keys are taken over
+    db.session.execute(update(IdempotencyKey).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.session.commit()
+    app.extensions["idempotency_store"]._recent.clear()
+    assert client.post(f"/orders/{order.id}/items:batch", json=payload, headers=headers).status_code == 201
+    assert OrderItem.query.count() == 2
+
+    assert client.post("/orders/", json={"table_id": sample_table.id},
+                       headers={**headers, "Idempotency-Key": "x" * 256}).status_code == 400
+
+def test_idempotency_claims_lease_and_keep_committed_outcomes(app, client, sample_user, sample_table):
+    calls = []
+
+    @app.route("/_test/commit-then-conflict", methods=["POST"])
+    @jwt_required()
+    @idempotent
+    def commit_then_conflict():
+        calls.append(1)
+        db.session.add(Table(number=f"T{len(calls)}"))
+        db.session.commit()
+        abort(409, description="Conflict after commit")
+
+    @app.route("/_test/commit-then-crash", methods=["POST"])
+    @jwt_required()
+    @idempotent
+    def commit_then_crash():
+        calls.append(1)
+        db.session.add(Table(number=f"T{len(calls)}"))
+        db.session.commit()
+        raise RuntimeError("failed after commit")
+
+    headers = {**auth_headers(sample_user.id, "waiter"), "Idempotency-Key": "k2"}
+    tables = Table.query.count()
+
+    # Once the view has committed, its error is the stored outcome: the writes never repeat
+    first = client.post("/_test/commit-then-conflict", json={}, headers=headers)
+    assert first.status_code == 409
+    app.extensions["idempotency_store"]._recent.clear()
+    retry = client.post("/_test/commit-then-conflict", json={}, headers=headers)
+    assert retry.status_code == 409 and retry.headers["Idempotent-Replayed"] == "true"
+    assert len(calls) == 1 and Table.query.count() == tables + 1
+
+    # An unhandled error after the commit is stored as a 500, even once the lease is long gone
+    crash = {**headers, "Idempotency-Key": "k4"}
+    with pytest.raises(RuntimeError):
+        client.post("/_test/commit-then-crash", json={}, headers=crash)
+    app.extensions["idempotency_store"]._recent.clear()
+    retry = client.post("/_test/commit-then-crash", json={}, headers=crash)
+    assert retry.status_code == 500 and retry.headers["Idempotent-Replayed"] == "true"
+    assert len(calls) == 2 and Table.query.count() == tables + 2
+
+    # A claim whose response was never stored (worker died) blocks retries until its lease runs out
+    body = {"table_id": sample_table.id}
+    orphan = {**headers, "Idempotency-Key": "k3"}
+    with app.test_request_context("/orders/", method="POST", json=body):
+        fingerprint = request_fingerprint()
+    db.session.add(IdempotencyKey(user_id=sample_user.id, key="k3", fingerprint=fingerprint,
+                                  expires_at=datetime.utcnow() + timedelta(seconds=30)))
+    db.session.commit()
+    assert client.post("/orders/", json=body, headers=orphan).status_code == 409
+    db.session.execute(update(IdempotencyKey).where(IdempotencyKey.key == "k3")
+                       .values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.session.commit()
+    assert client.post("/orders/", json=body, headers=orphan).status_code == 201
+    stored = db.session.get(IdempotencyKey, (sample_user.id, "k3"))
+    db.session.refresh(stored)
+    assert stored.status_code == 201 and stored.expires_at > datetime.utcnow() + timedelta(hours=1)
@@ -0,0 +1,126 @@
+# tests/test_outbox.py
+from datetime import datetime, timedelta
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.models import User, Table, MenuItem, ChangeRecord
+from app.utils.outbox import read_changes, prune_changes
+
+
+@pytest.fixture
+def app():
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def floor(app):
+    waiter = User(name="Abebe", username="abebe", password_hash="-", role="waiter")
+    table = Table(number="1")
+    tibs = MenuItem(name="Tibs", category="food", price=300)
+    db.session.add_all([waiter, table, tibs])
+    db.session.commit()
+    return {"waiter": waiter.id, "table": table.id, "tibs": tibs.id}
+
+
+def headers_for(user_id, role):
+    return {"Authorization": f"Bearer {create_access_token(identity=str(user_id), additional_claims={'role': role})}"}
+
+
+def changes(cursor=None, **kwargs):
+    records, cursor = read_changes(cursor, **kwargs)
+    return [(r.table_name, r.row_id, r.op, r.columns) for r in records], cursor
+
+
+def test_unit_of_work_writes_are_recorded(app, floor):
+    records, cursor = changes()
+    assert sorted(records) == [("menu_items", floor["tibs"], "insert", None), ("tables", floor["table"], "insert", None)]
+
+    table = db.session.get(Table, floor["table"])
+    table.status = "occupied"
+    db.session.add(Table(number="2"))
+    db.session.commit()
+    db.session.delete(db.session.get(MenuItem, floor["tibs"]))
+    db.session.commit()
+
+    records, cursor = changes(cursor)
+    assert records == [
+        ("tables", floor["table"], "update", ["status"]),  # the flush updates before it inserts
+        ("tables", floor["table"] + 1, "insert", None),
+        ("menu_items", floor["tibs"], "delete", None),
+    ]
+    assert changes(cursor) == ([], cursor)
+
+    # Rolled back writes leave no trace; untracked tables are ignored
+    db.session.add(Table(number="3"))
+    db.session.flush()
+    db.session.rollback()
+    db.session.add(User(name="Sara", username="sara", password_hash="-", role="waiter"))
+    db.session.commit()
+    assert changes(cursor) == ([], cursor)
+
+
+def test_statement_writes_are_recorded(client, floor):
+    headers = headers_for(floor["waiter"], "waiter")
+    _, cursor = changes()
+
+    order_id = client.post("/orders/", json={"table_id": floor["table"]}, headers=headers).get_json()["id"]
+    items = client.post(f"/orders/{order_id}/items:batch", json={"items": [{"menu_item_id": floor["tibs"]}] * 2},
+                        headers=headers).get_json()
+    res = client.put(f"/orders/{order_id}/status", json={"status": "closed"}, headers=headers)
+    assert res.status_code == 200
+
+    records, cursor = changes(cursor, tables=["orders", "order_items"])
+    assert records == [
+        ("orders", order_id, "insert", None),
+        ("order_items", items[0]["id"], "insert", None),
+        ("order_items", items[1]["id"], "insert", None),
+        ("orders", order_id, "update", ["total_amount", "updated_at", "version"]),  # by the total trigger
+        ("orders", order_id, "update", ["status", "updated_at", "version"]),
+    ]
+
+    # A compare-and-swap that loses matches no row and records nothing
+    stale = client.put(f"/orders/{order_id}/status", json={"status": "closed", "version": 1}, headers=headers)
+    assert stale.status_code == 409
+    assert changes(cursor) == ([], cursor)
+
+    # Plain SQL is recorded too; an update that changes no value is not
+    db.session.execute(db.text("UPDATE orders SET status = status WHERE id = :id"), {"id": order_id})
+    db.session.execute(db.text("DELETE FROM order_items WHERE id = :id"), {"id": items[0]["id"]})
+    db.session.commit()
+    records, cursor = changes(cursor)
+    assert records == [
+        ("order_items", items[0]["id"], "delete", None),
+        ("orders", order_id, "update", ["total_amount", "updated_at", "version"]),
+    ]
+
+
+def test_reader_waits_for_transactions_in_flight(app, floor):
+    _, cursor = changes()
+    in_flight = db.session.session_factory()
+    in_flight.add(Table(number="9"))
+    in_flight.flush()  # holds an older transaction id, still uncommitted
+
+    db.session.add(Table(number="10"))
+    db.session.commit()
+    assert changes(cursor) == ([], cursor)
+
+    in_flight.commit()
+    in_flight.close()
+    records, _ = changes(cursor)
+    assert [r[1] for r in records] == [floor["table"] + 1, floor["table"] + 2]
+
+    # Paging and pruning
+    page, next_cursor = changes(cursor, limit=1)
+    assert len(page) == 1 and changes(next_cursor)[0] == records[1:]
+    assert prune_changes(datetime.utcnow() + timedelta(days=1)) == 4
+    assert ChangeRecord.query.count() == 0
@@ -0,0 +1,87 @@
+# tests/test_replica.py
+import pytest
+from sqlalchemy.orm import Session
+from werkzeug.security import generate_password_hash
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.extensions import replica_engine
+from app.models.models import User, Table
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app("testing")
+    # A SQLite file stands in for the replica; it deliberately holds different rows
+    app.config["SQLALCHEMY_REPLICA_URI"] = f"sqlite:///{tmp_path / 'replica.db'}"
+    app.config["REPLICA_STICKY_SECONDS"] = 60
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all([
+            User(name="Admin", username="admin", password_hash=generate_password_hash("x"), role="admin"),
+            User(name="Manager", username="manager", password_hash=generate_password_hash("x"), role="manager"),
+        ])
+        db.session.commit()
+
+        db.metadata.create_all(replica_engine())
+        with Session(replica_engine()) as replica:
+            replica.add(User(id=1, name="Admin", username="admin", password_hash="x", role="admin"))
+            replica.add(User(id=2, name="Manager", username="manager", password_hash="x", role="manager"))
+            replica.add(User(id=50, name="Only On Replica", username="replica_only", password_hash="x", role="waiter"))
+            replica.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def headers(user_id, role):
+    token = create_access_token(identity=str(user_id), additional_claims={"role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+def usernames(resp):
+    return {u["username"] for u in resp.get_json()}
+
+def test_read_only_views_use_replica(client):
+    assert "replica_only" in usernames(client.get("/users/", headers=headers(1, "admin")))
+    assert client.get("/users/50", headers=headers(1, "admin")).status_code == 200
+
+def test_writes_go_to_primary_and_stick_for_the_writer(client, app):
+    created = client.post("/users/", headers=headers(1, "admin"),
+                          json={"name": "New", "username": "newbie", "password": "pw", "role": "waiter"})
+    assert created.status_code == 201
+    with app.app_context():
+        assert User.query.filter_by(username="newbie").count() == 1
+
+    # The writer reads their own write from the primary...
+    after_write = usernames(client.get("/users/", headers=headers(1, "admin")))
+    assert "newbie" in after_write
+    assert "replica_only" not in after_write
+
+    # ...while everyone else keeps reading from the replica
+    other = usernames(client.get("/users/", headers=headers(2, "manager")))
+    assert "replica_only" in other
+    assert "newbie" not in other
+
+def test_sticky_window_expires(client, app):
+    app.config["REPLICA_STICKY_SECONDS"] = 0
+    client.post("/users/", headers=headers(1, "admin"),
+                json={"name": "New", "username": "newbie2", "password": "pw", "role": "waiter"})
+    assert "replica_only" in usernames(client.get("/users/", headers=headers(1, "admin")))
+
+def test_without_replica_everything_reads_primary(client, app):
+    app.config["SQLALCHEMY_REPLICA_URI"] = None
+    assert "replica_only" not in usernames(client.get("/users/", headers=headers(1, "admin")))
+
+def test_tables_are_served_from_the_replica(client, app):
+    with Session(replica_engine()) as replica:
+        replica.add_all([Table(id=1, number="1"), Table(id=7, number="7", is_vip=True)])
+        replica.commit()
+
+    listing = client.get("/tables/", headers=headers(2, "manager"))
+    assert listing.status_code == 200
+    assert [t["number"] for t in listing.get_json()] == ["1", "7"]
+    revalidated = client.get("/tables/", headers={**headers(2, "manager"), "If-None-Match": listing.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert client.get("/tables/7", headers=headers(2, "manager")).get_json()["is_vip"] is True
@@ -0,0 +1,167 @@
+# tests/test_reports.py
+from datetime import datetime
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.models import User, Table, MenuItem, Order, OrderItem, DailySalesRollup
+from app.routes.reports.rollups import backfill
+
+
+@pytest.fixture
+def app():
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def headers_for(role):
+    return {"Authorization": f"Bearer {create_access_token(identity='1', additional_claims={'role': role})}"}
+
+
+@pytest.fixture
+def headers(app):
+    return headers_for("manager")
+
+
+@pytest.fixture
+def sales(app):
+    """Three paid orders over two days and two waiters, plus one open order."""
+    abebe = User(name="Abebe", username="abebe", password_hash="-", role="waiter")
+    sara = User(name="Sara", username="sara", password_hash="-", role="waiter")
+    table = Table(number="1")
+    tibs = MenuItem(name="Tibs", category="food", price=300)
+    beer = MenuItem(name="Beer", category="drinks", price=80)
+    db.session.add_all([abebe, sara, table, tibs, beer])
+    db.session.flush()
+
+    def order(waiter, at, lines, status="paid"):
+        o = Order(table_id=table.id, user_id=waiter.id, status=status, total_amount=0, created_at=at)
+        db.session.add(o)
+        db.session.flush()
+        for item, qty in lines:
+            db.session.add(OrderItem(order_id=o.id, menu_item_id=item.id, quantity=qty, price=item.price,
+                                     status="ready", station="kitchen"))
+
+    order(abebe, datetime(2026, 10, 16, 12, 15), [(tibs, 2), (beer, 3)])   # 840
+    order(sara, datetime(2026, 10, 16, 19, 40), [(tibs, 1)])               # 300
+    order(abebe, datetime(2026, 10, 17, 12, 5), [(beer, 5)])               # 400
+    order(sara, datetime(2026, 10, 17, 13, 0), [(tibs, 9)], status="open")
+    db.session.commit()
+    # Rows were inserted as paid directly, so bring the rollup up to date
+    backfill()
+
+
+def test_sales_by_day(client, headers, sales):
+    res = client.get("/reports/sales", headers=headers)
+    assert res.status_code == 200
+    assert res.get_json() == [
+        {"day": "2026-10-16T00:00:00", "revenue": 1140.0, "item_count": 6, "order_count": 2, "average_ticket": 570.0},
+        {"day": "2026-10-17T00:00:00", "revenue": 400.0, "item_count": 5, "order_count": 1, "average_ticket": 400.0},
+    ]
+
+
+def test_sales_by_category_menu_item_waiter_and_hour(client, headers, sales):
+    by_category = client.get("/reports/sales?group_by=category", headers=headers).get_json()
+    assert [(g["category"], g["revenue"], g["order_count"]) for g in by_category] == [
+        ("drinks", 640.0, 2), ("food", 900.0, 2),
+    ]
+
+    by_item = client.get("/reports/sales?group_by=menu_item", headers=headers).get_json()
+    assert [(g["menu_item_name"], g["item_count"]) for g in by_item] == [("Tibs", 3), ("Beer", 8)]
+
+    by_waiter = client.get("/reports/sales?group_by=waiter&status=any", headers=headers).get_json()
+    assert [(g["waiter_name"], g["revenue"], g["average_ticket"]) for g in by_waiter] == [
+        ("Abebe", 1240.0, 620.0), ("Sara", 3000.0, 1500.0),
+    ]
+
+    by_hour = client.get("/reports/sales?group_by=hour&from=2026-10-16&to=2026-10-16", headers=headers).get_json()
+    assert [(g["hour"], g["revenue"]) for g in by_hour] == [
+        ("2026-10-16T12:00:00", 840.0), ("2026-10-16T19:00:00", 300.0),
+    ]
+
+
+def test_sales_groups_are_paginated(client, headers, sales):
+    first = client.get("/reports/sales?group_by=hour&limit=2", headers=headers)
+    assert len(first.get_json()) == 2
+    cursor = first.headers["X-Next-Cursor"]
+    rest = client.get(f"/reports/sales?group_by=hour&limit=2&cursor={cursor}", headers=headers)
+    assert [g["hour"] for g in rest.get_json()] == ["2026-10-17T12:00:00"]
+    assert "X-Next-Cursor" not in rest.headers
+
+
+def test_sales_report_validation(client, headers, sales):
+    assert client.get("/reports/sales?group_by=table", headers=headers).status_code == 400
+    assert client.get("/reports/sales?from=monday", headers=headers).status_code == 400
+    assert client.get("/reports/sales", headers=headers_for("waiter")).status_code == 403
+
+
+def test_rollup_matches_live_aggregation(app, client, headers, sales):
+    for group_by in ("day", "menu_item", "waiter"):
+        url = f"/reports/sales?group_by={group_by}"
+        from_rollup = client.get(url, headers=headers)
+        live = client.get(f"{url}&to=2026-10-17T23:59:59", headers=headers)
+        assert from_rollup.headers["X-Report-Source"] == "rollup"
+        assert live.headers["X-Report-Source"] == "live"
+        assert from_rollup.get_json() == live.get_json()
+
+    res = client.get("/reports/sales?group_by=day&from=2026-10-17&to=2026-10-17", headers=headers)
+    assert [g["revenue"] for g in res.get_json()] == [400.0]
+    assert client.get("/reports/sales?group_by=hour", headers=headers).headers["X-Report-Source"] == "live"
+
+
+def test_paying_an_order_updates_the_rollup(app, client, sales):
+    before = client.get("/reports/sales", headers=headers_for("manager")).get_json()
+    order = Order.query.filter_by(status="open").one()
+    order.status = "closed"
+    db.session.commit()
+
+    res = client.put(f"/orders/{order.id}/status", json={"status": "paid"}, headers=headers_for("cashier"))
+    assert res.status_code == 200
+    after = client.get("/reports/sales", headers=headers_for("manager")).get_json()
+    assert after[1]["revenue"] == before[1]["revenue"] + 2700
+    assert after[1]["order_count"] == before[1]["order_count"] + 1
+
+    # Leaving "paid" takes the order back out
+    res = client.put(f"/orders/{order.id}/status", json={"status": "closed"}, headers=headers_for("waiter"))
+    assert res.status_code == 200
+    assert client.get("/reports/sales", headers=headers_for("manager")).get_json() == before
+
+
+def test_paid_orders_take_no_new_items(app, client, sales):
+    before = client.get("/reports/sales", headers=headers_for("manager")).get_json()
+    order = Order.query.filter_by(status="paid").first()
+    tibs = MenuItem.query.filter_by(name="Tibs").one()
+    waiter = headers_for("waiter")
+
+    res = client.post(f"/orders/{order.id}/items", json={"menu_item_id": tibs.id}, headers=waiter)
+    assert res.status_code == 400
+    res = client.post(f"/orders/{order.id}/items:batch", json={"items": [{"menu_item_id": tibs.id}]}, headers=waiter)
+    assert res.status_code == 400
+    assert client.get("/reports/sales", headers=headers_for("manager")).get_json() == before
+
+    # Un-paying only clears the emptied rows of that order's day
+    db.session.add(DailySalesRollup(day=datetime(2026, 10, 1).date(), menu_item_id=tibs.id, station="kitchen",
+                                    waiter_id=order.user_id, revenue=0, item_count=0, order_count=0, ticket_count=0))
+    db.session.commit()
+    res = client.put(f"/orders/{order.id}/status", json={"status": "closed"}, headers=waiter)
+    assert res.status_code == 200
+    assert DailySalesRollup.query.filter_by(day=datetime(2026, 10, 1).date()).count() == 1
+
+
+def test_backfill_cli_rebuilds_a_range(app, sales):
+    db.session.query(DailySalesRollup).update({"revenue": 0})
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["rollups", "backfill", "--from", "2026-10-17", "--to", "2026-10-17"])
+    assert result.exit_code == 0, result.output
+    db.session.expire_all()
+    revenue = {r.day.isoformat(): float(r.revenue) for r in DailySalesRollup.query}
+    assert revenue["2026-10-17"] == 400.0 and revenue["2026-10-16"] == 0
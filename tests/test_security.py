@@ -0,0 +1,207 @@
+# tests/test_security.py
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.models.models import User, RevokedToken
+from app.utils.revocation import RevocationList
+from app.utils.security import PasswordHasher, HashPoolBusy, hash_password, needs_rehash, get_password_hasher
+
+
+@pytest.fixture
+def app():
+    app = create_app("testing")
+    app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+
+def make_user(password_hash, username="cashier"):
+    user = User(name="Cashier", username=username, password_hash=password_hash, role="cashier")
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_needs_rehash_compares_full_parameters(app):
+    current = hash_password("secret")
+    assert current.startswith("pbkdf2:sha256:1000$")
+    assert not needs_rehash(current)
+    assert needs_rehash(hash_password("secret", "pbkdf2:sha256:2000"))
+    assert needs_rehash(hash_password("secret", "scrypt:16384:8:1"))
+
+
+def test_login_upgrades_outdated_hash(app, client):
+    user = make_user(hash_password("secret", "scrypt:16384:8:1"))
+
+    res = client.post("/auth/login", json={"username": "cashier", "password": "secret"})
+    assert res.status_code == 200
+
+    db.session.refresh(user)
+    assert user.password_hash.startswith("pbkdf2:sha256:1000$")
+
+    # The upgraded hash keeps working and is left alone from now on
+    upgraded = user.password_hash
+    res = client.post("/auth/login", json={"username": "cashier", "password": "secret"})
+    assert res.status_code == 200
+    db.session.refresh(user)
+    assert user.password_hash == upgraded
+
+
+def test_failed_login_keeps_hash(app, client):
+    old = hash_password("secret", "scrypt:16384:8:1")
+    user = make_user(old)
+
+    res = client.post("/auth/login", json={"username": "cashier", "password": "wrong"})
+    assert res.status_code == 401
+    db.session.refresh(user)
+    assert user.password_hash == old
+
+
+def test_busy_hash_pool_returns_503(app, client):
+    make_user(hash_password("secret"))
+    release = threading.Event()
+    hasher = PasswordHasher(workers=1, max_pending=0)
+    app.extensions["password_hasher"] = hasher
+    blocker = hasher._submit(release.wait)
+    try:
+        res = client.post("/auth/login", json={"username": "cashier", "password": "secret"})
+        assert res.status_code == 503
+        assert res.headers["Retry-After"] == "1"
+    finally:
+        release.set()
+        blocker.result()
+
+    res = client.post("/auth/login", json={"username": "cashier", "password": "secret"})
+    assert res.status_code == 200
+
+
+def test_hasher_frees_slots(app):
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    digest = hash_password("secret")
+    for _ in range(5):
+        assert hasher.verify("secret", digest)
+    assert get_password_hasher() is get_password_hasher()
+
+    release = threading.Event()
+    first = hasher._submit(release.wait)
+    second = hasher._submit(release.wait)
+    with pytest.raises(HashPoolBusy):
+        hasher._submit(release.wait)
+    release.set()
+    first.result(), second.result()
+    assert hasher.verify("secret", digest)
+
+
+def login(client, username="cashier", password="secret"):
+    res = client.post("/auth/login", json={"username": username, "password": password})
+    return {"Authorization": f"Bearer {res.get_json()['access_token']}"}
+
+
+# Runs in its own interpreter: gevent's monkey-patching must come first and
+# must not leak into the rest of the test session
+GEVENT_LOGIN_SCRIPT = textwrap.dedent("""
+    from gevent import monkey; monkey.patch_all()
+    import json, time, gevent
+    from app import create_app, db
+    from app.models.models import User
+    from app.utils.security import hash_password
+
+    SLOW = "pbkdf2:sha256:1500000"
+    app = create_app("testing")
+    app.config["PASSWORD_HASH_METHOD"] = SLOW
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(name="Slow", username="slow", password_hash=hash_password("pw", SLOW), role="waiter"))
+        db.session.commit()
+    client = app.test_client()
+
+    def timed(call):
+        start = time.perf_counter()
+        status = call().status_code
+        return status, start, time.perf_counter()
+
+    try:
+        login = gevent.spawn(timed, lambda: client.post("/auth/login", json={"username": "slow", "password": "pw"}))
+        gevent.sleep(0.05)  # let the login reach the hash
+        ping = gevent.spawn(timed, lambda: client.get("/"))
+        gevent.joinall([login, ping])
+        print(json.dumps({"login": login.value, "ping": ping.value}))
+    finally:
+        with app.app_context():
+            db.drop_all()
+""")
+
+
+def test_gevent_worker_keeps_serving_during_login_hash():
+    pytest.importorskip("gevent")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", GEVENT_LOGIN_SCRIPT], cwd=root, capture_output=True,
+                         text=True, timeout=120, env={**os.environ, "PYTHONPATH": root})
+    assert out.returncode == 0, out.stderr
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    (login_status, _, login_done), (ping_status, _, ping_done) = result["login"], result["ping"]
+    assert login_status == ping_status == 200
+    # The other request finished while the login was still hashing
+    assert ping_done < login_done
+
+
+def test_logout_revokes_only_that_token(app, client):
+    user = make_user(hash_password("secret"))
+    first, second = login(client), login(client)
+
+    assert client.post("/auth/logout", headers=first).status_code == 200
+    assert client.get(f"/users/{user.id}", headers=first).status_code == 401
+    assert client.post("/auth/logout", headers=first).status_code == 401
+    assert client.get(f"/users/{user.id}", headers=second).status_code == 200
+    assert db.session.query(RevokedToken).count() == 1
+
+
+def test_revocations_from_other_workers_are_picked_up_incrementally(app, client):
+    user = make_user(hash_password("secret"))
+    headers = login(client)
+    assert client.get(f"/users/{user.id}", headers=headers).status_code == 200
+
+    # Another worker process has its own list; simulate it with a second one
+    other = RevocationList(interval=0)
+    assert not other.is_revoked("unknown")
+
+    client.post("/auth/logout", headers=headers)
+    jti = db.session.query(RevokedToken.jti).scalar()
+    with count_queries() as statements:
+        assert other.is_revoked(jti)
+    assert "revoked_at >" in statements[0]
+
+    # Entries are forgotten once the token would have expired anyway
+    other.add("expired", datetime.utcnow() - timedelta(seconds=1))
+    assert not other.is_revoked("expired")
+    assert other.is_revoked(jti)
@@ -0,0 +1,40 @@
+# tests/test_serializers.py
+from collections import namedtuple
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from app import create_app
+from app.utils.json_provider import JSONProvider, OrjsonProvider, init_json
+from app.utils.serializers import Schema
+
+Row = namedtuple("Row", ["id", "price", "created_at", "notes"])
+ROW = Row(7, Decimal("12.50"), datetime(2026, 10, 18, 9, 30, 0, 125000), None)
+
+
+@pytest.fixture(params=["orjson", "json"])
+def app(request):
+    app = create_app("testing")
+    app.config["JSON_PROVIDER"] = request.param
+    init_json(app)
+    return app
+
+
+def test_schema_dumps_all_or_projected_fields():
+    schema = Schema("id", "price", "created_at", "notes")
+    assert schema.dump(ROW) == {"id": 7, "price": Decimal("12.50"), "created_at": ROW.created_at, "notes": None}
+    assert schema.dump(ROW, ["id"]) == {"id": 7}
+    assert schema.dump_many([ROW, ROW], ("notes", "id")) == [{"notes": None, "id": 7}] * 2
+
+
+def test_providers_encode_decimal_and_datetime_alike(app):
+    expected = {"id": 7, "price": 12.5, "created_at": "2026-10-18T09:30:00.125000", "notes": None}
+    with app.test_request_context():
+        assert app.json.loads(app.json.dumps(Schema(*Row._fields).dump(ROW))) == expected
+        response = app.json.response(Schema(*Row._fields).dump(ROW))
+    assert response.mimetype == "application/json"
+    assert response.get_json() == expected
+
+
+def test_provider_selection(app):
+    expected = OrjsonProvider if app.config["JSON_PROVIDER"] == "orjson" else JSONProvider
+    assert type(app.json) is expected
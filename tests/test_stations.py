@@ -0,0 +1,211 @@
+# tests/test_stations.py
+import json
+import queue
+import time
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.models import User, Table, MenuItem, Order, OrderItem
+from app.utils.pubsub import PostgresBroker
+from app.routes.stations.feed import event_id, parse_event_id
+
+@pytest.fixture
+def app():
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def open_order(app):
+    waiter = User(name="Waiter", username="waiter", password_hash="x", role="waiter")
+    table = Table(number="1")
+    db.session.add_all([waiter, table])
+    db.session.flush()
+    db.session.add_all([
+        MenuItem(name="Steak", category="raw meat", price=10.0, is_available=True),
+        MenuItem(name="Pasta", category="food", price=8.0, is_available=True),
+        MenuItem(name="Beer", category="drinks", price=3.0, is_available=True),
+    ])
+    order = Order(table_id=table.id, user_id=waiter.id, status="open", total_amount=0)
+    db.session.add(order)
+    db.session.commit()
+    return order
+
+def auth_headers(user_id, role):
+    token = create_access_token(identity=str(user_id), additional_claims={"role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+def menu_id(name):
+    return MenuItem.query.filter_by(name=name).one().id
+
+def read_events(response, count):
+    """Pull `count` item events off an open SSE response, skipping comments/retry lines."""
+    events, chunks = [], iter(response.response)
+    while len(events) < count:
+        chunk = next(chunks)
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if not chunk.startswith("id:"):
+            continue
+        fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+        events.append((fields["id"], json.loads(fields["data"])))
+    return events
+
+def test_event_ids_round_trip_and_order():
+    from datetime import datetime
+    a = event_id(datetime(2026, 1, 1, 12, 0, 0, 5), 7)
+    assert parse_event_id(a) == (datetime(2026, 1, 1, 12, 0, 0, 5), 7)
+    assert parse_event_id("garbage") is None
+
+def test_feed_pushes_new_and_updated_items(app, client, open_order):
+    feed = client.get("/stations/kitchen/feed", headers=auth_headers(1, "kitchen"))
+    assert feed.status_code == 200
+    assert feed.mimetype == "text/event-stream"
+
+    client.post(f"/orders/{open_order.id}/items:batch",
+                json={"items": [{"menu_item_id": menu_id("Pasta")}, {"menu_item_id": menu_id("Beer")}]},
+                headers=auth_headers(1, "waiter"))
+    (first_id, created), = read_events(feed, 1)
+    assert created["station"] == "kitchen"
+    assert created["status"] == "pending"
+
+    kitchen_user = User(name="Cook", username="cook", password_hash="x", role="kitchen")
+    db.session.add(kitchen_user)
+    db.session.commit()
+    client.put(f"/orders/items/{created['id']}/status", json={"status": "ready"},
+               headers=auth_headers(kitchen_user.id, "kitchen"))
+    (second_id, updated), = read_events(feed, 1)
+    assert updated["id"] == created["id"]
+    assert updated["status"] == "ready"
+    assert parse_event_id(second_id) > parse_event_id(first_id)
+    feed.close()
+
+def test_feed_resumes_from_last_event_id(app, client, open_order):
+    app.config["STATION_FEED_REPLAY_OVERLAP_SECONDS"] = 0
+    headers = auth_headers(1, "waiter")
+    for name in ("Pasta", "Pasta", "Steak", "Pasta"):
+        client.post(f"/orders/{open_order.id}/items", json={"menu_item_id": menu_id(name)}, headers=headers)
+    kitchen_items = OrderItem.query.filter_by(station="kitchen").order_by(OrderItem.id).all()
+    seen = event_id(kitchen_items[0].updated_at, kitchen_items[0].id)
+
+    feed = client.get("/stations/kitchen/feed", headers={**auth_headers(1, "kitchen"), "Last-Event-ID": seen})
+    replayed = read_events(feed, 2)
+    assert [data["id"] for _, data in replayed] == [i.id for i in kitchen_items[1:]]
+    feed.close()
+
+def test_feed_replay_overlaps_and_is_capped(app, client, open_order):
+    for _ in range(3):
+        client.post(f"/orders/{open_order.id}/items", json={"menu_item_id": menu_id("Pasta")},
+                    headers=auth_headers(1, "waiter"))
+    items = OrderItem.query.order_by(OrderItem.id).all()
+    headers = {**auth_headers(1, "kitchen"), "Last-Event-ID": event_id(items[-1].updated_at, items[-1].id)}
+
+    # Changes just before Last-Event-ID are sent again, in case one committed late
+    feed = client.get("/stations/kitchen/feed", headers=headers)
+    assert [data["id"] for _, data in read_events(feed, 3)] == [i.id for i in items]
+    feed.close()
+
+    # Too much missed: one reset event instead of a replay
+    app.config["STATION_FEED_REPLAY_LIMIT"] = 1
+    feed = client.get("/stations/kitchen/feed", headers=headers)
+    chunks = iter(feed.response)
+    assert next(chunks).startswith(b"retry:")
+    assert next(chunks).startswith(b"event: reset")
+    feed.close()
+
+def test_feed_rejects_unknown_station_and_roles(client, app):
+    assert client.get("/stations/pastry/feed", headers=auth_headers(1, "admin")).status_code == 404
+    assert client.get("/stations/kitchen/feed", headers=auth_headers(1, "waiter")).status_code == 403
+    # Station staff only see their own station
+    assert client.get("/stations/bar/feed", headers=auth_headers(1, "kitchen")).status_code == 403
+    assert client.get("/stations/bar/queue", headers=auth_headers(1, "kitchen")).status_code == 403
+    assert client.get("/stations/bar/queue", headers=auth_headers(1, "bar")).status_code == 200
+
+def test_long_notes_reach_the_feed_over_postgres(app, client, open_order):
+    broker = PostgresBroker("trustnet_test_events")
+    app.extensions["broker"] = broker
+    feed = client.get("/stations/kitchen/feed", headers=auth_headers(1, "kitchen"))
+    note = "no onions " * 900  # over pg_notify's 8000 byte payload limit
+
+    # The listener connects asynchronously; keep adding until one comes through
+    subscription, = broker._subscribers["kitchen"]
+    for attempt in range(50):
+        res = client.post(f"/orders/{open_order.id}/items", json={"menu_item_id": menu_id("Pasta"), "notes": note},
+                          headers=auth_headers(1, "waiter"))
+        assert res.status_code == 201
+        time.sleep(0.1)
+        if not subscription.empty():
+            break
+    else:
+        pytest.fail("no notification received")
+    (_, data), = read_events(feed, 1)
+    assert data["notes"] == note
+    feed.close()
+
+def test_publish_failures_do_not_fail_committed_writes(app, client, open_order, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("broker down")
+    monkeypatch.setattr(app.extensions["broker"], "publish", broken)
+    res = client.post(f"/orders/{open_order.id}/items", json={"menu_item_id": menu_id("Pasta")},
+                      headers=auth_headers(1, "waiter"))
+    assert res.status_code == 201
+    assert OrderItem.query.count() == 1
+
+def test_feed_closes_when_a_slow_client_overflows(app, client, open_order):
+    app.extensions["broker"].max_queue = 1
+    feed = client.get("/stations/kitchen/feed", headers=auth_headers(1, "kitchen"))
+    chunks = iter(feed.response)
+    assert next(chunks).startswith(b"retry:")
+    client.post(f"/orders/{open_order.id}/items:batch",
+                json={"items": [{"menu_item_id": menu_id("Pasta")}] * 2}, headers=auth_headers(1, "waiter"))
+    client.post(f"/orders/{open_order.id}/items", json={"menu_item_id": menu_id("Pasta")},
+                headers=auth_headers(1, "waiter"))
+    # The client reconnects and replays from Last-Event-ID instead of silently missing tickets
+    assert list(chunks) == []
+    feed.close()
+
+def test_postgres_broker_delivers_notifications(app):
+    broker = PostgresBroker("trustnet_test_events")
+    broker.start(db.engine)
+    subscription = broker.subscribe("bar")
+
+    # The listener connects asynchronously; keep publishing until it is LISTENing
+    for attempt in range(50):
+        broker.publish("bar", [{"id": str(attempt)}], engine=db.engine)
+        try:
+            message = subscription.get(timeout=0.2)
+            break
+        except queue.Empty:
+            continue
+    else:
+        pytest.fail("no notification received")
+    assert "id" in message
+
+def test_station_queue_returns_pending_items_in_order(app, client, open_order):
+    headers = auth_headers(1, "waiter")
+    client.post(f"/orders/{open_order.id}/items:batch",
+                json={"items": [{"menu_item_id": menu_id("Pasta"), "notes": "first"},
+                                {"menu_item_id": menu_id("Steak")},
+                                {"menu_item_id": menu_id("Pasta"), "notes": "second"},
+                                {"menu_item_id": menu_id("Pasta"), "notes": "done"}]},
+                headers=headers)
+    done = OrderItem.query.filter_by(notes="done").one()
+    done.status = "ready"
+    db.session.commit()
+
+    resp = client.get("/stations/kitchen/queue", headers=auth_headers(1, "kitchen"))
+    assert resp.status_code == 200
+    queue_items = resp.get_json()
+    assert [i["notes"] for i in queue_items] == ["first", "second"]
+    assert queue_items[0]["menu_item_name"] == "Pasta"
+    assert queue_items[0]["table_number"] == "1"
+
+    limited = client.get("/stations/kitchen/queue?limit=1", headers=auth_headers(1, "kitchen"))
+    assert [i["notes"] for i in limited.get_json()] == ["first"]
+    assert client.get("/stations/pastry/queue", headers=auth_headers(1, "kitchen")).status_code == 404
@@ -0,0 +1,139 @@
+# tests/test_sync.py
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.models import User, Table, MenuItem, Order, OrderItem
+from app.utils.pagination import encode_cursor
+
+
+@pytest.fixture
+def app():
+    app = create_app("testing")
+    app.config["SYNC_OVERLAP_SECONDS"] = 0
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def floor(app):
+    """A waiter, two tables, a small menu and one open and one paid order."""
+    waiter = User(name="Abebe", username="abebe", password_hash="-", role="waiter")
+    tables = [Table(number="1"), Table(number="2")]
+    tibs = MenuItem(name="Tibs", category="food", price=300)
+    beer = MenuItem(name="Beer", category="drinks", price=80)
+    db.session.add_all([waiter, *tables, tibs, beer])
+    db.session.flush()
+    open_order = Order(table_id=tables[0].id, user_id=waiter.id, status="open", total_amount=0)
+    paid_order = Order(table_id=tables[1].id, user_id=waiter.id, status="paid", total_amount=0)
+    db.session.add_all([open_order, paid_order])
+    db.session.flush()
+    for order in (open_order, paid_order):
+        db.session.add(OrderItem(order_id=order.id, menu_item_id=tibs.id, quantity=1, price=300,
+                                 status="pending", station="kitchen"))
+    db.session.commit()
+    return {"waiter": waiter.id, "tables": [t.id for t in tables], "tibs": tibs.id, "beer": beer.id,
+            "open": open_order.id, "paid": paid_order.id}
+
+
+def headers_for(user_id, role):
+    return {"Authorization": f"Bearer {create_access_token(identity=str(user_id), additional_claims={'role': role})}"}
+
+
+def test_pull_snapshot_then_only_changes(client, floor):
+    headers = headers_for(floor["waiter"], "waiter")
+    snapshot = client.get("/sync", headers=headers).get_json()
+    assert [o["id"] for o in snapshot["orders"]] == [floor["open"]]
+    assert [i["order_id"] for i in snapshot["order_items"]] == [floor["open"]]
+    assert len(snapshot["tables"]) == 2 and len(snapshot["menu_items"]) == 2
+
+    # Nothing changed: nothing but a cursor
+    quiet = client.get(f"/sync?since={snapshot['cursor']}", headers=headers).get_json()
+    assert quiet["orders"] == [] and quiet["order_items"] == [] and quiet["deleted_order_items"] == []
+    assert quiet["tables"] is None and quiet["menu_items"] is None
+
+    client.post(f"/orders/{floor['open']}/items", json={"menu_item_id": floor["beer"]}, headers=headers)
+    changes = client.get(f"/sync?since={quiet['cursor']}", headers=headers).get_json()
+    assert [o["id"] for o in changes["orders"]] == [floor["open"]]
+    assert changes["orders"][0]["total_amount"] == 380
+    assert [i["menu_item_id"] for i in changes["order_items"]] == [floor["beer"]]
+    assert changes["tables"] is None and changes["menu_items"] is None
+
+    # Any catalog change resends that catalog whole
+    admin = headers_for(floor["waiter"], "admin")
+    client.put(f"/menu-items/{floor['beer']}", json={"price": 90}, headers=admin)
+    db.session.add(Table(number="3"))
+    db.session.commit()
+    catalog = client.get(f"/sync?since={changes['cursor']}", headers=headers).get_json()
+    assert catalog["orders"] == []
+    assert sorted(t["number"] for t in catalog["tables"]) == ["1", "2", "3"]
+    assert {m["id"]: m["price"] for m in catalog["menu_items"]}[floor["beer"]] == 90
+
+    assert client.get("/sync?since=garbage", headers=headers).status_code == 400
+
+
+def test_pull_reports_deleted_items_and_their_orders(client, floor):
+    headers = headers_for(floor["waiter"], "waiter")
+    cursor = client.get("/sync", headers=headers).get_json()["cursor"]
+    item_id = OrderItem.query.filter_by(order_id=floor["open"]).one().id
+    db.session.rollback()  # the delete below runs in a transaction of its own, like a request's
+
+    # Removing the item leaves no item row behind: the order's new total
+    # arrives because the trigger bumps its updated_at, the item as a tombstone
+    db.session.execute(db.text("DELETE FROM order_items WHERE id = :id"), {"id": item_id})
+    db.session.commit()
+    changes = client.get(f"/sync?since={cursor}", headers=headers).get_json()
+    assert [(o["id"], o["total_amount"]) for o in changes["orders"]] == [(floor["open"], 0)]
+    assert changes["order_items"] == [] and changes["deleted_order_items"] == [item_id]
+
+    # Cursor values of the wrong type are rejected
+    assert client.get(f"/sync?since={encode_cursor(['2026-10-18T00:00:00', 'v1', 'x'])}",
+                      headers=headers).status_code == 400
+
+
+def test_push_applies_offline_queue_atomically(client, floor):
+    headers = {**headers_for(floor["waiter"], "waiter"), "Idempotency-Key": "tablet-3:upload:1"}
+    queue = {"mutations": [
+        {"op": "create_order", "ref": "t1", "table_id": floor["tables"][1]},
+        {"op": "add_items", "order_ref": "t1", "items": [{"menu_item_id": floor["tibs"], "quantity": 2},
+                                                         {"menu_item_id": floor["beer"]}]},
+        {"op": "add_items", "order_id": floor["open"], "items": [{"menu_item_id": floor["beer"]}]},
+        {"op": "set_status", "order_ref": "t1", "status": "closed"},
+    ]}
+    res = client.post("/sync", json=queue, headers=headers)
+    assert res.status_code == 200
+    body = res.get_json()
+    new_id = body["refs"]["t1"]
+    assert body["results"][0] == {"order_id": new_id}
+    assert len(body["results"][1]["item_ids"]) == 2
+
+    db.session.expire_all()
+    created = db.session.get(Order, new_id)
+    assert created.status == "closed" and float(created.total_amount) == 680
+    assert float(db.session.get(Order, floor["open"]).total_amount) == 380
+
+    # A retried upload is replayed, not applied twice
+    again = client.post("/sync", json=queue, headers=headers)
+    assert again.get_json() == body
+    assert Order.query.count() == 3
+
+    # One bad mutation rejects the whole batch
+    bad = {"mutations": [
+        {"op": "create_order", "ref": "t2", "table_id": floor["tables"][0]},
+        {"op": "add_items", "order_ref": "t2", "items": [{"menu_item_id": 999}]},
+    ]}
+    res = client.post("/sync", json=bad, headers=headers_for(floor["waiter"], "waiter"))
+    assert res.status_code == 400
+    assert res.get_json()["index"] == 1
+    assert Order.query.count() == 3
+
+    stale = {"mutations": [{"op": "set_status", "order_id": floor["open"], "status": "closed", "version": 1}]}
+    res = client.post("/sync", json=stale, headers=headers_for(floor["waiter"], "waiter"))
+    assert res.status_code == 409 and res.get_json()["index"] == 0
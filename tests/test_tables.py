@@ -127,3 +127,33 @@ def test_delete_table(client, app):
         # Verify deleted
         t = Table.query.get(table.id)
         assert t is None
+
+def test_tables_conditional_get(client, app):
+    with app.app_context():
+        _, admin_token = create_user_and_token("admin", db.session, "admin5")
+        table = Table(number="T7")
+        db.session.add(table)
+        db.session.commit()
+
+        first = client.get("/tables/", headers=auth_headers(admin_token))
+        etag = first.headers["ETag"]
+        cached = client.get("/tables/", headers={**auth_headers(admin_token), "If-None-Match": etag})
+        assert cached.status_code == 304
+
+        # A different query string is a different representation
+        other = client.get("/tables/?fields=id", headers={**auth_headers(admin_token), "If-None-Match": etag})
+        assert other.status_code == 200
+
+        client.put(
+            f"/tables/{table.id}",
+            data=json.dumps({"status": "occupied"}),
+            headers={**auth_headers(admin_token), "Content-Type": "application/json"},
+        )
+        after = client.get("/tables/", headers={**auth_headers(admin_token), "If-None-Match": etag})
+        assert after.status_code == 200
+        assert after.get_json()[0]["status"] == "occupied"
+
+        detail = client.get(f"/tables/{table.id}", headers=auth_headers(admin_token))
+        assert client.get(f"/tables/{table.id}",
+                          headers={**auth_headers(admin_token), "If-None-Match": detail.headers["ETag"]}).status_code == 304
+        assert client.get("/tables/9999", headers=auth_headers(admin_token)).status_code == 404